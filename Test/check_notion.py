@@ -15,7 +15,7 @@ async def main():
     client = Client(auth=config.notion_token)
     fetcher = NotionFetcher(client)
     fetcher.fetch_tree(config.notion_page_ids, config.notion_database_ids)
-    pages = fetcher._cached_pages
+    pages = list(fetcher._cached_pages.values())
     
     print(f"Total pages: {len(pages)}")
     with open('Test/notion_dump.txt', 'w', encoding='utf-8') as f:
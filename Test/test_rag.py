@@ -48,8 +48,8 @@ async def main():
     print("\n--- INGESTION ---")
     await ingestion.ingest_notion_only() 
     
-    collection_count = vector_store.collection.count()
-    parent_count = len(vector_store.parent_docs)
+    collection_count = vector_store.count()
+    parent_count = len(vector_store.list_parent_ids())
     print(f"Index built: {parent_count} parents, {collection_count} child chunks")
     
     question = "Raid Boss ลงแล้วได้ไรบ้างอะ Bizzare"
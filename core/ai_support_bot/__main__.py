@@ -11,12 +11,18 @@ import sys
 from core.ai_support_bot.ai.openrouter import OpenRouterEngine
 from core.ai_support_bot.bot.client import SokeberSupportBot
 from core.ai_support_bot.bot.commands import AdminCommands
+from core.ai_support_bot.cache.embedding_cache import EmbeddingCache
 from core.ai_support_bot.cache.memory_cache import MemoryCache
+from core.ai_support_bot.cache.semantic_cache import SemanticCache
 from core.ai_support_bot.config import load_config
 from core.ai_support_bot.audit_logging.audit import log_event, setup_audit_logger
+from core.ai_support_bot.rag.filters import QueryRouter
 from core.ai_support_bot.rag.retriever import ContextRetriever
 from core.ai_support_bot.rag.notion_fetcher import NotionFetcher
+from core.ai_support_bot.rag.page_store import NotionPageStore
+from core.ai_support_bot.rag.search_executor import SearchExecutor
 from core.ai_support_bot.rag.sheets_fetcher import SheetsFetcher
+from core.ai_support_bot.rag.tokenizer import TokenizationService
 from core.ai_support_bot.rag.ingestion import DataIngestionTask
 from core.ai_support_bot.ai.embedding import EmbeddingEngine
 from core.ai_support_bot.rag.vector_store import VectorStore
@@ -43,6 +49,15 @@ def main():
 
     # Initialize components
     answer_cache = MemoryCache(default_ttl=config.cache_ttl_seconds)
+    semantic_cache = (
+        SemanticCache(
+            max_entries=config.semantic_cache_size,
+            threshold=config.semantic_cache_threshold,
+            near_miss_margin=config.semantic_cache_near_miss_margin,
+            default_ttl=config.cache_ttl_seconds,
+        )
+        if config.semantic_cache_size > 0 else None
+    )
 
     llm_engine = None
     if config.openrouter_api_key:
@@ -63,16 +78,23 @@ def main():
     
     if config.notion_token:
         try:
-            from notion_client import Client
+            from notion_client import AsyncClient, Client
             notion_client = Client(auth=config.notion_token)
-            notion_fetcher = NotionFetcher(notion_client)
+            notion_fetcher = NotionFetcher(
+                notion_client,
+                async_client=AsyncClient(auth=config.notion_token),
+                state_path=config.notion_state_path,
+                page_store=NotionPageStore(config.notion_snapshot_path),
+            )
             logger.info("Notion fetcher initialized")
         except Exception as e:
             logger.warning(f"Failed to initialize Notion: {e}")
     
     if config.google_sa_base64:
         try:
-            sheets_fetcher = SheetsFetcher.from_base64_sa(config.google_sa_base64)
+            sheets_fetcher = SheetsFetcher.from_base64_sa(
+                config.google_sa_base64, key_columns=config.sheets_key_columns
+            )
             logger.info("Google Sheets fetcher initialized")
         except Exception as e:
             logger.warning(f"Failed to initialize Sheets: {e}")
@@ -82,10 +104,27 @@ def main():
     if config.openrouter_api_key:
         embedding_engine = EmbeddingEngine(
             api_key=config.openrouter_api_key,
-            model=config.embedding_model
+            model=config.embedding_model,
+            dimensions=config.embedding_dimensions or None,
+            cache=EmbeddingCache(
+                config.embedding_cache_path,
+                max_entries=config.embedding_cache_max_entries,
+            ),
         )
     
-    vector_store = VectorStore()
+    vector_store = VectorStore(
+        parent_cache_size=config.parent_cache_size,
+        backend=config.vector_backend,
+        quantization=config.vector_quantization,
+        coarse_dims=config.coarse_search_dims,
+    )
+
+    tokenizer = TokenizationService(
+        processes=config.tokenizer_processes,
+        query_cache_size=config.query_token_cache_size,
+    )
+    tokenizer.start_warmup()
+    search_executor = SearchExecutor(max_workers=config.search_workers)
 
     # Create context retriever
     context_retriever = ContextRetriever(
@@ -93,6 +132,12 @@ def main():
         vector_store=vector_store,
         notion_fetcher=notion_fetcher,
         sheets_fetcher=sheets_fetcher,
+        tokenizer=tokenizer,
+        executor=search_executor,
+        rrf_k=config.rrf_k,
+        fusion_weights={"vector": config.rrf_vector_weight, "bm25": config.rrf_bm25_weight},
+        router=QueryRouter() if config.query_routing else None,
+        retrieval_cache_size=config.retrieval_cache_size,
     )
     logger.info("Context retriever initialized")
 
@@ -106,6 +151,11 @@ def main():
         notion_page_ids=config.notion_page_ids,
         notion_database_ids=config.notion_database_ids,
         sheets_spreadsheet_ids=config.sheets_spreadsheet_ids,
+        embedding_concurrency=config.embedding_concurrency,
+        embedding_batch_tokens=config.embedding_batch_tokens,
+        notion_full_sync_every=config.notion_full_sync_every,
+        pipeline_queue_size=config.ingestion_queue_size,
+        pipeline_write_chunk=config.ingestion_write_chunk,
     )
 
     # Create bot
@@ -114,6 +164,7 @@ def main():
         llm_engine=llm_engine,
         answer_cache=answer_cache,
         context_retriever=context_retriever,
+        semantic_cache=semantic_cache,
     )
     bot.ingestion_task = ingestion_task
     ingestion_task.context_retriever = context_retriever
@@ -134,6 +185,8 @@ def main():
         log_event("bot_shutting_down")
         await ingestion_task.stop()
         await bot.close()
+        tokenizer.close()
+        search_executor.close()
 
     def signal_handler(sig, frame):
         logger.info(f"Received signal {sig}, shutting down...")
@@ -2,25 +2,51 @@
 
 from __future__ import annotations
 
+import asyncio
 import logging
+from typing import TYPE_CHECKING
+
 from openai import AsyncOpenAI
 
+if TYPE_CHECKING:
+    from core.ai_support_bot.cache.embedding_cache import EmbeddingCache
+
 logger = logging.getLogger("ai_support_bot.ai.embedding")
 
 class EmbeddingEngine:
-    """Uses OpenRouter's OpenAI-compatible API to generate text embeddings."""
+    """Uses OpenRouter's OpenAI-compatible API to generate text embeddings.
+
+    ``dimensions`` asks the API for shortened vectors (text-embedding-3 models
+    support this); None keeps the model's native size.
+    """
     
-    def __init__(self, api_key: str, model: str = "openai/text-embedding-3-small"):
+    def __init__(
+        self,
+        api_key: str,
+        model: str = "openai/text-embedding-3-small",
+        cache: EmbeddingCache | None = None,
+        dimensions: int | None = None,
+    ):
         self.api_key = api_key
         self.model = model
+        self.cache = cache
+        self.dimensions = dimensions
         self.client = AsyncOpenAI(
             api_key=api_key,
             base_url="https://openrouter.ai/api/v1"
         )
-        logger.info(f"Initialized EmbeddingEngine with model {self.model}")
+        logger.info(f"Initialized EmbeddingEngine with model {self.cache_key}")
+
+    @property
+    def cache_key(self) -> str:
+        """Model name under which vectors are cached; includes the dimensions if reduced."""
+        return self.model if self.dimensions is None else f"{self.model}@{self.dimensions}"
 
     async def embed(self, texts: list[str]) -> list[list[float]]:
         """Convert a list of strings into embedding vectors.
+
+        When a cache is attached, vectors already stored for this model are
+        served locally and only the misses are sent to the API.
         
         Args:
             texts: List of text strings to embed.
@@ -30,13 +56,30 @@ class EmbeddingEngine:
         """
         if not texts:
             return []
-            
+        if self.cache is None:
+            return await self._request_embeddings(texts)
+
+        # Serve what we can from the persistent cache; only misses hit the API
+        cached = await asyncio.to_thread(self.cache.get_many, self.cache_key, texts)
+        missing = list(dict.fromkeys(t for t, v in zip(texts, cached, strict=True) if v is None))
+        by_text: dict[str, list[float]] = {}
+        if missing:
+            fresh = await self._request_embeddings(missing)
+            await asyncio.to_thread(self.cache.put_many, self.cache_key, missing, fresh)
+            by_text = dict(zip(missing, fresh, strict=True))
+            logger.debug(f"Embedding cache: {len(texts) - len(missing)} hits, {len(missing)} misses")
+        return [v if v is not None else by_text[t] for t, v in zip(texts, cached, strict=True)]
+
+    async def _request_embeddings(self, texts: list[str]) -> list[list[float]]:
+        """Send texts to the embeddings API (no caching)."""
         try:
             # We batch texts to process efficiently
-            response = await self.client.embeddings.create(
-                model=self.model,
-                input=texts
-            )
+            if self.dimensions is None:
+                response = await self.client.embeddings.create(model=self.model, input=texts)
+            else:
+                response = await self.client.embeddings.create(
+                    model=self.model, input=texts, dimensions=self.dimensions
+                )
             # The API returns them in the same order
             embeddings = [item.embedding for item in response.data]
             return embeddings
@@ -0,0 +1,186 @@
+"""Concurrent, token-budgeted batch dispatcher for bulk embedding."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from core.ai_support_bot.ai.embedding import EmbeddingEngine
+
+logger = logging.getLogger("ai_support_bot.ai.embedding_dispatcher")
+
+DEFAULT_BATCH_TOKENS = 8000
+DEFAULT_BATCH_ITEMS = 256
+DEFAULT_CONCURRENCY = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap upper-bound token estimate without a tokenizer.
+
+    ASCII averages ~4 chars/token; Thai and other non-Latin scripts are
+    counted as one token per character, which over- rather than
+    under-estimates for BPE tokenizers.
+    """
+    ascii_chars = sum(1 for c in text if ord(c) < 128)
+    return ascii_chars // 4 + (len(text) - ascii_chars) + 1
+
+
+def _is_payload_too_large(error: Exception) -> bool:
+    """Whether the provider rejected a request because the input was too big."""
+    if getattr(error, "status_code", None) == 413:
+        return True
+    message = str(error).lower()
+    return any(hint in message for hint in (
+        "too large", "maximum context length", "too many tokens", "max_tokens_per_request",
+    ))
+
+
+@dataclass
+class DispatchStats:
+    """Throughput figures accumulated over a dispatcher run (see ``reset_stats``).
+
+    ``elapsed_seconds`` is wall time with at least one ``embed`` call active,
+    so concurrent calls are not double-counted.
+    """
+    chunks: int = 0
+    batches: int = 0
+    retries: int = 0
+    splits: int = 0
+    elapsed_seconds: float = 0.0
+
+    @property
+    def chunks_per_second(self) -> float:
+        return self.chunks / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+    def summary(self) -> str:
+        return (
+            f"{self.chunks} chunks in {self.batches} batches ({self.elapsed_seconds:.1f}s, "
+            f"{self.chunks_per_second:.1f} chunks/s, retries={self.retries}, splits={self.splits})"
+        )
+
+
+class EmbeddingDispatcher:
+    """Embeds large text lists with token-packed batches run concurrently.
+
+    - Batches are packed greedily (in order) up to ``max_batch_tokens``
+    - Up to ``max_concurrency`` batches are in flight at once, across all
+      concurrent ``embed`` calls
+    - Failed batches retry with exponential backoff; a batch rejected as too
+      large is split in half and each half dispatched separately
+    - Output order always matches input order
+    """
+
+    def __init__(
+        self,
+        engine: EmbeddingEngine,
+        max_batch_tokens: int = DEFAULT_BATCH_TOKENS,
+        max_batch_items: int = DEFAULT_BATCH_ITEMS,
+        max_concurrency: int = DEFAULT_CONCURRENCY,
+        max_retries: int = 4,
+        base_delay: float = 1.0,
+    ):
+        self.engine = engine
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_items = max_batch_items
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.last_stats = DispatchStats()
+        self._semaphore: asyncio.Semaphore | None = None
+        self._semaphore_loop: asyncio.AbstractEventLoop | None = None
+        self._active_calls = 0
+        self._active_since = 0.0
+
+    def reset_stats(self) -> DispatchStats:
+        """Start a new stats run; returns the previous one."""
+        previous, self.last_stats = self.last_stats, DispatchStats()
+        if self._active_calls:
+            self._active_since = time.monotonic()
+        return previous
+
+    def _shared_semaphore(self) -> asyncio.Semaphore:
+        """The one semaphore bounding batches in flight (per event loop)."""
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    def pack_batches(self, texts: list[str]) -> list[tuple[int, int]]:
+        """Group consecutive texts into [start, end) ranges under the token budget."""
+        batches: list[tuple[int, int]] = []
+        start, budget = 0, 0
+        for i, text in enumerate(texts):
+            tokens = estimate_tokens(text)
+            if i > start and (
+                budget + tokens > self.max_batch_tokens or i - start >= self.max_batch_items
+            ):
+                batches.append((start, i))
+                start, budget = i, 0
+            budget += tokens
+        if start < len(texts):
+            batches.append((start, len(texts)))
+        return batches
+
+    async def embed(self, texts: list[str]) -> list[list[float]]:
+        """Embed all texts, preserving order."""
+        if not texts:
+            return []
+
+        stats = self.last_stats
+        semaphore = self._shared_semaphore()
+        batches = self.pack_batches(texts)
+        stats.chunks += len(texts)
+        stats.batches += len(batches)
+        results: list[list[float]] = [[] for _ in texts]
+
+        async def run(start: int, end: int):
+            results[start:end] = await self._embed_with_retry(texts[start:end], semaphore, stats)
+
+        if not self._active_calls:
+            self._active_since = time.monotonic()
+        self._active_calls += 1
+        try:
+            await asyncio.gather(*(run(start, end) for start, end in batches))
+        finally:
+            self._active_calls -= 1
+            if not self._active_calls and stats is self.last_stats:
+                stats.elapsed_seconds += time.monotonic() - self._active_since
+        logger.debug(f"Embedded {len(texts)} chunks in {len(batches)} batches")
+        return results
+
+    async def _embed_with_retry(
+        self,
+        texts: list[str],
+        semaphore: asyncio.Semaphore,
+        stats: DispatchStats,
+    ) -> list[list[float]]:
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with semaphore:
+                    vectors = await self.engine.embed_batch(texts)
+                if len(vectors) != len(texts):
+                    raise ValueError(f"Expected {len(texts)} embeddings, got {len(vectors)}")
+                return vectors
+            except Exception as e:
+                if _is_payload_too_large(e) and len(texts) > 1:
+                    stats.splits += 1
+                    mid = len(texts) // 2
+                    logger.warning(f"Batch of {len(texts)} rejected as too large, splitting in half")
+                    left, right = await asyncio.gather(
+                        self._embed_with_retry(texts[:mid], semaphore, stats),
+                        self._embed_with_retry(texts[mid:], semaphore, stats),
+                    )
+                    return left + right
+                if attempt >= self.max_retries:
+                    raise
+                stats.retries += 1
+                delay = self.base_delay * (2 ** attempt) * (1 + random.random() * 0.25)
+                logger.warning(f"Embedding batch failed ({e}); retry {attempt + 1} in {delay:.1f}s")
+                await asyncio.sleep(delay)
+        raise RuntimeError("unreachable")
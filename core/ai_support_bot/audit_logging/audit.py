@@ -49,9 +49,13 @@ def log_interaction(
     tokens_used: int,
     latency_ms: int,
     error: str | None = None,
+    semantic_similarity: float | None = None,
 ) -> None:
     """Log a single interaction as a JSON line.
 
+    ``semantic_similarity`` is the best semantic-cache match for the question,
+    logged so the cache threshold can be tuned from audit data.
+
     NOTE: We intentionally do NOT log message content for user privacy.
     """
     record = {
@@ -64,6 +68,8 @@ def log_interaction(
         "tokens_used": tokens_used,
         "latency_ms": latency_ms,
     }
+    if semantic_similarity is not None:
+        record["semantic_similarity"] = round(semantic_similarity, 4)
     if error:
         record["error"] = error
 
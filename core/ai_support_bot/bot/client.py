@@ -11,6 +11,7 @@ import discord
 from discord.ext import commands
 
 from core.ai_support_bot.cache.memory_cache import MemoryCache
+from core.ai_support_bot.cache.semantic_cache import SemanticCache, SemanticLookup
 from core.ai_support_bot.audit_logging.audit import log_event, log_interaction
 from core.ai_support_bot.security.rate_limiter import RateLimiter
 from core.ai_support_bot.debug_logger import pipeline_logger
@@ -39,6 +40,7 @@ class SokeberSupportBot(commands.Bot):
         llm_engine: OpenRouterEngine,
         answer_cache: MemoryCache,
         context_retriever=None,
+        semantic_cache: SemanticCache | None = None,
         **kwargs,
     ):
         intents = discord.Intents.default()
@@ -54,6 +56,7 @@ class SokeberSupportBot(commands.Bot):
         self.llm = llm_engine
         self.answer_cache = answer_cache
         self.context_retriever = context_retriever
+        self.semantic_cache = semantic_cache
         self.rate_limiter = RateLimiter(
             max_calls=config.rate_limit_max_calls,
             window_seconds=config.rate_limit_window_seconds,
@@ -80,7 +83,7 @@ class SokeberSupportBot(commands.Bot):
         if getattr(message.author, "guild_permissions", None) and message.author.guild_permissions.administrator:
             is_admin = True
 
-        # Manual Sync/Refresh Command  (!sync, !sync notion, !sync sheets)
+        # Manual Sync/Refresh Command  (!sync, !sync notion, !sync sheets, !sync full)
         msg_lower = message.content.strip().lower()
         if msg_lower.startswith("!sync") or msg_lower.startswith("!refresh"):
             if is_admin:
@@ -94,24 +97,32 @@ class SokeberSupportBot(commands.Bot):
                 if sync_target in ("notion", "database", "db"):
                     await message.reply("⏳ กำลังดึงข้อมูลจาก Notion ใหม่...", mention_author=False)
                     try:
-                        await self.ingestion_task.ingest_notion_only()
-                        await message.reply("✅ อัพเดต Notion สมบูรณ์แล้ว!", mention_author=False)
+                        stats = await self.ingestion_task.ingest_notion_only()
+                        await message.reply(f"✅ อัพเดต Notion สมบูรณ์แล้ว! ({stats.summary()})", mention_author=False)
                     except Exception as e:
                         await message.reply(f"❌ Error: {e}", mention_author=False)
 
                 elif sync_target == "sheets":
                     await message.reply("⏳ กำลังดึงข้อมูลจาก Google Sheets ใหม่...", mention_author=False)
                     try:
-                        await self.ingestion_task.ingest_sheets_only()
-                        await message.reply("✅ อัพเดต Sheets สมบูรณ์แล้ว!", mention_author=False)
+                        stats = await self.ingestion_task.ingest_sheets_only()
+                        await message.reply(f"✅ อัพเดต Sheets สมบูรณ์แล้ว! ({stats.summary()})", mention_author=False)
+                    except Exception as e:
+                        await message.reply(f"❌ Error: {e}", mention_author=False)
+
+                elif sync_target in ("full", "rebuild"):
+                    await message.reply("⏳ กำลังสร้างดัชนีข้อมูลใหม่ทั้งหมด (Notion + Sheets)...", mention_author=False)
+                    try:
+                        stats = await self.ingestion_task.ingest_now(full=True)
+                        await message.reply(f"✅ สร้างดัชนีใหม่ทั้งหมดสมบูรณ์แล้ว! ({stats.summary()})", mention_author=False)
                     except Exception as e:
                         await message.reply(f"❌ Error: {e}", mention_author=False)
 
                 else:  # "all" or just "!sync"
                     await message.reply("⏳ กำลังดึงข้อมูลทั้งหมดใหม่ (Notion + Sheets)...", mention_author=False)
                     try:
-                        await self.ingestion_task.ingest_now()
-                        await message.reply("✅ อัพเดตข้อมูลทั้งหมดสมบูรณ์แล้ว!", mention_author=False)
+                        stats = await self.ingestion_task.ingest_now()
+                        await message.reply(f"✅ อัพเดตข้อมูลทั้งหมดสมบูรณ์แล้ว! ({stats.summary()})", mention_author=False)
                     except Exception as e:
                         await message.reply(f"❌ Error: {e}", mention_author=False)
             else:
@@ -140,7 +151,7 @@ class SokeberSupportBot(commands.Bot):
         # Process the message
         start_time = time.monotonic()
         async with message.channel.typing():
-            response_text, cache_hit, tokens_used = await self._generate_response(cleaned, history)
+            response_text, cache_hit, tokens_used, similarity = await self._generate_response(cleaned, history)
 
         latency_ms = int((time.monotonic() - start_time) * 1000)
 
@@ -162,19 +173,29 @@ class SokeberSupportBot(commands.Bot):
             cache_hit=cache_hit,
             tokens_used=tokens_used,
             latency_ms=latency_ms,
+            semantic_similarity=similarity,
         )
 
-    async def _generate_response(self, question: str, history: list[dict] | None = None) -> tuple[str, bool, int]:
-        """Generate a response, checking cache first.
+    async def _generate_response(
+        self, question: str, history: list[dict] | None = None
+    ) -> tuple[str, bool, int, float | None]:
+        """Generate a response, checking the exact then the semantic cache first.
 
         Returns:
-            (response_text, cache_hit, tokens_used)
+            (response_text, cache_hit, tokens_used, semantic_similarity)
         """
         # Check answer cache
         cached = self.answer_cache.get(question)
         if cached is not None:
             logger.debug("Cache HIT")
-            return cached, True, 0
+            return cached, True, 0, None
+
+        # Check semantic cache (a differently-worded question with the same meaning)
+        kb_version = self.context_retriever.kb_version if self.context_retriever else None
+        question_embedding, semantic = await self._semantic_lookup(question, kb_version)
+        if semantic.answer is not None:
+            logger.info(f"Semantic cache HIT (similarity {semantic.similarity:.3f})")
+            return semantic.answer, True, 0, semantic.similarity
 
         # Retrieve context chunks
         context_chunks = []
@@ -253,8 +274,26 @@ class SokeberSupportBot(commands.Bot):
 
         # Cache the answer
         self.answer_cache.set(question, result.text, ttl=self.config.cache_ttl_seconds)
+        if question_embedding is not None and self.semantic_cache is not None:
+            self.semantic_cache.put(question_embedding, result.text, kb_version, ttl=self.config.cache_ttl_seconds)
+
+        return result.text, False, result.tokens_used, semantic.similarity
 
-        return result.text, False, result.tokens_used
+    async def _semantic_lookup(self, question: str, kb_version) -> tuple[list[float] | None, SemanticLookup]:
+        """Embed the question and look it up in the semantic cache.
+
+        Returns the embedding (None when the semantic cache is unavailable)
+        so the generated answer can be stored under it.
+        """
+        engine = self.context_retriever.embedding_engine if self.context_retriever else None
+        if self.semantic_cache is None or self.semantic_cache.max_entries <= 0 or engine is None:
+            return None, SemanticLookup()
+        try:
+            embedding = (await engine.embed([question]))[0]
+        except Exception as e:
+            logger.error(f"Semantic cache lookup failed: {e}")
+            return None, SemanticLookup()
+        return embedding, self.semantic_cache.lookup(embedding, kb_version)
 
     async def _send_response(self, message: discord.Message, text: str) -> None:
         """Send response, splitting if it exceeds Discord's limit."""
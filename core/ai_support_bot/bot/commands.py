@@ -47,6 +47,8 @@ class AdminCommands(app_commands.Group):
     @app_commands.checks.has_permissions(administrator=True)
     async def clear_cache(self, interaction: discord.Interaction):
         count = self.bot.answer_cache.clear()
+        if self.bot.semantic_cache:
+            count += self.bot.semantic_cache.clear()
         await interaction.response.send_message(
             f"✅ Cache cleared ({count} entries removed).",
             ephemeral=True,
@@ -68,5 +70,25 @@ class AdminCommands(app_commands.Group):
         embed.add_field(name="Servers", value=str(guilds), inline=True)
         embed.add_field(name="Cache Size", value=str(cache_size), inline=True)
         embed.add_field(name="Environment", value=self.bot.config.environment, inline=True)
+        if self.bot.semantic_cache:
+            semantic_cache = self.bot.semantic_cache
+            embed.add_field(
+                name="Semantic Cache",
+                value=(
+                    f"{semantic_cache.size()} entries, threshold {semantic_cache.threshold:.2f}\n"
+                    f"{semantic_cache.stats.summary()}"
+                ),
+                inline=False,
+            )
+        if self.bot.context_retriever:
+            retrieval_cache = self.bot.context_retriever.retrieval_cache
+            embed.add_field(
+                name="Search",
+                value=(
+                    f"{self.bot.context_retriever.executor.stats.summary()}\n"
+                    f"cache {len(retrieval_cache)} entries, {retrieval_cache.hits} hits / {retrieval_cache.misses} misses"
+                ),
+                inline=False,
+            )
 
         await interaction.response.send_message(embed=embed, ephemeral=True)
@@ -0,0 +1,132 @@
+"""Persistent embedding cache backed by SQLite.
+
+Vectors are keyed by (embedding model, SHA-256 of the text), so identical
+chunks are never re-embedded across re-syncs or restarts, and vectors from one
+model are never served for another.
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+from array import array
+from pathlib import Path
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS embeddings (
+    model TEXT NOT NULL,
+    text_hash TEXT NOT NULL,
+    vector BLOB NOT NULL,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (model, text_hash)
+)
+"""
+_SQLITE_MAX_VARS = 500  # Stay well below SQLite's bound-parameter limit
+
+
+class EmbeddingCache:
+    """Size-bounded (model, text) → vector store with LRU eviction.
+
+    Thread-safe via threading.Lock; vectors are stored as packed float32.
+    """
+
+    def __init__(self, path: str | Path, max_entries: int = 50_000):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(_SCHEMA)
+        self._conn.commit()
+
+    @staticmethod
+    def _hash_key(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def get_many(self, model: str, texts: list[str]) -> list[list[float] | None]:
+        """Look up vectors for texts. Missing entries are returned as None."""
+        keys = [self._hash_key(t) for t in texts]
+        found: dict[str, list[float]] = {}
+        with self._lock:
+            for i in range(0, len(keys), _SQLITE_MAX_VARS):
+                batch = keys[i:i + _SQLITE_MAX_VARS]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings "
+                    f"WHERE model = ? AND text_hash IN ({placeholders})",
+                    [model, *batch],
+                ).fetchall()
+                for text_hash, blob in rows:
+                    found[text_hash] = array("f", blob).tolist()
+
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE model = ? AND text_hash = ?",
+                    [(now, model, k) for k in found],
+                )
+                self._conn.commit()
+
+            results = [found.get(k) for k in keys]
+            hit_count = sum(v is not None for v in results)
+            self.hits += hit_count
+            self.misses += len(results) - hit_count
+        return results
+
+    def put_many(self, model: str, texts: list[str], vectors: list[list[float]]) -> None:
+        """Store vectors for texts, evicting least-recently-used entries if full."""
+        now = time.time()
+        rows = [
+            (model, self._hash_key(t), array("f", v).tobytes(), now)
+            for t, v in zip(texts, vectors, strict=True)
+        ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, text_hash, vector, last_used) "
+                "VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            self._evict_locked()
+            self._conn.commit()
+
+    def _evict_locked(self) -> None:
+        """Trim the table to max_entries by dropping the oldest last_used rows."""
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        overflow = count - self.max_entries
+        if overflow <= 0:
+            return
+        self._conn.execute(
+            "DELETE FROM embeddings WHERE rowid IN "
+            "(SELECT rowid FROM embeddings ORDER BY last_used ASC LIMIT ?)",
+            (overflow,),
+        )
+
+    def size(self) -> int:
+        """Return the number of cached vectors (all models)."""
+        with self._lock:
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        return int(count)
+
+    def clear(self) -> int:
+        """Remove all entries. Returns count of removed items."""
+        with self._lock:
+            count = self._conn.execute("DELETE FROM embeddings").rowcount
+            self._conn.commit()
+        return count
+
+    def stats(self) -> dict[str, float]:
+        """Return hit/miss counters and current size."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "size": self.size(),
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
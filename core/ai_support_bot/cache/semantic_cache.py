@@ -0,0 +1,165 @@
+"""Semantic answer cache: answers reused across differently-worded questions.
+
+Questions are matched by cosine similarity of their embeddings against an
+in-memory matrix, so "ราคาเท่าไหร่ครับ" can be answered from "ราคาเท่าไร".
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+DEFAULT_MAX_ENTRIES = 1000
+DEFAULT_THRESHOLD = 0.92  # Cosine similarity needed to reuse an answer
+DEFAULT_NEAR_MISS_MARGIN = 0.05  # Misses this close below the threshold count as near misses
+_INITIAL_ROWS = 64
+
+
+@dataclass
+class SemanticLookup:
+    """Outcome of one lookup; ``similarity`` is the best match (None if the cache was empty)."""
+    answer: str | None = None
+    similarity: float | None = None
+
+    @property
+    def hit(self) -> bool:
+        return self.answer is not None
+
+
+@dataclass
+class SemanticCacheStats:
+    """Lookup counters for tuning the threshold."""
+    hits: int = 0
+    near_misses: int = 0  # Best match within the near-miss margin below the threshold
+    misses: int = 0  # Includes near misses
+
+    @property
+    def lookups(self) -> int:
+        return self.hits + self.misses
+
+    def summary(self) -> str:
+        rate = self.hits / self.lookups if self.lookups else 0.0
+        return f"{self.hits} hits / {self.misses} misses ({self.near_misses} near), hit rate {rate:.0%}"
+
+
+class SemanticCache:
+    """Answers keyed by question embedding, scoped to one knowledge-base version.
+
+    Each entry holds (normalized question embedding, answer, kb_version) and
+    a TTL. A lookup is one matrix-vector product over the stored embeddings;
+    the best match is reused when its cosine similarity reaches ``threshold``.
+    The first lookup under a new kb_version drops every older entry, and a
+    put computed against an older version is ignored. When full, the least
+    recently used entry is replaced.
+
+    Thread-safe via threading.Lock.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        threshold: float = DEFAULT_THRESHOLD,
+        near_miss_margin: float = DEFAULT_NEAR_MISS_MARGIN,
+        default_ttl: int = 3600,
+    ):
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.near_miss_margin = near_miss_margin
+        self.default_ttl = default_ttl
+        self.stats = SemanticCacheStats()
+        self._lock = threading.Lock()
+        self._version = None
+        self._reset(0)
+
+    def _reset(self, dim: int) -> None:
+        self._matrix = np.zeros((0, dim), dtype=np.float32)
+        self._answers: list[str] = []
+        self._expires = np.zeros(0, dtype=np.float64)
+        self._last_used = np.zeros(0, dtype=np.float64)
+        self._count = 0
+
+    def _check_version(self, kb_version) -> None:
+        if kb_version != self._version:
+            self._reset(self._matrix.shape[1])
+            self._version = kb_version
+
+    @staticmethod
+    def _normalize(embedding) -> np.ndarray | None:
+        vector = np.asarray(embedding, dtype=np.float32).ravel()
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm else None
+
+    def size(self) -> int:
+        """Return current number of (possibly expired) entries."""
+        return self._count
+
+    def lookup(self, embedding, kb_version) -> SemanticLookup:
+        """Best cached answer for a question embedding, if similar enough."""
+        query = self._normalize(embedding)
+        now = time.monotonic()
+        with self._lock:
+            self._check_version(kb_version)
+            if query is None or not self._count or query.shape[0] != self._matrix.shape[1]:
+                self.stats.misses += 1
+                return SemanticLookup()
+            similarities = self._matrix[:self._count] @ query
+            similarities[self._expires[:self._count] <= now] = -np.inf
+            best = int(np.argmax(similarities))
+            similarity = float(similarities[best])
+            if similarity == -np.inf:
+                self.stats.misses += 1
+                return SemanticLookup()
+            if similarity >= self.threshold:
+                self._last_used[best] = now
+                self.stats.hits += 1
+                return SemanticLookup(self._answers[best], similarity)
+            self.stats.misses += 1
+            if similarity >= self.threshold - self.near_miss_margin:
+                self.stats.near_misses += 1
+            return SemanticLookup(similarity=similarity)
+
+    def put(self, embedding, answer: str, kb_version, ttl: int | None = None) -> None:
+        """Store an answer for a question embedding with optional TTL override."""
+        if self.max_entries <= 0:
+            return
+        vector = self._normalize(embedding)
+        if vector is None:
+            return
+        now = time.monotonic()
+        ttl = ttl if ttl is not None else self.default_ttl
+        with self._lock:
+            if kb_version != self._version:
+                return  # Answered from a knowledge base that has since changed
+            if vector.shape[0] != self._matrix.shape[1]:
+                self._reset(vector.shape[0])  # Embedding model changed; old vectors are incomparable
+            if self._count < self.max_entries:
+                if self._count == len(self._matrix):
+                    self._grow()
+                row = self._count
+                self._answers.append(answer)
+                self._count += 1
+            else:
+                # Replace an expired entry if there is one, else the least recently used
+                row = int(np.argmin(np.where(self._expires <= now, -np.inf, self._last_used)))
+                self._answers[row] = answer
+            self._matrix[row] = vector
+            self._expires[row] = now + ttl
+            self._last_used[row] = now
+
+    def _grow(self) -> None:
+        rows = min(self.max_entries, max(_INITIAL_ROWS, 2 * len(self._matrix)))
+        matrix = np.zeros((rows, self._matrix.shape[1]), dtype=np.float32)
+        matrix[:self._count] = self._matrix[:self._count]
+        self._matrix = matrix
+        self._expires = np.resize(self._expires, rows)
+        self._last_used = np.resize(self._last_used, rows)
+
+    def clear(self) -> int:
+        """Clear all entries. Returns count of removed items."""
+        with self._lock:
+            count = self._count
+            self._reset(self._matrix.shape[1])
+            return count
@@ -23,18 +23,28 @@ class BotConfig:
     llm_model: str = "google/gemini-2.5-flash"
     llm_provider: str = "openrouter"  # openrouter, openai, anthropic, etc.
     embedding_model: str = "openai/text-embedding-3-small"
+    embedding_dimensions: int = 0  # Request shortened vectors from the API (0 = model default)
 
     # Notion
     notion_token: str = ""
     notion_page_ids: list[str] | None = None  # Comma-separated page IDs in env
     notion_database_ids: list[str] | None = None  # Comma-separated database IDs in env
+    notion_state_path: str = "./chroma_db/notion_sync_state.json"
+    notion_snapshot_path: str = "./chroma_db/notion_pages.sqlite3"
+    notion_full_sync_every: int = 24  # Periodic runs between full crawls (others use the change feed)
 
     # Google Sheets (base64-encoded service account JSON)
     google_sa_base64: str = ""
     sheets_spreadsheet_ids: list[str] | None = None  # Comma-separated in env
+    sheets_key_columns: list[str] | None = None  # Header names identifying a row; comma-separated in env
 
     # Cache
     cache_ttl_seconds: int = 3600
+    embedding_cache_path: str = "./chroma_db/embedding_cache.sqlite3"
+    embedding_cache_max_entries: int = 50000
+    semantic_cache_size: int = 1000  # Answers matched by question similarity (0 = off)
+    semantic_cache_threshold: float = 0.92  # Cosine similarity needed to reuse an answer
+    semantic_cache_near_miss_margin: float = 0.05  # Misses this far below the threshold count as near misses
 
     # Rate Limiting
     rate_limit_max_calls: int = 5
@@ -46,6 +56,22 @@ class BotConfig:
 
     # Ingestion
     ingestion_interval_seconds: int = 60
+    embedding_concurrency: int = 4
+    embedding_batch_tokens: int = 8000
+    ingestion_queue_size: int = 32  # Items buffered between pipeline stages
+    ingestion_write_chunk: int = 128  # Child chunks embedded + upserted per round
+    parent_cache_size: int = 256  # Parent documents kept in memory (LRU)
+    vector_backend: str = "chroma"  # "chroma" (HNSW) or "numpy" (exact, in-process)
+    vector_quantization: str = "none"  # numpy backend scan precision: "none", "float16" or "int8"
+    coarse_search_dims: int = 0  # numpy backend: first-pass scan over this many leading dims (0 = off)
+    tokenizer_processes: int = 0  # Corpus tokenization workers (0 = one per CPU)
+    query_token_cache_size: int = 1024  # Tokenized queries kept in memory (LRU)
+    search_workers: int = 4  # Threads running vector/BM25 search off the event loop
+    rrf_k: int = 60  # Reciprocal Rank Fusion rank offset
+    rrf_vector_weight: float = 1.0  # RRF weight of the vector (semantic) ranking
+    rrf_bm25_weight: float = 1.0  # RRF weight of the BM25 (keyword) ranking
+    query_routing: bool = True  # Restrict retrieval to Sheets/Notion based on query keywords
+    retrieval_cache_size: int = 512  # Retrieval results kept per index version (LRU, 0 = off)
 
 
 def _require(value: str | None, name: str) -> str:
@@ -84,17 +110,43 @@ def load_config(env_path: str | Path | None = None) -> BotConfig:
         llm_model=os.getenv("LLM_MODEL", "google/gemini-2.5-flash"),
         llm_provider=os.getenv("LLM_PROVIDER", "openrouter"),
         embedding_model=os.getenv("EMBEDDING_MODEL", "openai/text-embedding-3-small"),
+        embedding_dimensions=int(os.getenv("EMBEDDING_DIMENSIONS", "0")),
         notion_token=os.getenv("NOTION_TOKEN", ""),
         notion_page_ids=_parse_ids(os.getenv("NOTION_PAGE_IDS")),
         notion_database_ids=_parse_ids(os.getenv("NOTION_DATABASE_IDS")),
+        notion_state_path=os.getenv("NOTION_STATE_PATH", "./chroma_db/notion_sync_state.json"),
+        notion_snapshot_path=os.getenv("NOTION_SNAPSHOT_PATH", "./chroma_db/notion_pages.sqlite3"),
+        notion_full_sync_every=int(os.getenv("NOTION_FULL_SYNC_EVERY", "24")),
         google_sa_base64=os.getenv("GOOGLE_SA_BASE64", ""),
         sheets_spreadsheet_ids=_parse_ids(os.getenv("SHEETS_SPREADSHEET_IDS")),
+        sheets_key_columns=_parse_ids(os.getenv("SHEETS_KEY_COLUMNS")),
         cache_ttl_seconds=int(os.getenv("CACHE_TTL_SECONDS", "3600")),
+        embedding_cache_path=os.getenv("EMBEDDING_CACHE_PATH", "./chroma_db/embedding_cache.sqlite3"),
+        embedding_cache_max_entries=int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "50000")),
+        semantic_cache_size=int(os.getenv("SEMANTIC_CACHE_SIZE", "1000")),
+        semantic_cache_threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92")),
+        semantic_cache_near_miss_margin=float(os.getenv("SEMANTIC_CACHE_NEAR_MISS_MARGIN", "0.05")),
         rate_limit_max_calls=int(os.getenv("RATE_LIMIT_MAX_CALLS", "5")),
         rate_limit_window_seconds=int(os.getenv("RATE_LIMIT_WINDOW_SECONDS", "60")),
         log_level=os.getenv("LOG_LEVEL", "INFO"),
         environment=os.getenv("ENVIRONMENT", "development"),
         ingestion_interval_seconds=int(os.getenv("INGESTION_INTERVAL_SECONDS", "3600")),
+        embedding_concurrency=int(os.getenv("EMBEDDING_CONCURRENCY", "4")),
+        embedding_batch_tokens=int(os.getenv("EMBEDDING_BATCH_TOKENS", "8000")),
+        ingestion_queue_size=int(os.getenv("INGESTION_QUEUE_SIZE", "32")),
+        ingestion_write_chunk=int(os.getenv("INGESTION_WRITE_CHUNK", "128")),
+        parent_cache_size=int(os.getenv("PARENT_CACHE_SIZE", "256")),
+        vector_backend=os.getenv("VECTOR_BACKEND", "chroma"),
+        vector_quantization=os.getenv("VECTOR_QUANTIZATION", "none"),
+        coarse_search_dims=int(os.getenv("COARSE_SEARCH_DIMS", "0")),
+        tokenizer_processes=int(os.getenv("TOKENIZER_PROCESSES", "0")),
+        query_token_cache_size=int(os.getenv("QUERY_TOKEN_CACHE_SIZE", "1024")),
+        search_workers=int(os.getenv("SEARCH_WORKERS", "4")),
+        rrf_k=int(os.getenv("RRF_K", "60")),
+        rrf_vector_weight=float(os.getenv("RRF_VECTOR_WEIGHT", "1.0")),
+        rrf_bm25_weight=float(os.getenv("RRF_BM25_WEIGHT", "1.0")),
+        query_routing=os.getenv("QUERY_ROUTING", "true").lower() in ("1", "true", "yes"),
+        retrieval_cache_size=int(os.getenv("RETRIEVAL_CACHE_SIZE", "512")),
     )
 
 
@@ -0,0 +1,451 @@
+"""Sparse BM25 (Okapi) over postings lists, scoring only documents that match the query."""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import uuid
+from collections import Counter
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from core.ai_support_bot.rag.filters import Filters, SecondaryIndex
+
+logger = logging.getLogger("ai_support_bot.rag.bm25")
+
+DEFAULT_K1 = 1.5
+DEFAULT_B = 0.75
+DEFAULT_EPSILON = 0.25
+MAX_SEGMENTS = 8  # Segments before they are merged into one
+MAX_DELETED_FRACTION = 0.25  # Deleted documents before the segments are merged
+SEGMENT_ARRAYS = ("indptr", "doc_ids", "tfs", "doc_len", "doc_indptr", "doc_terms")
+
+
+class _Segment:
+    """An immutable block of documents with its own postings.
+
+    Term rows are global term IDs (``BM25Index._term_ids``); terms added after
+    the segment was built have no postings in it. ``doc_indptr``/``doc_terms``
+    are the forward index (document -> distinct term IDs), used to update
+    document frequencies when a document is removed.
+    """
+
+    def __init__(self, name: str, keys: list[str], metas: list[dict], arrays: dict[str, np.ndarray]):
+        self.name = name
+        self.keys = keys
+        self.metas = metas
+        self.positions = {key: local for local, key in enumerate(keys)}
+        # Postings (term -> documents) and the forward index; see SEGMENT_ARRAYS
+        self.indptr: np.ndarray = arrays["indptr"]
+        self.doc_ids: np.ndarray = arrays["doc_ids"]
+        self.tfs: np.ndarray = arrays["tfs"]
+        self.doc_len: np.ndarray = arrays["doc_len"]
+        self.doc_indptr: np.ndarray = arrays["doc_indptr"]
+        self.doc_terms: np.ndarray = arrays["doc_terms"]
+        self._secondary: SecondaryIndex | None = None
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    @property
+    def secondary(self) -> SecondaryIndex:
+        """Metadata value → documents, built on the first filtered search."""
+        if self._secondary is None:
+            self._secondary = SecondaryIndex(self.metas)
+        return self._secondary
+
+    @property
+    def n_terms(self) -> int:
+        return len(self.indptr) - 1
+
+    @classmethod
+    def build(
+        cls,
+        name: str,
+        keys: list[str],
+        tokenized: list[list[str]],
+        metas: list[dict],
+        term_ids: dict[str, int],
+        terms: list[str],
+    ) -> _Segment:
+        """Index tokenized documents, registering new terms in ``term_ids``/``terms``."""
+        doc_terms: list[int] = []
+        freqs: list[int] = []
+        distinct = np.zeros(len(keys), dtype=np.int64)
+        doc_len = np.zeros(len(keys), dtype=np.float64)
+        for local, tokens in enumerate(tokenized):
+            doc_len[local] = len(tokens)
+            counts = Counter(tokens)
+            distinct[local] = len(counts)
+            for term in counts:
+                if term not in term_ids:
+                    terms.append(term)
+                    term_ids[term] = len(terms) - 1
+                doc_terms.append(term_ids[term])
+            freqs.extend(counts.values())
+
+        doc_indptr = np.zeros(len(keys) + 1, dtype=np.int64)
+        np.cumsum(distinct, out=doc_indptr[1:])
+        return cls._from_forward(
+            name, keys, metas,
+            np.asarray(doc_terms, dtype=np.int32),
+            np.repeat(np.arange(len(keys), dtype=np.int32), distinct),
+            np.asarray(freqs, dtype=np.int32),
+            doc_len, doc_indptr, len(terms),
+        )
+
+    @classmethod
+    def _from_forward(cls, name, keys, metas, doc_terms, docs, freqs, doc_len, doc_indptr, n_terms) -> _Segment:
+        """Build from (term, doc, tf) triples listed in document order."""
+        # Group by term (stable, so each postings list stays sorted by doc)
+        order = np.argsort(doc_terms, kind="stable")
+        indptr = np.zeros(n_terms + 1, dtype=np.int64)
+        np.cumsum(np.bincount(doc_terms, minlength=n_terms), out=indptr[1:])
+        return cls(name, keys, metas, {
+            "indptr": indptr,
+            "doc_ids": docs[order],
+            "tfs": freqs[order],
+            "doc_len": doc_len,
+            "doc_indptr": doc_indptr,
+            "doc_terms": doc_terms,
+        })
+
+
+class BM25Index:
+    """BM25Okapi-compatible lexical index stored as segmented CSR postings.
+
+    - IDF, k1, b and the epsilon floor on negative IDFs follow
+      ``rank_bm25.BM25Okapi`` over the live documents, so scores match it to
+      float precision
+    - ``search`` touches only the postings of the query terms and selects the
+      top k with a partial partition instead of sorting the whole corpus
+    - Documents are addressed by key (the child chunk ID). ``add_documents`` and
+      ``remove_documents`` return a new index sharing every unchanged segment:
+      additions become a new segment, removals flip a per-segment deleted mask
+      and update the term statistics. Readers keep the instance they hold, so
+      swapping the reference is the only synchronization needed
+    - Search results are slots (positions across segments, deleted ones
+      included); ``meta(slot)`` and ``key(slot)`` resolve them
+    - ``search(..., filters=...)`` scores only documents whose metadata passes
+      the filter, using each segment's secondary index
+    """
+
+    def __init__(
+        self,
+        tokenized_corpus: list[list[str]],
+        keys: list[str] | None = None,
+        metas: list[dict] | None = None,
+        k1: float = DEFAULT_K1,
+        b: float = DEFAULT_B,
+        epsilon: float = DEFAULT_EPSILON,
+    ):
+        self.k1 = k1
+        self.b = b
+        self.epsilon = epsilon
+        # Append-only and shared by every derived index (readers only look terms up)
+        self._term_ids: dict[str, int] = {}
+        self._terms: list[str] = []
+        # Segment names are unique per build: a rebuilt index never reuses a name
+        # whose files (from an earlier build) may still sit in the snapshot directory
+        self.build = uuid.uuid4().hex[:8]
+        self.next_segment = 1
+        self._set_state((), (), np.zeros(0, dtype=np.int64), 0, 0.0)
+        if tokenized_corpus:
+            keys = keys if keys is not None else [str(i) for i in range(len(tokenized_corpus))]
+            metas = metas if metas is not None else [{} for _ in tokenized_corpus]
+            self._set_state(*self._state_with(self._new_segment(keys, tokenized_corpus, metas)))
+
+    def _set_state(self, segments, deleted, df: np.ndarray, n_docs: int, total_len: float):
+        self.segments: tuple[_Segment, ...] = tuple(segments)
+        self.deleted: tuple[np.ndarray, ...] = tuple(deleted)
+        self.df = df
+        self.n_docs = n_docs
+        self.total_len = total_len
+        self.avgdl = total_len / n_docs if n_docs else 0.0
+        self._offsets = np.cumsum([0] + [len(segment) for segment in self.segments])
+        live = df[df > 0]
+        idf = np.log(n_docs - live + 0.5) - np.log(live + 0.5)
+        self.idf_floor = self.epsilon * float(idf.mean()) if len(live) else 0.0
+
+    def _derive(self, segments, deleted, df, n_docs, total_len) -> BM25Index:
+        index = BM25Index.__new__(BM25Index)
+        index.k1, index.b, index.epsilon = self.k1, self.b, self.epsilon
+        index._term_ids, index._terms = self._term_ids, self._terms
+        index.build, index.next_segment = self.build, self.next_segment
+        index._set_state(segments, deleted, df, n_docs, total_len)
+        return index
+
+    def __len__(self) -> int:
+        return self.n_docs
+
+    @property
+    def deleted_count(self) -> int:
+        return int(self._offsets[-1]) - self.n_docs
+
+    # ─── Updates (copy-on-write) ──────────────────────────────────────
+
+    def _new_segment(self, keys, tokenized, metas) -> _Segment:
+        segment = _Segment.build(
+            self._segment_name(), list(keys), tokenized, list(metas), self._term_ids, self._terms
+        )
+        self.next_segment += 1
+        return segment
+
+    def _segment_name(self) -> str:
+        return f"seg-{self.build}-{self.next_segment:05d}"
+
+    def _state_with(self, segment: _Segment) -> tuple:
+        df = np.zeros(len(self._terms), dtype=np.int64)
+        df[:len(self.df)] = self.df
+        df += np.bincount(segment.doc_terms, minlength=len(self._terms))
+        return (
+            (*self.segments, segment),
+            (*self.deleted, np.zeros(len(segment), dtype=bool)),
+            df,
+            self.n_docs + len(segment),
+            self.total_len + float(segment.doc_len.sum()),
+        )
+
+    def add_documents(self, keys: list[str], tokenized: list[list[str]], metas: list[dict] | None = None) -> BM25Index:
+        """Return a new index with these documents added (existing keys are replaced)."""
+        index = self.remove_documents(keys)
+        if not keys:
+            return index
+        if index is self:
+            index = self._derive(self.segments, self.deleted, self.df, self.n_docs, self.total_len)
+        metas = metas if metas is not None else [{} for _ in keys]
+        segment = index._new_segment(keys, tokenized, metas)
+        index._set_state(*index._state_with(segment))
+        return index._maybe_compact()
+
+    def remove_documents(self, keys) -> BM25Index:
+        """Return a new index without these documents (unknown keys are ignored)."""
+        removed: dict[int, list[int]] = {}
+        for key in keys:
+            for seg_index, segment in enumerate(self.segments):
+                local = segment.positions.get(key)
+                if local is not None and not self.deleted[seg_index][local]:
+                    removed.setdefault(seg_index, []).append(local)
+        if not removed:
+            return self
+
+        deleted = list(self.deleted)
+        df = self.df.copy()
+        n_docs, total_len = self.n_docs, self.total_len
+        for seg_index, removed_locals in removed.items():
+            segment = self.segments[seg_index]
+            mask = deleted[seg_index] = deleted[seg_index].copy()
+            for local in removed_locals:
+                mask[local] = True
+                df[segment.doc_terms[segment.doc_indptr[local]:segment.doc_indptr[local + 1]]] -= 1
+                total_len -= float(segment.doc_len[local])
+            n_docs -= len(removed_locals)
+        return self._derive(self.segments, deleted, df, n_docs, total_len)._maybe_compact()
+
+    def _maybe_compact(self) -> BM25Index:
+        slots = int(self._offsets[-1])
+        if len(self.segments) > MAX_SEGMENTS or (slots and self.deleted_count / slots > MAX_DELETED_FRACTION):
+            return self._compacted()
+        return self
+
+    def _compacted(self) -> BM25Index:
+        """Merge every live document into a single segment (no re-tokenization)."""
+        keys: list[str] = []
+        metas: list[dict] = []
+        terms, docs, freqs, lengths, distinct = [], [], [], [], []
+        for segment, mask in zip(self.segments, self.deleted, strict=True):
+            live = ~mask
+            per_doc = np.diff(segment.doc_indptr)
+            # Postings back in (doc, term) order, which lines up with the forward index
+            term_of_posting = np.repeat(np.arange(segment.n_terms, dtype=np.int32), np.diff(segment.indptr))
+            order = np.lexsort((term_of_posting, segment.doc_ids))
+            posting_live = np.repeat(live, per_doc)
+            new_local = np.cumsum(live) - 1 + len(keys)
+            terms.append(term_of_posting[order][posting_live])
+            freqs.append(np.asarray(segment.tfs)[order][posting_live])
+            docs.append(new_local[np.asarray(segment.doc_ids)[order][posting_live]].astype(np.int32))
+            lengths.append(np.asarray(segment.doc_len)[live])
+            distinct.append(per_doc[live])
+            keys.extend(key for key, keep in zip(segment.keys, live, strict=True) if keep)
+            metas.extend(meta for meta, keep in zip(segment.metas, live, strict=True) if keep)
+
+        doc_indptr = np.zeros(len(keys) + 1, dtype=np.int64)
+        np.cumsum(np.concatenate(distinct), out=doc_indptr[1:])
+        segment = _Segment._from_forward(
+            self._segment_name(), keys, metas,
+            np.concatenate(terms), np.concatenate(docs), np.concatenate(freqs), np.concatenate(lengths),
+            doc_indptr, len(self._terms),
+        )
+        index = self._derive((segment,), (np.zeros(len(segment), dtype=bool),), self.df, self.n_docs, self.total_len)
+        index.next_segment = self.next_segment + 1
+        logger.debug(f"Merged {len(self.segments)} BM25 segments ({self.deleted_count} deleted documents)")
+        return index
+
+    # ─── Queries ──────────────────────────────────────────────────────
+
+    def _locate(self, slot: int) -> tuple[_Segment, int]:
+        seg_index = int(np.searchsorted(self._offsets, slot, side="right") - 1)
+        return self.segments[seg_index], slot - int(self._offsets[seg_index])
+
+    def meta(self, slot: int) -> dict:
+        segment, local = self._locate(slot)
+        return segment.metas[local]
+
+    def key(self, slot: int) -> str:
+        segment, local = self._locate(slot)
+        return segment.keys[local]
+
+    def _matches(self, query_tokens: Sequence[str], filters: Filters | None = None) -> tuple[np.ndarray, np.ndarray]:
+        """Return (slots, scores) for every live document containing a query term (and passing ``filters``)."""
+        excluded = self.deleted
+        if filters:
+            excluded = tuple(mask | ~segment.secondary.mask(filters) for segment, mask in zip(self.segments, excluded, strict=True))
+        slot_parts, score_parts = [], []
+        for term, count in Counter(query_tokens).items():
+            term_id = self._term_ids.get(term)
+            if term_id is None or term_id >= len(self.df) or not self.df[term_id]:
+                continue
+            df = self.df[term_id]
+            idf = float(np.log(self.n_docs - df + 0.5) - np.log(df + 0.5))
+            if idf < 0:
+                idf = self.idf_floor
+            for seg_index, segment in enumerate(self.segments):
+                if term_id >= segment.n_terms:
+                    continue
+                start, end = segment.indptr[term_id], segment.indptr[term_id + 1]
+                ids = segment.doc_ids[start:end]
+                live = ~excluded[seg_index][ids]
+                ids = ids[live]
+                tf = segment.tfs[start:end][live].astype(np.float64)
+                norm = self.k1 * (1 - self.b + self.b * segment.doc_len[ids] / self.avgdl)
+                slot_parts.append(ids.astype(np.int64) + self._offsets[seg_index])
+                score_parts.append(count * idf * tf * (self.k1 + 1) / (tf + norm))
+        if not slot_parts:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float64)
+        if len(slot_parts) == 1:
+            return slot_parts[0], score_parts[0]
+        slots, inverse = np.unique(np.concatenate(slot_parts), return_inverse=True)
+        return slots, np.bincount(inverse, weights=np.concatenate(score_parts))
+
+    def get_scores(self, query_tokens: Sequence[str]) -> np.ndarray:
+        """Dense score per slot (deleted slots score 0), like BM25Okapi.get_scores."""
+        scores = np.zeros(int(self._offsets[-1]), dtype=np.float64)
+        slots, slot_scores = self._matches(query_tokens)
+        scores[slots] = slot_scores
+        return scores
+
+    def search(self, query_tokens: Sequence[str], top_k: int, filters: Filters | None = None) -> list[tuple[int, float]]:
+        """Return up to top_k (slot, score) with a positive score, best first.
+
+        Ties are broken by slot order, like a stable sort of get_scores().
+        IDF and length normalization stay corpus-wide when ``filters`` is set.
+        """
+        slots, scores = self._matches(query_tokens, filters)
+        positive = scores > 0
+        slots, scores = slots[positive], scores[positive]
+        if top_k <= 0 or not len(slots):
+            return []
+        if top_k < len(slots):
+            # Keep every doc tied with the k-th score so the tie-break below is exact
+            kth = np.partition(scores, len(scores) - top_k)[len(scores) - top_k]
+            keep = scores >= kth
+            slots, scores = slots[keep], scores[keep]
+        order = np.lexsort((slots, -scores))[:top_k]
+        return [(int(slots[i]), float(scores[i])) for i in order]
+
+
+def save_snapshot(index: BM25Index, path: str | Path, index_version: str) -> None:
+    """Persist ``index`` to the directory ``path``, tagged with ``index_version``.
+
+    Segments are immutable and their names unique per build, so only segments
+    missing from the directory are written: a save after an incremental update
+    costs the size of the change, and a rebuilt index writes all of its own.
+    ``manifest.json`` is replaced last and files it no longer references are
+    deleted afterwards, so a crash leaves the previous snapshot readable.
+    """
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+    for segment in index.segments:
+        if (path / f"{segment.name}.json").exists():
+            continue
+        for name in SEGMENT_ARRAYS:
+            np.save(path / f"{segment.name}.{name}.npy", getattr(segment, name))
+        (path / f"{segment.name}.json").write_text(
+            json.dumps({"keys": segment.keys, "metas": segment.metas}, ensure_ascii=False), encoding="utf-8"
+        )
+
+    generation = index_version.replace(os.sep, "_")
+    np.save(path / f"df.{generation}.npy", index.df)
+    (path / f"terms.{generation}.json").write_text(
+        json.dumps(index._terms[:len(index.df)], ensure_ascii=False), encoding="utf-8"
+    )
+    manifest: dict[str, Any] = {
+        "index_version": index_version,
+        "generation": generation,
+        "k1": index.k1,
+        "b": index.b,
+        "epsilon": index.epsilon,
+        "n_docs": index.n_docs,
+        "total_len": index.total_len,
+        "build": index.build,
+        "next_segment": index.next_segment,
+        "segments": [segment.name for segment in index.segments],
+        "deleted": [np.flatnonzero(mask).tolist() for mask in index.deleted],
+    }
+    tmp_path = path / "manifest.json.tmp"
+    tmp_path.write_text(json.dumps(manifest), encoding="utf-8")
+    os.replace(tmp_path, path / "manifest.json")
+
+    keep = tuple(f"{name}." for name in manifest["segments"]) + (f"df.{generation}.", f"terms.{generation}.")
+    for file in path.iterdir():
+        if file.name != "manifest.json" and not file.name.startswith(keep):
+            file.unlink(missing_ok=True)
+
+
+def load_snapshot(
+    path: str | Path,
+    index_version: str,
+    expected_docs: int | None = None,
+) -> BM25Index | None:
+    """Load a snapshot written for ``index_version``; None if missing or stale.
+
+    Arrays are memory-mapped, so loading costs little more than reading the
+    vocabulary and metadata.
+    """
+    path = Path(path)
+    manifest_path = path / "manifest.json"
+    if not manifest_path.exists():
+        return None
+    try:
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+        if manifest.get("index_version") != index_version or "segments" not in manifest:
+            return None
+        if expected_docs is not None and manifest.get("n_docs") != expected_docs:
+            return None
+        segments, deleted = [], []
+        for name, deleted_locals in zip(manifest["segments"], manifest["deleted"], strict=True):
+            rows = json.loads((path / f"{name}.json").read_text(encoding="utf-8"))
+            arrays = {array: np.load(path / f"{name}.{array}.npy", mmap_mode="r") for array in SEGMENT_ARRAYS}
+            segment = _Segment(name, rows["keys"], rows["metas"], arrays)
+            mask = np.zeros(len(segment), dtype=bool)
+            mask[deleted_locals] = True
+            segments.append(segment)
+            deleted.append(mask)
+
+        generation = manifest["generation"]
+        index = BM25Index([], k1=manifest["k1"], b=manifest["b"], epsilon=manifest["epsilon"])
+        index._terms.extend(json.loads((path / f"terms.{generation}.json").read_text(encoding="utf-8")))
+        index._term_ids.update((term, term_id) for term_id, term in enumerate(index._terms))
+        index.build = manifest.get("build", index.build)
+        index.next_segment = manifest["next_segment"]
+        index._set_state(
+            segments, deleted, np.load(path / f"df.{generation}.npy"), manifest["n_docs"], manifest["total_len"]
+        )
+        return index
+    except Exception as e:
+        logger.error(f"Failed to load BM25 snapshot from {path}: {e}")
+        return None
@@ -0,0 +1,118 @@
+"""Metadata filters for retrieval: secondary indexes and a keyword query router.
+
+A filter maps an indexed metadata field to the values it may take, e.g.
+``{"source": "sheets"}`` or ``{"source": ["notion"], "title": ["FAQ"]}``.
+Values of one field are OR-ed, fields are AND-ed.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+
+from core.ai_support_bot.rag.tokenizer import normalize_query
+
+FILTER_FIELDS = ("source", "title")  # Metadata fields with a secondary index
+
+Filters = dict[str, frozenset[str]]
+
+
+def normalize_filters(filters: dict | None) -> Filters | None:
+    """Canonical form of a filter: field → frozenset of values; None for no filter.
+
+    Raises ValueError on a field that has no secondary index.
+    """
+    if not filters:
+        return None
+    normalized = {}
+    for field_name, values in filters.items():
+        if field_name not in FILTER_FIELDS:
+            raise ValueError(f"Cannot filter on '{field_name}' (indexed fields: {', '.join(FILTER_FIELDS)})")
+        normalized[field_name] = frozenset([values] if isinstance(values, str) else values)
+    return normalized
+
+
+def describe_filters(filters: Filters | None) -> str:
+    """Short stable label for logs and per-filter metrics, e.g. ``source=sheets``."""
+    if not filters:
+        return "all"
+    return ",".join(f"{name}={'|'.join(sorted(values))}" for name, values in sorted(filters.items()))
+
+
+def matches(meta: dict, filters: Filters | None) -> bool:
+    """Whether one chunk's metadata passes the filter."""
+    return not filters or all(meta.get(name) in values for name, values in filters.items())
+
+
+def to_chroma_where(filters: Filters | None) -> dict | None:
+    """Translate a filter into a ChromaDB ``where`` clause."""
+    if not filters:
+        return None
+    clauses = [{name: {"$in": sorted(values)}} for name, values in sorted(filters.items())]
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+
+class SecondaryIndex:
+    """Positions of the rows of one immutable block, per indexed metadata value.
+
+    ``rows(filters)`` returns the sorted row positions that pass the filter
+    without looking at any row outside them.
+    """
+
+    def __init__(self, metas: list[dict]):
+        self.size = len(metas)
+        postings: dict[str, dict[str, list[int]]] = {name: {} for name in FILTER_FIELDS}
+        for row, meta in enumerate(metas):
+            for name in FILTER_FIELDS:
+                value = meta.get(name)
+                if value is not None:
+                    postings[name].setdefault(value, []).append(row)
+        self.postings = {
+            name: {value: np.asarray(rows, dtype=np.int64) for value, rows in by_value.items()}
+            for name, by_value in postings.items()
+        }
+
+    def rows(self, filters: Filters) -> np.ndarray:
+        selected = None
+        for name, values in filters.items():
+            by_value = self.postings[name]
+            parts = [by_value[value] for value in values if value in by_value]
+            field_rows = np.unique(np.concatenate(parts)) if parts else np.zeros(0, dtype=np.int64)
+            selected = field_rows if selected is None else np.intersect1d(selected, field_rows, assume_unique=True)
+        return selected if selected is not None else np.arange(self.size)
+
+    def mask(self, filters: Filters) -> np.ndarray:
+        mask = np.zeros(self.size, dtype=bool)
+        mask[self.rows(filters)] = True
+        return mask
+
+
+# Substrings (matched on the lower-cased query) that point at one source.
+# Sheets hold the order intake and pricing rows; Notion holds policies and guides.
+ROUTES: dict[str, tuple[str, ...]] = {
+    "sheets": (
+        "ออเดอร์", "สั่งซื้อ", "คำสั่งซื้อ", "ราคา", "เลขพัสดุ", "ค่าส่ง",
+        "order", "price", "pricing", "tracking",
+    ),
+    "notion": (
+        "นโยบาย", "เงื่อนไข", "คืนเงิน", "คืนสินค้า", "ประกัน", "ข้อตกลง", "วิธี",
+        "policy", "refund", "warranty", "terms", "how to",
+    ),
+}
+
+
+class QueryRouter:
+    """Picks a ``source`` filter from keywords in the query.
+
+    Routes only when exactly one source's keywords appear; ambiguous or
+    unmatched queries search everything.
+    """
+
+    def __init__(self, routes: dict[str, tuple[str, ...]] | None = None):
+        self.routes = routes or ROUTES
+
+    def route(self, query: str) -> Filters | None:
+        text = normalize_query(query).lower()
+        sources = [source for source, keywords in self.routes.items() if any(k in text for k in keywords)]
+        if len(sources) != 1:
+            return None
+        return {"source": frozenset(sources)}
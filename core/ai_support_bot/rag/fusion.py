@@ -0,0 +1,63 @@
+"""Weighted Reciprocal Rank Fusion of child-chunk rankings, aggregated to parents."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+
+DEFAULT_RRF_K = 60  # Rank offset from the original RRF paper; damps the weight of the very top ranks
+
+
+@dataclass
+class FusedHit:
+    """One fused result: a child chunk (or the best child of a parent) and who found it."""
+    child_id: str
+    parent_id: str
+    score: float = 0.0
+    ranks: dict[str, int] = field(default_factory=dict)  # retriever name → 1-based rank
+    document: str = ""  # Parent document text, filled in once resolved
+
+    @property
+    def sources(self) -> list[str]:
+        return sorted(self.ranks)
+
+
+def reciprocal_rank_fusion(
+    rankings: dict[str, list[tuple[str, str]]],
+    weights: dict[str, float] | None = None,
+    k: int = DEFAULT_RRF_K,
+) -> list[FusedHit]:
+    """Fuse per-retriever rankings of ``(child_id, parent_id)`` pairs.
+
+    Each child scores ``sum(weight / (k + rank))`` over the retrievers that
+    returned it. Results are sorted by score, ties keeping first-seen order.
+    """
+    weights = weights or {}
+    fused: dict[str, FusedHit] = {}
+    for name, ranking in rankings.items():
+        weight = weights.get(name, 1.0)
+        for rank, (child_id, parent_id) in enumerate(ranking, start=1):
+            hit = fused.get(child_id)
+            if hit is None:
+                hit = fused[child_id] = FusedHit(child_id, parent_id)
+            if name in hit.ranks:
+                continue  # A retriever's duplicate keeps its best rank
+            hit.ranks[name] = rank
+            hit.score += weight / (k + rank)
+    return sorted(fused.values(), key=lambda hit: hit.score, reverse=True)
+
+
+def aggregate_by_parent(hits: list[FusedHit]) -> list[FusedHit]:
+    """Collapse fused children to one hit per parent.
+
+    A parent scores as its best child; its ranks are the best rank each
+    retriever gave any of its children.
+    """
+    parents: dict[str, FusedHit] = {}
+    for hit in sorted(hits, key=lambda hit: hit.score, reverse=True):
+        parent = parents.get(hit.parent_id)
+        if parent is None:
+            parents[hit.parent_id] = FusedHit(hit.child_id, hit.parent_id, hit.score, dict(hit.ranks))
+            continue
+        for name, rank in hit.ranks.items():
+            parent.ranks[name] = min(rank, parent.ranks.get(name, rank))
+    return list(parents.values())
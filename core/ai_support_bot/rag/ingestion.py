@@ -3,20 +3,31 @@
 from __future__ import annotations
 
 import asyncio
+import contextlib
+import hashlib
 import logging
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
 from typing import TYPE_CHECKING
 
+import numpy as np
+
+from core.ai_support_bot.ai.embedding_dispatcher import (
+    DEFAULT_BATCH_TOKENS,
+    DEFAULT_CONCURRENCY,
+    EmbeddingDispatcher,
+)
+from core.ai_support_bot.rag.notion_fetcher import _normalize_id
+from core.ai_support_bot.rag.tokenizer import HAS_PYTHAINLP as HAS_BM25
+from core.ai_support_bot.rag.vector_store import make_child_id
+
 if TYPE_CHECKING:
-    from core.ai_support_bot.rag.notion_fetcher import NotionFetcher
-    from core.ai_support_bot.rag.sheets_fetcher import SheetsFetcher
     from core.ai_support_bot.ai.embedding import EmbeddingEngine
-    from core.ai_support_bot.rag.vector_store import VectorStore
+    from core.ai_support_bot.rag.notion_fetcher import NotionFetcher
+    from core.ai_support_bot.rag.sheets_fetcher import SheetRow, SheetsFetcher
+    from core.ai_support_bot.rag.vector_store import IndexVersion, VectorStore
 
-try:
-    from rank_bm25 import BM25Okapi  # noqa: F401
-    HAS_BM25 = True
-except ImportError:
-    HAS_BM25 = False
 
 logger = logging.getLogger("ai_support_bot.rag.ingestion")
 
@@ -29,20 +40,137 @@ SHEETS_WHITELIST = [
 
 MIN_CONTENT_LENGTH = 10  # Skip documents shorter than this
 
+PIPELINE_QUEUE_SIZE = 32  # Items buffered between two pipeline stages
+PIPELINE_WRITE_CHUNK = 128  # Child chunks embedded and upserted per round
+
+_DONE = object()  # End-of-stream marker passed through pipeline queues
+
+# A document source pushes (text, metadata) pairs into the pipeline via ``emit``
+Emit = Callable[[str, dict], Awaitable[None]]
+DocSource = Callable[[Emit], Awaitable[None]]
+
+
+def _content_hash(text: str) -> str:
+    """Stable short hash of a document or chunk body."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:32]
+
+
+def _parent_id(meta: dict, full_text: str) -> str:
+    """Derive a stable parent ID from the source identity of a document.
+
+    Falls back to a content hash for sources that carry no ID. Only Notion
+    IDs are normalized (they appear with and without hyphens); other sources'
+    keys are used verbatim, so Sheets keys like ``A-1`` and ``A1`` stay apart.
+    """
+    source = meta.get("source", "doc")
+    source_id = str(meta.get("id") or _content_hash(full_text))
+    if source == "notion":
+        source_id = _normalize_id(source_id)
+    return f"{source}:{source_id}"
+
+
+def _parent_source(parent_id: str) -> str:
+    """Source name a parent ID was derived from (see _parent_id)."""
+    return parent_id.split(":", 1)[0] if ":" in parent_id else ""
+
+
+@dataclass
+class StageStats:
+    """Wall/idle time of one pipeline stage, summed over its workers.
+
+    Time spent waiting on an empty input queue or a full output queue counts
+    as idle; everything else is busy.
+    """
+    name: str
+    items: int = 0
+    wall_seconds: float = 0.0
+    idle_seconds: float = 0.0
+
+    @property
+    def busy_seconds(self) -> float:
+        return max(0.0, self.wall_seconds - self.idle_seconds)
+
+    async def get(self, queue: asyncio.Queue):
+        started = time.monotonic()
+        item = await queue.get()
+        self.idle_seconds += time.monotonic() - started
+        return item
+
+    async def put(self, queue: asyncio.Queue, item) -> None:
+        started = time.monotonic()
+        await queue.put(item)
+        self.idle_seconds += time.monotonic() - started
+
+    def summary(self) -> str:
+        return f"{self.name} busy={self.busy_seconds:.2f}s idle={self.idle_seconds:.2f}s items={self.items}"
+
+
+@dataclass
+class _ParentUpdate:
+    """A new or changed parent document and the child chunks it needs embedded."""
+    parent_id: str
+    full_text: str
+    child_ids: list[str]
+    child_texts: list[str]
+    child_metas: list[dict]
+    stale_child_ids: list[str]
+
+
+@dataclass
+class _ChunkChanges:
+    """Child chunks written and deleted by one write round of a partial sync (applied to BM25)."""
+    base_version: str
+    added_ids: list[str] = field(default_factory=list)
+    added_texts: list[str] = field(default_factory=list)
+    added_metas: list[dict] = field(default_factory=list)
+    removed_ids: list[str] = field(default_factory=list)
+
+
+@dataclass
+class IngestionStats:
+    """Counts reported by one ingestion run (per parent document)."""
+    added: int = 0
+    updated: int = 0
+    removed: int = 0
+    unchanged: int = 0
+    chunks_embedded: int = 0
+    chunks_deleted: int = 0
+    failed: bool = False
+    stages: list[StageStats] = field(default_factory=list)
+
+    def summary(self) -> str:
+        return (
+            f"added={self.added} updated={self.updated} removed={self.removed} "
+            f"unchanged={self.unchanged} | chunks embedded={self.chunks_embedded} "
+            f"deleted={self.chunks_deleted}"
+        )
+
+    def stage_summary(self) -> str:
+        """Per-stage busy/idle report; the busiest stage is the bottleneck."""
+        if not self.stages:
+            return ""
+        bottleneck = max(self.stages, key=lambda st: st.busy_seconds)
+        return " | ".join(st.summary() for st in self.stages) + f" | bottleneck={bottleneck.name}"
+
 
 class DataIngestionTask:
     """Background task that periodically fetches data from sources."""
 
     def __init__(
         self,
-        embedding_engine: 'EmbeddingEngine' | None = None,
-        vector_store: 'VectorStore' | None = None,
-        notion_fetcher: 'NotionFetcher' | None = None,
-        sheets_fetcher: 'SheetsFetcher' | None = None,
+        embedding_engine: EmbeddingEngine | None = None,
+        vector_store: VectorStore | None = None,
+        notion_fetcher: NotionFetcher | None = None,
+        sheets_fetcher: SheetsFetcher | None = None,
         interval_seconds: int = 3600,
         notion_page_ids: list[str] | None = None,
         notion_database_ids: list[str] | None = None,
         sheets_spreadsheet_ids: list[str] | None = None,
+        embedding_concurrency: int = DEFAULT_CONCURRENCY,
+        embedding_batch_tokens: int = DEFAULT_BATCH_TOKENS,
+        notion_full_sync_every: int = 24,
+        pipeline_queue_size: int = PIPELINE_QUEUE_SIZE,
+        pipeline_write_chunk: int = PIPELINE_WRITE_CHUNK,
     ):
         """Initialize ingestion task.
         
@@ -53,8 +181,22 @@ class DataIngestionTask:
             notion_page_ids: List of specific Notion page IDs to fetch
             notion_database_ids: List of Notion database IDs to fetch
             sheets_spreadsheet_ids: List of Google Sheets IDs to fetch
+            embedding_concurrency: Max embedding batches in flight at once
+            embedding_batch_tokens: Estimated token budget per embedding batch
+            notion_full_sync_every: Periodic runs between full Notion crawls;
+                the runs in between only re-crawl pages edited since the last sync
+            pipeline_queue_size: Items buffered between ingestion pipeline stages
+            pipeline_write_chunk: Child chunks embedded and upserted per round
         """
         self.embedding_engine = embedding_engine
+        self.embedding_dispatcher = (
+            EmbeddingDispatcher(
+                embedding_engine,
+                max_batch_tokens=embedding_batch_tokens,
+                max_concurrency=embedding_concurrency,
+            )
+            if embedding_engine else None
+        )
         self.vector_store = vector_store
         self.notion_fetcher = notion_fetcher
         self.sheets_fetcher = sheets_fetcher
@@ -63,6 +205,14 @@ class DataIngestionTask:
         self.notion_page_ids = notion_page_ids or []
         self.notion_database_ids = notion_database_ids or []
         self.sheets_spreadsheet_ids = sheets_spreadsheet_ids or []
+        self.notion_full_sync_every = max(1, notion_full_sync_every)
+        self.pipeline_queue_size = max(1, pipeline_queue_size)
+        self.pipeline_write_chunk = max(1, pipeline_write_chunk)
+        self._periodic_runs = 0
+        self._pending_sheet_rows: dict[tuple[str, str], list[SheetRow]] = {}
+        # Held by every sync entry point: the periodic loop and !sync runs share
+        # _pending_sheet_rows, the embedding dispatcher and the BM25 base version
+        self._ingest_lock = asyncio.Lock()
         self._task = None
         self._running = False
 
@@ -95,14 +245,18 @@ class DataIngestionTask:
         # Give Discord time to establish connection
         await asyncio.sleep(5.0)
         
-        # Run initial ingestion on start
-        await self._ingest_all()
+        # Run initial ingestion on start (incremental on top of the page snapshot
+        # if one was loaded; the fetcher falls back to a full crawl otherwise)
+        await self._ingest_all(full_crawl=False)
         
-        # Then run periodically (but at a slower pace)
+        # Then run periodically (but at a slower pace); Notion is synced from its
+        # change feed except for every Nth run, which re-crawls everything
         while self._running:
             try:
                 await asyncio.sleep(self.interval_seconds)
-                await self._ingest_all()
+                self._periodic_runs += 1
+                full_crawl = self._periodic_runs % self.notion_full_sync_every == 0
+                await self._ingest_all(full_crawl=full_crawl)
             except asyncio.CancelledError:
                 break
             except Exception as e:
@@ -110,126 +264,445 @@ class DataIngestionTask:
 
     # ─── Core fetch helpers ───────────────────────────────────────────
 
-    async def _fetch_notion_docs(self) -> tuple[list[str], list[dict]]:
-        """Fetch all Notion pages and return (texts, metadatas)."""
-        texts, metas = [], []
-        if not self.notion_fetcher:
-            return texts, metas
+    def _notion_source(self, full_crawl: bool = True) -> DocSource:
+        """Document source for Notion pages.
 
-        self.notion_fetcher._cached_pages = []
-        try:
-            await asyncio.to_thread(self.notion_fetcher.fetch_all)
-            for page in self.notion_fetcher._cached_pages:
-                doc = f"[{page.title}]\n{page.content}"
+        Pages are emitted as soon as the crawler renders them. With
+        ``full_crawl=False`` (and an async client) only pages edited since the
+        last sync are re-fetched; the rest are emitted from the fetcher's cache.
+        """
+
+        async def produce(emit: Emit) -> None:
+            if not self.notion_fetcher:
+                return
+            emitted: set[str] = set()
+            skipped = 0
+
+            async def emit_page(page) -> None:
+                nonlocal skipped
+                emitted.add(page.id)
                 if len(page.content.strip()) < MIN_CONTENT_LENGTH:
-                    continue  # Skip empty / near-empty pages
-                texts.append(doc)
-                metas.append({"source": "notion", "title": page.title, "id": page.id})
-            logger.info(f"Fetched {len(texts)} useful Notion pages (skipped {len(self.notion_fetcher._cached_pages) - len(texts)} empty)")
-        except Exception as e:
-            logger.error(f"Failed to fetch Notion pages: {e}")
-        return texts, metas
+                    skipped += 1  # Skip empty / near-empty pages
+                    return
+                await emit(
+                    f"[{page.title}]\n{page.content}",
+                    {"source": "notion", "title": page.title, "id": page.id},
+                )
 
-    async def _fetch_sheets_docs(self) -> tuple[list[str], list[dict]]:
-        """Fetch whitelisted Google Sheets and return (texts, metadatas)."""
-        texts, metas = [], []
+            if self.notion_fetcher.supports_async:
+                await self.notion_fetcher.sync_async(full=full_crawl, on_page=emit_page)
+            else:
+                self.notion_fetcher._cached_pages = {}
+                await asyncio.to_thread(self.notion_fetcher.fetch_all)
+                await asyncio.to_thread(self.notion_fetcher.commit_full_crawl)
+            # Pages this sync didn't re-fetch still belong in the index
+            for page in list(self.notion_fetcher._cached_pages.values()):
+                if page.id not in emitted:
+                    await emit_page(page)
+            logger.info(f"Fetched {len(emitted) - skipped} useful Notion pages (skipped {skipped} empty)")
+
+        return produce
+
+    async def _fetch_sheets_rows(self) -> dict[tuple[str, str], list[SheetRow]]:
+        """Fetch whitelisted Google Sheets tabs as {(spreadsheet ID, sheet name): rows}.
+
+        Raises:
+            RuntimeError: If any spreadsheet failed to fetch; partial results
+                are not returned, so callers never treat missing rows as deleted.
+        """
+        rows_by_sheet: dict[tuple[str, str], list[SheetRow]] = {}
         if not self.sheets_fetcher:
-            return texts, metas
+            return rows_by_sheet
 
-        for sheet_id in self.sheets_spreadsheet_ids:
-            try:
-                sheet_names = await asyncio.to_thread(self.sheets_fetcher.get_sheet_names, sheet_id)
-                for name in sheet_names:
-                    # Only index whitelisted sheets
-                    if SHEETS_WHITELIST and name not in SHEETS_WHITELIST:
-                        logger.debug(f"Skipping non-whitelisted sheet: {name}")
-                        continue
-                    rows = await asyncio.to_thread(self.sheets_fetcher.fetch_sheet_rows, sheet_id, name)
-                    for row in rows:
-                        if len(row.content.strip()) < MIN_CONTENT_LENGTH:
-                            continue
-                        texts.append(f"[{row.title}]\n{row.content}")
-                        metas.append({"source": "sheets", "title": row.title})
-                    logger.info(f"Fetched {len(rows)} rows from Sheets (Sheet: {name})")
-            except Exception as e:
-                logger.error(f"Failed to fetch Sheets {sheet_id}: {e}")
+        # One titles-only metadata call + one values.batchGet per spreadsheet,
+        # with all spreadsheets fetched concurrently
+        results = await asyncio.gather(
+            *(
+                asyncio.to_thread(self.sheets_fetcher.fetch_spreadsheet_rows, sheet_id, SHEETS_WHITELIST)
+                for sheet_id in self.sheets_spreadsheet_ids
+            ),
+            return_exceptions=True,
+        )
+        failed = []
+        for sheet_id, result in zip(self.sheets_spreadsheet_ids, results, strict=True):
+            if isinstance(result, BaseException):
+                logger.error(f"Failed to fetch Sheets {sheet_id}: {result}")
+                failed.append(sheet_id)
+                continue
+            for name, rows in result.items():
+                rows_by_sheet[(sheet_id, name)] = rows
+                logger.info(f"Fetched {len(rows)} rows from Sheets {sheet_id} (Sheet: {name})")
+        if failed:
+            raise RuntimeError(f"Failed to fetch Sheets {', '.join(failed)}")
+        return rows_by_sheet
+
+    @staticmethod
+    def _sheets_docs(rows: list[SheetRow]) -> tuple[list[str], list[dict]]:
+        """Convert sheet rows into (texts, metadatas)."""
+        texts, metas = [], []
+        for row in rows:
+            if len(row.content.strip()) < MIN_CONTENT_LENGTH:
+                continue
+            texts.append(f"[{row.title}]\n{row.content}")
+            metas.append({"source": "sheets", "title": row.title, "id": row.id})
         return texts, metas
 
-    async def _rebuild_index(self, texts: list[str], metadatas: list[dict]):
-        """Split documents into parent-child chunks and rebuild the index.
-        
-        Zero-downtime strategy:
-        1. Build all embeddings in-memory first
-        2. Only reset collection after embeddings are ready
-        3. Atomically insert all data at once
-        
+    def _sheets_source(self) -> DocSource:
+        """Document source for the whitelisted Google Sheets rows.
+
+        The fetched rows become each sheet's row-hash baseline once the index
+        sync succeeds (see _commit_sheet_rows).
+        """
+
+        async def produce(emit: Emit) -> None:
+            rows_by_sheet = await self._fetch_sheets_rows()
+            self._pending_sheet_rows = rows_by_sheet
+            texts, metas = self._sheets_docs([row for rows in rows_by_sheet.values() for row in rows])
+            for text, meta in zip(texts, metas, strict=True):
+                await emit(text, meta)
+
+        return produce
+
+    @staticmethod
+    def _list_source(texts: list[str], metadatas: list[dict]) -> DocSource:
+        """Document source for already-materialized documents."""
+
+        async def produce(emit: Emit) -> None:
+            for text, meta in zip(texts, metadatas, strict=True):
+                await emit(text, meta)
+
+        return produce
+
+    def _commit_sheet_rows(self, stats: IngestionStats) -> None:
+        """Record the last fetched rows as the Sheets delta baseline."""
+        pending, self._pending_sheet_rows = self._pending_sheet_rows, {}
+        if stats.failed or not self.sheets_fetcher:
+            return
+        for (sheet_id, name), rows in pending.items():
+            self.sheets_fetcher.commit_rows(sheet_id, name, rows)
+
+    async def _rebuild_index(
+        self,
+        texts: list[str],
+        metadatas: list[dict],
+        full: bool = False,
+        prune: bool = True,
+        remove_parent_ids: list[str] | None = None,
+    ) -> IngestionStats:
+        """Sync an in-memory document list into the index (see _sync_index)."""
+        if not texts and prune:
+            logger.warning("No documents to index.")
+            return IngestionStats()
+        return await self._sync_index(
+            [self._list_source(texts, metadatas)],
+            full=full,
+            prune=prune,
+            remove_parent_ids=remove_parent_ids,
+        )
+
+    def _plan_parent(
+        self,
+        full_text: str,
+        meta: dict,
+        index,
+        indexed_by_parent: dict[str, set[str]],
+        seen_parents: set[str],
+        stats: IngestionStats,
+    ) -> _ParentUpdate | None:
+        """Diff one document against the index; None if it needs no work."""
+        parent_id = _parent_id(meta, full_text)
+        if parent_id in seen_parents:
+            return None
+        seen_parents.add(parent_id)
+
+        existing_children = indexed_by_parent.get(parent_id, set())
+        stored_text = index.get_parent(parent_id)
+        if existing_children and stored_text is not None and (
+            _content_hash(stored_text) == _content_hash(full_text)
+        ):
+            stats.unchanged += 1
+            return None
+
+        if existing_children or stored_text is not None:
+            stats.updated += 1
+        else:
+            stats.added += 1
+
+        update = _ParentUpdate(parent_id, full_text, [], [], [], [])
+        # Split into child chunks (paragraphs)
+        wanted_children = set()
+        for child_text in self._split_into_children(full_text):
+            child_id = make_child_id(parent_id, child_text)
+            if child_id in wanted_children:
+                continue  # Identical paragraph repeated within one parent
+            wanted_children.add(child_id)
+            if child_id in existing_children:
+                continue  # Already embedded and indexed
+            update.child_ids.append(child_id)
+            update.child_texts.append(child_text)
+            update.child_metas.append({
+                **meta,
+                "parent_id": parent_id,
+            })
+        update.stale_child_ids = list(existing_children - wanted_children)
+        return update
+
+    @staticmethod
+    def _save_parents(index, updates: list[_ParentUpdate]) -> None:
+        """Stage and commit the full text of every updated parent (blocking)."""
+        for update in updates:
+            index.add_parent_document(update.parent_id, update.full_text)
+        index.save_parent_docs()
+
+    async def _sync_index(
+        self,
+        sources: list[DocSource],
+        full: bool = False,
+        prune: bool = True,
+        remove_parent_ids: list[str] | None = None,
+    ) -> IngestionStats:
+        """Stream documents from ``sources`` into the index.
+
+        Pipeline (stages connected by bounded queues, so memory is bounded by
+        the queue sizes rather than the corpus):
+        1. fetch: sources emit documents as soon as they are rendered
+        2. split: hash every parent; unchanged parents are skipped, changed
+           ones are split into children keyed by parent ID + child text hash
+        3. embed: only children that don't exist yet are embedded, in rounds
+           of ``pipeline_write_chunk`` (one worker per embedding slot)
+        4. write: each round is upserted and its parents' stale children dropped
+
+        Once every source is drained, parents that disappeared from the
+        sources are removed, per source name: a source that failed or emitted
+        nothing never removes parents, nor lets another source remove them.
+        A sync with no source changes makes zero embedding calls and no writes.
+        ``full=True`` builds a new index version from scratch (every parent is
+        re-embedded) and swaps it in only if every source succeeded and the
+        result validates; queries keep hitting the old version meanwhile.
+        With ``prune=False`` the documents are treated as a partial update:
+        only ``remove_parent_ids`` are removed, everything else is left alone.
+
         - Parents: Full documents stored in memory
         - Children: Paragraph-level chunks stored in ChromaDB for precise search
         """
-        if not texts:
-            logger.warning("No documents to index.")
-            return
-        if not self.embedding_engine or not self.vector_store:
+        stats = IngestionStats()
+        if not self.embedding_dispatcher or not self.vector_store:
             logger.warning("Embedding engine or vector store not available.")
-            return
+            stats.failed = True
+            return stats
 
+        index: VectorStore | IndexVersion = self.vector_store
+        shadow: IndexVersion | None = None
+        self.embedding_dispatcher.reset_stats()
         try:
-            # Phase 1: Build everything in-memory (no DB writes yet)
-            logger.info("[INGESTION] Phase 1: Building parent-child structure in-memory...")
-            parent_docs = {}  # {parent_id: full_text}
-            child_texts = []
-            child_metas = []
-            
-            for i, (full_text, meta) in enumerate(zip(texts, metadatas)):
-                parent_id = f"parent_{i}"
-                parent_docs[parent_id] = full_text
-                
-                # Split into child chunks (paragraphs)
-                children = self._split_into_children(full_text)
-                
-                for child_text in children:
-                    child_texts.append(child_text)
-                    child_metas.append({
-                        **meta,
-                        "parent_id": parent_id,
-                    })
-
-            # Phase 2: Generate all embeddings (still in-memory)
-            logger.info(f"[INGESTION] Phase 2: Generating embeddings for {len(child_texts)} chunks...")
-            all_embeddings = []
-            batch_size = 50
-            for i in range(0, len(child_texts), batch_size):
-                batch_texts = child_texts[i:i + batch_size]
-                embeddings = await self.embedding_engine.embed_batch(batch_texts)
-                all_embeddings.extend(embeddings)
-                logger.info(f"Embedded batch {i // batch_size + 1}/{(len(child_texts) + batch_size - 1) // batch_size}")
-            
-            # Phase 3: Atomic swap - reset and insert all at once
-            logger.info("[INGESTION] Phase 3: Atomic swap - resetting collection and inserting all data...")
-            await asyncio.to_thread(self.vector_store.reset_collection)
-            
-            # Insert all parent docs
-            for parent_id, full_text in parent_docs.items():
-                self.vector_store.add_parent_document(parent_id, full_text)
-            await asyncio.to_thread(self.vector_store.save_parent_docs)
-            
-            # Insert all child chunks with embeddings
-            await asyncio.to_thread(
-                self.vector_store.add_child_chunks,
-                child_texts,
-                all_embeddings,
-                child_metas
-            )
-            logger.info(f"[INGESTION] Indexed {len(child_texts)} chunks from {len(parent_docs)} documents")           
-            logger.info(
-                f"✅ Rebuilt index: {len(texts)} parents → {len(child_texts)} child chunks"
+            if full:
+                logger.info("[INGESTION] Full rebuild requested - building a shadow index...")
+                index = shadow = await asyncio.to_thread(self.vector_store.begin_rebuild)
+
+            # Pruning needs every indexed parent; a partial update only looks up
+            # the children of the parents it touches
+            indexed_by_parent: dict[str, set[str]] = {}
+            if prune and not full:
+                indexed_children = await asyncio.to_thread(index.get_indexed_children)
+                for child_id, meta in indexed_children.items():
+                    indexed_by_parent.setdefault(meta.get("parent_id", ""), set()).add(child_id)
+
+            fetch_stage, split_stage, embed_stage, write_stage = (
+                StageStats(name) for name in ("fetch", "split", "embed", "write")
             )
-            # Rebuild BM25 index so keyword search uses fresh data
-            if self.context_retriever is not None and HAS_BM25:
-                await asyncio.to_thread(self.context_retriever._rebuild_bm25_index)
-                logger.info("BM25 index rebuilt after ingestion.")
+            stats.stages = [fetch_stage, split_stage, embed_stage, write_stage]
+            docs: asyncio.Queue = asyncio.Queue(self.pipeline_queue_size)
+            updates: asyncio.Queue = asyncio.Queue(self.pipeline_queue_size)
+            rounds: asyncio.Queue = asyncio.Queue(self.pipeline_queue_size)
+            embed_workers = self.embedding_dispatcher.max_concurrency
+            seen_parents: set[str] = set()
+            source_failed = False
+            # Source names (meta["source"]) whose parents may be pruned this run
+            prunable_sources: set[str] = set()
+
+            async def fetch():
+                nonlocal source_failed
+                started = time.monotonic()
+                emitted: list[set[str]] = [set() for _ in sources]
+
+                def emitter(names: set[str]) -> Emit:
+                    async def emit(text: str, meta: dict) -> None:
+                        names.add(meta.get("source", "doc"))
+                        fetch_stage.items += 1
+                        await fetch_stage.put(docs, (text, meta))
+                    return emit
+
+                results = await asyncio.gather(
+                    *(source(emitter(names)) for source, names in zip(sources, emitted, strict=True)),
+                    return_exceptions=True,
+                )
+                failed_names: set[str] = set()
+                for result, names in zip(results, emitted, strict=True):
+                    if isinstance(result, Exception):
+                        source_failed = True
+                        failed_names |= names
+                        logger.error(f"Ingestion source failed: {result}")
+                    else:
+                        prunable_sources.update(names)
+                # A source that failed or emitted nothing can't vouch for its parents
+                prunable_sources.difference_update(failed_names)
+                await fetch_stage.put(docs, _DONE)
+                fetch_stage.wall_seconds += time.monotonic() - started
+
+            async def split():
+                started = time.monotonic()
+                while (item := await split_stage.get(docs)) is not _DONE:
+                    split_stage.items += 1
+                    if not prune:
+                        parent_id = _parent_id(item[1], item[0])
+                        indexed_by_parent.update(await asyncio.to_thread(index.get_ids_by_parent, [parent_id]))
+                    # Parent lookups (SQLite + zstd), hashing and splitting stay off the event loop
+                    update = await asyncio.to_thread(
+                        self._plan_parent, *item, index, indexed_by_parent, seen_parents, stats
+                    )
+                    if update is not None:
+                        await split_stage.put(updates, update)
+                for _ in range(embed_workers):
+                    await split_stage.put(updates, _DONE)
+                split_stage.wall_seconds += time.monotonic() - started
+
+            async def embed():
+                started = time.monotonic()
+                pending: list[_ParentUpdate] = []
+
+                async def flush():
+                    texts = [text for update in pending for text in update.child_texts]
+                    vectors = []
+                    if texts:
+                        # One contiguous float32 array instead of lists of Python floats (~8x smaller)
+                        vectors = np.asarray(await self.embedding_dispatcher.embed(texts), dtype=np.float32)
+                    embed_stage.items += len(texts)
+                    await embed_stage.put(rounds, (list(pending), vectors))
+                    pending.clear()
+
+                while (update := await embed_stage.get(updates)) is not _DONE:
+                    pending.append(update)
+                    if sum(len(u.child_texts) for u in pending) >= self.pipeline_write_chunk:
+                        await flush()
+                if pending:
+                    await flush()
+                embed_stage.wall_seconds += time.monotonic() - started
+
+            async def embed_all():
+                await asyncio.gather(*(embed() for _ in range(embed_workers)))
+                await rounds.put(_DONE)
+
+            async def write():
+                started = time.monotonic()
+                while (item := await write_stage.get(rounds)) is not _DONE:
+                    batch, vectors = item
+                    changes = _ChunkChanges(
+                        self.vector_store.index_version,
+                        [cid for update in batch for cid in update.child_ids],
+                        [text for update in batch for text in update.child_texts],
+                        [meta for update in batch for meta in update.child_metas],
+                        [cid for update in batch for cid in update.stale_child_ids],
+                    )
+                    child_ids, stale_child_ids = changes.added_ids, changes.removed_ids
+                    await asyncio.to_thread(
+                        index.upsert_children, child_ids, changes.added_texts, vectors, changes.added_metas
+                    )
+                    await asyncio.to_thread(index.delete_children, stale_child_ids)
+                    await asyncio.to_thread(self._save_parents, index, batch)
+                    if not full:
+                        # Applied per round so no more than one round's texts are held at a time;
+                        # a full rebuild re-reads the new version instead
+                        await self._refresh_lexical_index(changes, save=False)
+                    write_stage.items += len(child_ids)
+                    stats.chunks_embedded += len(child_ids)
+                    stats.chunks_deleted += len(stale_child_ids)
+                write_stage.wall_seconds += time.monotonic() - started
+
+            logger.info("[INGESTION] Streaming documents through fetch -> split -> embed -> write...")
+            async with asyncio.TaskGroup() as tg:
+                tg.create_task(fetch())
+                tg.create_task(split())
+                tg.create_task(embed_all())
+                tg.create_task(write())
+
+            if shadow is not None:
+                if source_failed or not fetch_stage.items:
+                    raise RuntimeError("a source failed or returned no documents; keeping the current index")
+                await asyncio.to_thread(
+                    self.vector_store.commit_rebuild, shadow, expected_children=stats.chunks_embedded
+                )
+                logger.info(f"[INGESTION] Pipeline stages: {stats.stage_summary()}")
+                logger.info(f"[INGESTION] Embedding: {self.embedding_dispatcher.last_stats.summary()}")
+                logger.info(f"✅ Rebuilt index ({self.vector_store.index_version}): {stats.summary()}")
+                await self._refresh_lexical_index()
+                return stats
+
+            # Drop parents that disappeared from their source; only sources that
+            # completed with documents prune, and only their own parents
+            if not prune:
+                removed_parents = set(remove_parent_ids or []) - seen_parents
+            elif not prunable_sources:
+                logger.warning("No source completed with documents; skipping removals this run.")
+                removed_parents = set()
+            else:
+                if source_failed:
+                    logger.warning(
+                        f"A source failed; only removing {', '.join(sorted(prunable_sources))} documents this run."
+                    )
+                stored_parents = await asyncio.to_thread(index.list_parent_ids)
+                removed_parents = {
+                    parent_id for parent_id in (set(indexed_by_parent) | set(stored_parents)) - seen_parents
+                    if _parent_source(parent_id) in prunable_sources
+                }
+            deleted = 0
+            changes = _ChunkChanges(self.vector_store.index_version)
+            if removed_parents:
+                orphaned = await asyncio.to_thread(index.delete_by_parent, sorted(removed_parents))
+                changes.removed_ids.extend(orphaned)
+                deleted = len(orphaned)
+            for parent_id in removed_parents:
+                index.remove_parent_document(parent_id)  # Staged in memory; committed off-loop below
+            stats.removed = len([p for p in removed_parents if p])
+            stats.chunks_deleted += deleted
+
+            logger.info(f"[INGESTION] Pipeline stages: {stats.stage_summary()}")
+            logger.info(f"[INGESTION] Embedding: {self.embedding_dispatcher.last_stats.summary()}")
+            if not (stats.added or stats.updated or removed_parents or deleted):
+                logger.info(f"[INGESTION] Index already up to date ({stats.summary()})")
+                return stats
+
+            await asyncio.to_thread(self.vector_store.save_parent_docs)
+            logger.info(f"✅ Synced index: {stats.summary()}")
+            await self._refresh_lexical_index(changes)
         except Exception as e:
             logger.error(f"Failed to rebuild vector index: {e}")
+            stats.failed = True
+            if shadow is not None:
+                await asyncio.to_thread(self.vector_store.abort_rebuild, shadow)
+        return stats
+
+    async def _refresh_lexical_index(self, changes: _ChunkChanges | None = None, save: bool = True) -> None:
+        """Bring the BM25 index up to date so keyword search uses fresh data.
+
+        With ``changes`` only the touched chunks are applied (and the snapshot
+        is saved if ``save``); without them (full rebuilds) BM25 is rebuilt
+        from the whole index.
+        """
+        if self.context_retriever is None or not HAS_BM25:
+            return
+        if changes is None:
+            await asyncio.to_thread(self.context_retriever._rebuild_bm25_index)
+            logger.info("BM25 index rebuilt after ingestion.")
+        else:
+            await asyncio.to_thread(
+                self.context_retriever.update_bm25_index,
+                changes.base_version,
+                changes.added_ids,
+                changes.added_texts,
+                changes.added_metas,
+                changes.removed_ids,
+                save,
+            )
 
     @staticmethod
     def _split_into_children(text: str, min_length: int = 50, max_chunk: int = 400) -> list[str]:
@@ -299,40 +772,91 @@ class DataIngestionTask:
 
     # ─── Public sync methods ──────────────────────────────────────────
 
-    async def _ingest_all(self):
-        """Full sync: fetch Notion + Sheets, rebuild index."""
-        logger.info("Starting FULL data ingestion...")
-        notion_texts, notion_metas = await self._fetch_notion_docs()
-        sheets_texts, sheets_metas = await self._fetch_sheets_docs()
+    @contextlib.asynccontextmanager
+    async def _locked_ingestion(self):
+        """Run one sync at a time; a sync started meanwhile waits its turn."""
+        if self._ingest_lock.locked():
+            logger.info("Another ingestion is running; waiting for it to finish")
+        async with self._ingest_lock:
+            yield
 
-        all_texts = notion_texts + sheets_texts
-        all_metas = notion_metas + sheets_metas
+    async def _ingest_all(self, full: bool = False, full_crawl: bool = True) -> IngestionStats:
+        """Sync Notion + Sheets into the index (delta unless ``full``).
 
-        await self._rebuild_index(all_texts, all_metas)
-        logger.info("Full ingestion complete.")
+        ``full_crawl=False`` syncs Notion from its change feed instead of
+        re-crawling the whole workspace.
+        """
+        async with self._locked_ingestion():
+            logger.info("Starting FULL data ingestion...")
+            stats = await self._sync_index(
+                [self._notion_source(full_crawl=full_crawl), self._sheets_source()],
+                full=full,
+            )
+            self._commit_sheet_rows(stats)
+            logger.info(f"Full ingestion complete. ({stats.summary()})")
+            return stats
 
-    async def ingest_notion_only(self):
+    async def ingest_notion_only(self) -> IngestionStats:
         """Sync only Notion pages."""
-        logger.info("Starting NOTION-ONLY ingestion...")
-        notion_texts, notion_metas = await self._fetch_notion_docs()
-        # We still need sheets data already in the store, so fetch both
-        sheets_texts, sheets_metas = await self._fetch_sheets_docs()
-        all_texts = notion_texts + sheets_texts
-        all_metas = notion_metas + sheets_metas
-        await self._rebuild_index(all_texts, all_metas)
-        logger.info("Notion-only ingestion complete.")
-
-    async def ingest_sheets_only(self):
-        """Sync only Google Sheets."""
-        logger.info("Starting SHEETS-ONLY ingestion...")
-        notion_texts, notion_metas = await self._fetch_notion_docs()
-        sheets_texts, sheets_metas = await self._fetch_sheets_docs()
-        all_texts = notion_texts + sheets_texts
-        all_metas = notion_metas + sheets_metas
-        await self._rebuild_index(all_texts, all_metas)
-        logger.info("Sheets-only ingestion complete.")
-
-    async def ingest_now(self):
-        """Trigger immediate full ingestion (for manual refresh)."""
-        logger.info("Manual full ingestion triggered")
-        await self._ingest_all()
+        async with self._locked_ingestion():
+            logger.info("Starting NOTION-ONLY ingestion...")
+            # We still need sheets data already in the store, so stream both
+            stats = await self._sync_index([self._notion_source(), self._sheets_source()])
+            self._commit_sheet_rows(stats)
+            logger.info(f"Notion-only ingestion complete. ({stats.summary()})")
+            return stats
+
+    async def ingest_sheets_only(self) -> IngestionStats:
+        """Sync only Google Sheets.
+
+        Once every sheet has a row-hash baseline, only inserted, updated and
+        deleted rows are sent to the index and Notion is not fetched at all.
+        """
+        async with self._locked_ingestion():
+            logger.info("Starting SHEETS-ONLY ingestion...")
+            rows_by_sheet = await self._fetch_sheets_rows()
+            fetcher = self.sheets_fetcher
+            if fetcher is None or not rows_by_sheet or not all(fetcher.has_baseline(*key) for key in rows_by_sheet):
+                # No baseline yet: a full-corpus sync is needed so Notion docs aren't pruned
+                self._pending_sheet_rows = rows_by_sheet
+                sheets_texts, sheets_metas = self._sheets_docs(
+                    [row for rows in rows_by_sheet.values() for row in rows]
+                )
+                stats = await self._sync_index(
+                    [self._notion_source(), self._list_source(sheets_texts, sheets_metas)]
+                )
+                self._commit_sheet_rows(stats)
+                logger.info(f"Sheets-only ingestion complete. ({stats.summary()})")
+                return stats
+
+            changed_rows: list[SheetRow] = []
+            removed_ids: list[str] = []
+            unchanged = 0
+            for (sheet_id, name), rows in rows_by_sheet.items():
+                delta = fetcher.diff_rows(sheet_id, name, rows)
+                logger.info(f"Sheets delta {delta.summary()}")
+                changed_rows.extend(delta.inserted + delta.updated)
+                removed_ids.extend(
+                    _parent_id({"source": "sheets", "id": row_id}, "") for row_id in delta.deleted
+                )
+                unchanged += delta.unchanged
+
+            if not changed_rows and not removed_ids:
+                stats = IngestionStats(unchanged=unchanged)
+            else:
+                texts, metas = self._sheets_docs(changed_rows)
+                stats = await self._rebuild_index(texts, metas, prune=False, remove_parent_ids=removed_ids)
+                stats.unchanged += unchanged
+                self._pending_sheet_rows = rows_by_sheet
+                self._commit_sheet_rows(stats)
+            logger.info(f"Sheets-only ingestion complete. ({stats.summary()})")
+            return stats
+
+    async def ingest_now(self, full: bool = False) -> IngestionStats:
+        """Trigger immediate ingestion (for manual refresh).
+
+        ``full=True`` rebuilds the index into a shadow version (``!sync full``)
+        that replaces the live one only once it validates.
+        """
+        logger.info(f"Manual {'full rebuild' if full else 'ingestion'} triggered")
+        return await self._ingest_all(full=full)
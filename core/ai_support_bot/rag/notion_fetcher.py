@@ -2,10 +2,23 @@
 
 from __future__ import annotations
 
+import asyncio
+import hashlib
+import json
 import logging
+from collections import Counter
+from collections.abc import Iterable
+from contextlib import contextmanager
 from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING
+
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 
+if TYPE_CHECKING:
+    from core.ai_support_bot.rag.notion_crawler import CrawlStats
+    from core.ai_support_bot.rag.page_store import NotionPageStore
+
 logger = logging.getLogger("ai_support_bot.rag.notion")
 
 
@@ -18,6 +31,16 @@ class NotionPage:
     url: str = ""
     last_edited_time: str = ""
 
+    @property
+    def content_hash(self) -> str:
+        """Hash of the rendered page (title + body)."""
+        return hashlib.sha256(f"{self.title}\n{self.content}".encode()).hexdigest()[:32]
+
+
+def _normalize_id(notion_id: str) -> str:
+    """Notion IDs appear with and without hyphens; compare them without."""
+    return notion_id.replace('-', '')
+
 
 def _extract_rich_text(rich_text_list: list[dict]) -> str:
     """Helper to extract plain text from rich_text array."""
@@ -36,63 +59,264 @@ def _extract_title(page: dict) -> str:
     return "Untitled"
 
 
+def _extract_text_from_block(block: dict) -> str:
+    """Extract the plain text of a single block (not including its children)."""
+    block_type = block.get("type", "")
+    block_data = block.get(block_type, {})
+
+    text = ""
+    if block_type == "to_do":
+        checked = "✅" if block_data.get("checked") else "☐"
+        text = f"{checked} {_extract_rich_text(block_data.get('rich_text', []))}"
+    elif block_type == "callout":
+        emoji = block_data.get("icon", {}).get("emoji", "💡")
+        text = f"{emoji} {_extract_rich_text(block_data.get('rich_text', []))}"
+    elif block_type == "quote":
+        text = f"> {_extract_rich_text(block_data.get('rich_text', []))}"
+    elif block_type == "toggle":
+        text = f"▼ {_extract_rich_text(block_data.get('rich_text', []))}"
+    elif block_type == "table_row":
+        # table_row has 'cells' (list of rich_text arrays)
+        cells = [_extract_rich_text(cell) for cell in block_data.get("cells", [])]
+        text = " | ".join(cells)
+    elif block_type in ["column_list", "column"]:
+        # Layout blocks (columns) — no direct text, but has children
+        pass
+    elif block_type == "synced_block":
+        # Synced block — extract from synced_from or children
+        synced_from = block_data.get("synced_from")
+        if synced_from and synced_from.get("block_id"):
+            # This is a reference to another block, skip to avoid duplication
+            pass
+        # Otherwise it's the original synced block, process children normally
+    elif "rich_text" in block_data:
+        text = _extract_rich_text(block_data.get("rich_text", []))
+    return text
+
+
+def _has_inline_children(block: dict) -> bool:
+    """Whether a block's children belong to the page body.
+
+    child_page/child_database children are separate tree nodes handled by the
+    crawler, not part of the parent page's content.
+    """
+    return bool(block.get("has_children")) and block.get("type", "") not in ["child_page", "child_database"]
+
+
+def _extract_properties(page: dict) -> list[str]:
+    """Render database-column properties as "name: value" lines."""
+    content_parts = []
+    properties = page.get("properties", {})
+    for prop_name, prop_data in properties.items():
+        prop_type = prop_data.get("type")
+        prop_value = ""
+        
+        # Skip title (already extracted)
+        if prop_type == "title":
+            continue
+        
+        # Extract based on property type
+        if prop_type == "rich_text":
+            prop_value = _extract_rich_text(prop_data.get("rich_text", []))
+        elif prop_type == "select" and prop_data.get("select"):
+            prop_value = prop_data["select"].get("name", "")
+        elif prop_type == "multi_select":
+            prop_value = ", ".join(item.get("name", "") for item in prop_data.get("multi_select", []))
+        elif prop_type == "number":
+            prop_value = str(prop_data.get("number", ""))
+        elif prop_type == "status" and prop_data.get("status"):
+            prop_value = prop_data["status"].get("name", "")
+        
+        if prop_value.strip():
+            content_parts.append(f"{prop_name}: {prop_value}")
+    return content_parts
+
+
+def _render_block_tree(block: dict, depth: int = 0) -> str:
+    """Render a block whose children were pre-fetched into ``block["_children"]``."""
+    indent = "  " * depth
+    lines = []
+    text = _extract_text_from_block(block)
+    if text.strip():
+        lines.append(f"{indent}{text}")
+    for child in block.get("_children", []):
+        child_text = _render_block_tree(child, depth + 1)
+        if child_text.strip():
+            lines.append(child_text)
+    return "\n".join(lines)
+
+
+def _render_page(page_id: str, page: dict, blocks: list[dict]) -> NotionPage:
+    """Build a NotionPage from a page object and its pre-fetched block tree."""
+    content_parts = _extract_properties(page)
+    if blocks and content_parts:
+        content_parts.append("\n--- รายละเอียด ---")
+    for block in blocks:
+        text = _render_block_tree(block)
+        if text.strip():
+            content_parts.append(text)
+    return NotionPage(
+        id=page_id,
+        title=_extract_title(page),
+        content="\n".join(content_parts),
+        url=page.get("url", ""),
+        last_edited_time=page.get("last_edited_time", ""),
+    )
+
+
+def _child_node_refs(blocks: list[dict]) -> tuple[list[str], list[str]]:
+    """Collect (child page IDs, child database IDs) referenced by a page's blocks."""
+    page_ids, database_ids = [], []
+    for block in blocks:
+        b_type = block.get("type", "")
+        b_id = block.get("id", "")
+        
+        if b_type == "child_page":
+            page_ids.append(b_id)
+        elif b_type == "child_database":
+            database_ids.append(b_id)
+        elif b_type == "link_to_page":
+            link_data = block.get("link_to_page", {})
+            if link_data.get("type") == "page_id":
+                page_ids.append(link_data.get("page_id"))
+            elif link_data.get("type") == "database_id":
+                database_ids.append(link_data.get("database_id"))
+    return page_ids, database_ids
+
+
 class NotionFetcher:
     """Fetches pages from Notion and converts to plain text."""
 
-    def __init__(self, client):
-        """Initialize with a Notion client."""
+    def __init__(
+        self,
+        client,
+        async_client=None,
+        state_path: str | Path | None = None,
+        page_store: NotionPageStore | None = None,
+    ):
+        """Initialize with a Notion client.
+
+        Args:
+            client: Synchronous notion_client.Client.
+            async_client: Optional notion_client.AsyncClient; when set,
+                fetch_all_async() crawls concurrently instead of serially.
+            state_path: Optional JSON file persisting last_edited_time
+                watermarks for incremental syncs.
+            page_store: Optional on-disk snapshot; pages are loaded from it at
+                startup and written back after every sync.
+        """
         self._client = client
-        self._cached_pages = []
+        self._async_client = async_client
+        self._page_store = page_store
+        # Rendered pages keyed by normalized page ID
+        self._cached_pages: dict[str, NotionPage] = page_store.load_all() if page_store else {}
+        self.last_crawl_stats: CrawlStats | None = None
+        self._full_crawl_pending = False  # Set when a full crawl had errors
+        self._state_path = Path(state_path) if state_path else None
+        self._sync_state = self._load_sync_state()
+        # Crawl-scoped memo: each page object / block list is requested at most once per sync
+        self._page_memo: dict[str, dict] = {}
+        self._block_memo: dict[str, list[dict]] = {}
+        self._crawl_depth = 0
+        self.request_counts: Counter[str] = Counter()
+
+    def _load_sync_state(self) -> dict:
+        """Load the persisted {"watermark", "pages": {id: last_edited_time}} state."""
+        if self._state_path and self._state_path.exists():
+            try:
+                with open(self._state_path, encoding="utf-8") as f:
+                    state = json.load(f)
+                return {"watermark": state.get("watermark", ""), "pages": state.get("pages", {})}
+            except Exception as e:
+                logger.error(f"Failed to load Notion sync state: {e}")
+        return {"watermark": "", "pages": {}}
+
+    def _save_sync_state(self):
+        if not self._state_path:
+            return
+        try:
+            self._state_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self._state_path.with_suffix(".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._sync_state, f)
+            tmp_path.replace(self._state_path)
+        except Exception as e:
+            logger.error(f"Failed to save Notion sync state: {e}")
+
+    def record_watermarks(self, pages: Iterable[NotionPage], reset: bool = False, ceiling: str | None = None):
+        """Update per-page last_edited_time watermarks (``reset`` after a full crawl).
+
+        ``ceiling`` caps the global watermark, so the change feed still
+        returns pages edited at or after it (e.g. ones that failed to fetch).
+        """
+        if reset:
+            self._sync_state["pages"] = {}
+        page_times = self._sync_state["pages"]
+        for page in pages:
+            if page.last_edited_time:
+                page_times[_normalize_id(page.id)] = page.last_edited_time
+        watermark = max(page_times.values(), default="")
+        self._sync_state["watermark"] = min(watermark, ceiling) if ceiling is not None else watermark
+        self._save_sync_state()
+
+    def commit_full_crawl(self):
+        """Reset watermarks and the snapshot to exactly the pages just crawled."""
+        self.record_watermarks(self._cached_pages.values(), reset=True)
+        if self._page_store:
+            self._page_store.replace_all(list(self._cached_pages.values()))
+
+    @contextmanager
+    def _crawl_scope(self):
+        """Enable request memoization for the duration of one crawl.
+
+        Nested scopes (fetch_all → fetch_tree) share the outer scope. When the
+        outermost scope exits, per-endpoint request counts are logged and the
+        memo is dropped so the next sync sees fresh data.
+        """
+        if self._crawl_depth == 0:
+            self._page_memo.clear()
+            self._block_memo.clear()
+            self.request_counts = Counter()
+        self._crawl_depth += 1
+        try:
+            yield
+        finally:
+            self._crawl_depth -= 1
+            if self._crawl_depth == 0:
+                total = sum(self.request_counts.values())
+                per_endpoint = ", ".join(f"{k}={v}" for k, v in sorted(self.request_counts.items()))
+                logger.info(f"Notion crawl used {total} API requests ({per_endpoint})")
+                self._page_memo.clear()
+                self._block_memo.clear()
+
+    def _retrieve_page(self, page_id: str) -> dict:
+        """pages.retrieve, memoized within a crawl scope."""
+        key = _normalize_id(page_id)
+        if self._crawl_depth and key in self._page_memo:
+            return self._page_memo[key]
+        self.request_counts["pages.retrieve"] += 1
+        page: dict = self._client.pages.retrieve(page_id=page_id)
+        if self._crawl_depth:
+            self._page_memo[key] = page
+        return page
 
     def _get_block_text(self, block: dict, depth: int = 0) -> str:
         """Extract plain text from a block and its children recursively."""
-        block_type = block.get("type", "")
-        block_data = block.get(block_type, {})
         indent = "  " * depth
         lines = []
 
         # 1. Extract text from current block
-        text = ""
-        if block_type == "to_do":
-            checked = "✅" if block_data.get("checked") else "☐"
-            text = f"{checked} {_extract_rich_text(block_data.get('rich_text', []))}"
-        elif block_type == "callout":
-            emoji = block_data.get("icon", {}).get("emoji", "💡")
-            text = f"{emoji} {_extract_rich_text(block_data.get('rich_text', []))}"
-        elif block_type == "quote":
-            text = f"> {_extract_rich_text(block_data.get('rich_text', []))}"
-        elif block_type == "toggle":
-            text = f"▼ {_extract_rich_text(block_data.get('rich_text', []))}"
-        elif block_type == "table_row":
-            # table_row has 'cells' (list of rich_text arrays)
-            cells = [_extract_rich_text(cell) for cell in block_data.get("cells", [])]
-            text = " | ".join(cells)
-        elif block_type in ["column_list", "column"]:
-            # Layout blocks (columns) — no direct text, but has children
-            pass
-        elif block_type == "synced_block":
-            # Synced block — extract from synced_from or children
-            synced_from = block_data.get("synced_from")
-            if synced_from and synced_from.get("block_id"):
-                # This is a reference to another block, skip to avoid duplication
-                pass
-            # Otherwise it's the original synced block, process children normally
-        elif "rich_text" in block_data:
-            text = _extract_rich_text(block_data.get("rich_text", []))
-        
+        text = _extract_text_from_block(block)
         if text.strip():
             lines.append(f"{indent}{text}")
 
         # 2. Extract children if any (recursion)
-        if block.get("has_children"):
-            # Exclude child_page/child_database from recursion inside page content
-            # (they are handled by the tree crawler separately)
-            if block_type not in ["child_page", "child_database"]:
-                children = self._fetch_all_blocks(block["id"])
-                for child in children:
-                    child_text = self._get_block_text(child, depth + 1)
-                    if child_text.strip():
-                        lines.append(child_text)
+        if _has_inline_children(block):
+            children = self._fetch_all_blocks(block["id"])
+            for child in children:
+                child_text = self._get_block_text(child, depth + 1)
+                if child_text.strip():
+                    lines.append(child_text)
 
         return "\n".join(lines)
 
@@ -107,35 +331,12 @@ class NotionFetcher:
         
         Retries up to 5 times with exponential backoff (2s, 4s, 8s) on network errors.
         """
-        page = self._client.pages.retrieve(page_id=page_id)
+        page = self._retrieve_page(page_id)
         title = _extract_title(page)
         url = page.get("url", "")
         
         # 1. Extract properties (database columns)
-        content_parts = []
-        properties = page.get("properties", {})
-        for prop_name, prop_data in properties.items():
-            prop_type = prop_data.get("type")
-            prop_value = ""
-            
-            # Skip title (already extracted)
-            if prop_type == "title":
-                continue
-            
-            # Extract based on property type
-            if prop_type == "rich_text":
-                prop_value = _extract_rich_text(prop_data.get("rich_text", []))
-            elif prop_type == "select" and prop_data.get("select"):
-                prop_value = prop_data["select"].get("name", "")
-            elif prop_type == "multi_select":
-                prop_value = ", ".join(item.get("name", "") for item in prop_data.get("multi_select", []))
-            elif prop_type == "number":
-                prop_value = str(prop_data.get("number", ""))
-            elif prop_type == "status" and prop_data.get("status"):
-                prop_value = prop_data["status"].get("name", "")
-            
-            if prop_value.strip():
-                content_parts.append(f"{prop_name}: {prop_value}")
+        content_parts = _extract_properties(page)
         
         # 2. Extract blocks (page content)
         blocks = self._fetch_all_blocks(page_id)
@@ -149,10 +350,20 @@ class NotionFetcher:
 
         content = "\n".join(content_parts)
         logger.info(f"Fetched Notion page '{title}' ({len(content)} chars)")
-        return NotionPage(id=page_id, title=title, content=content, url=url)
+        return NotionPage(
+            id=page_id,
+            title=title,
+            content=content,
+            url=url,
+            last_edited_time=page.get("last_edited_time", ""),
+        )
 
     def _fetch_all_blocks(self, block_id: str) -> list[dict]:
-        """Paginate through all children of a block."""
+        """Paginate through all children of a block (memoized within a crawl scope)."""
+        key = _normalize_id(block_id)
+        if self._crawl_depth and key in self._block_memo:
+            return self._block_memo[key]
+
         all_blocks: list[dict] = []
         cursor = None
 
@@ -161,6 +372,7 @@ class NotionFetcher:
             if cursor:
                 kwargs["start_cursor"] = cursor
 
+            self.request_counts["blocks.children.list"] += 1
             response = self._client.blocks.children.list(**kwargs)
             all_blocks.extend(response.get("results", []))
 
@@ -168,6 +380,8 @@ class NotionFetcher:
                 break
             cursor = response.get("next_cursor")
 
+        if self._crawl_depth:
+            self._block_memo[key] = all_blocks
         return all_blocks
 
     def fetch_database_pages(self, database_id: str) -> list[NotionPage]:
@@ -181,6 +395,7 @@ class NotionFetcher:
             if cursor:
                 params["start_cursor"] = cursor
 
+            self.request_counts["databases.query"] += 1
             try:
                 # Use the official python SDK method for querying databases if available
                 if hasattr(self._client, "databases") and hasattr(self._client.databases, "query"):
@@ -202,6 +417,9 @@ class NotionFetcher:
 
             for result in response.get("results", []):
                 page_id = result["id"]
+                if self._crawl_depth:
+                    # Query results are full page objects; no need to retrieve them again
+                    self._page_memo.setdefault(_normalize_id(page_id), result)
                 try:
                     page = self.fetch_page_content(page_id)
                     pages.append(page)
@@ -216,110 +434,203 @@ class NotionFetcher:
         
         # Cache the pages
         for page in pages:
-            if not any(p.id == page.id for p in self._cached_pages):
-                self._cached_pages.append(page)
+            self._cached_pages[_normalize_id(page.id)] = page
         
         return pages
 
     def fetch_tree(self, start_page_ids: list[str], start_database_ids: list[str]):
         """Recursively fetch pages and databases, caching all discovered content."""
-        visited_pages = set()
-        visited_databases = set()
+        with self._crawl_scope():
+            visited_pages = set()
+            visited_databases = set()
         
-        pages_to_visit = list(start_page_ids)
-        databases_to_visit = list(start_database_ids)
-
-        while pages_to_visit or databases_to_visit:
-            # Process all pending databases first, which yield more pages
-            while databases_to_visit:
-                db_id = databases_to_visit.pop(0)
-                # Normalize ID (remove hyphens to ensure consistent tracking)
-                norm_db_id = db_id.replace('-', '')
-                if norm_db_id in visited_databases:
-                    continue
-                visited_databases.add(norm_db_id)
+            pages_to_visit = list(start_page_ids)
+            databases_to_visit = list(start_database_ids)
+
+            while pages_to_visit or databases_to_visit:
+                # Process all pending databases first, which yield more pages
+                while databases_to_visit:
+                    db_id = databases_to_visit.pop(0)
+                    # Normalize ID (remove hyphens to ensure consistent tracking)
+                    norm_db_id = _normalize_id(db_id)
+                    if norm_db_id in visited_databases:
+                        continue
+                    visited_databases.add(norm_db_id)
                 
-                try:
-                    logger.info(f"Fetching database tree node: {db_id}")
-                    # fetch_database_pages calls fetch_page_content for its entries
-                    pages = self.fetch_database_pages(db_id)
-                    # Add newly discovered child pages to our crawl queue
-                    for p in pages:
-                        norm_pid = p.id.replace('-', '')
-                        if norm_pid not in visited_pages:
-                            pages_to_visit.append(p.id)
-                except Exception as e:
-                    logger.error(f"Error fetching database tree node {db_id}: {e}")
-
-            # Process pending pages
-            while pages_to_visit:
-                page_id = pages_to_visit.pop(0)
-                norm_page_id = page_id.replace('-', '')
-                if norm_page_id in visited_pages:
-                    continue
-                visited_pages.add(norm_page_id)
+                    try:
+                        logger.info(f"Fetching database tree node: {db_id}")
+                        # fetch_database_pages calls fetch_page_content for its entries,
+                        # so rows are already rendered and cached: only queue their children
+                        pages = self.fetch_database_pages(db_id)
+                        for p in pages:
+                            norm_pid = _normalize_id(p.id)
+                            if norm_pid in visited_pages:
+                                continue
+                            visited_pages.add(norm_pid)
+                            child_pages, child_databases = _child_node_refs(self._fetch_all_blocks(p.id))
+                            pages_to_visit.extend(child_pages)
+                            databases_to_visit.extend(child_databases)
+                    except Exception as e:
+                        logger.error(f"Error fetching database tree node {db_id}: {e}")
+
+                # Process pending pages
+                while pages_to_visit:
+                    page_id = pages_to_visit.pop(0)
+                    norm_page_id = _normalize_id(page_id)
+                    if norm_page_id in visited_pages:
+                        continue
+                    visited_pages.add(norm_page_id)
                 
-                try:
-                    logger.info(f"Fetching page tree node: {page_id}")
-                    # 1. Fetch the page itself
-                    page = self.fetch_page_content(page_id)
+                    try:
+                        logger.info(f"Fetching page tree node: {page_id}")
+                        # 1. Fetch the page itself
+                        page = self.fetch_page_content(page_id)
                     
-                    # Ensure it's in the cache
-                    if not any(p.id == page.id for p in self._cached_pages):
-                        self._cached_pages.append(page)
-
-                    # 2. Inspect its blocks for children
-                    blocks = self._fetch_all_blocks(page_id)
-                    for block in blocks:
-                        b_type = block.get("type", "")
-                        b_id = block.get("id", "")
-                        
-                        if b_type == "child_page":
-                            pages_to_visit.append(b_id)
-                        elif b_type == "child_database":
-                            databases_to_visit.append(b_id)
-                        elif b_type == "link_to_page":
-                            link_data = block.get("link_to_page", {})
-                            if link_data.get("type") == "page_id":
-                                pages_to_visit.append(link_data.get("page_id"))
-                            elif link_data.get("type") == "database_id":
-                                databases_to_visit.append(link_data.get("database_id"))
+                        # Ensure it's in the cache
+                        self._cached_pages[norm_page_id] = page
 
-                except Exception as e:
-                    logger.error(f"Error fetching page tree node {page_id}: {e}")
+                        # 2. Inspect its blocks for children
+                        blocks = self._fetch_all_blocks(page_id)
+                        child_pages, child_databases = _child_node_refs(blocks)
+                        pages_to_visit.extend(child_pages)
+                        databases_to_visit.extend(child_databases)
+
+                    except Exception as e:
+                        logger.error(f"Error fetching page tree node {page_id}: {e}")
 
     def fetch_all(self):
         """Fetch all pages and databases accessible to the integration using search."""
-        logger.info("Searching workspace for all accessible Notion pages and databases...")
-        cursor = None
-        all_results = []
+        with self._crawl_scope():
+            logger.info("Searching workspace for all accessible Notion pages and databases...")
+            cursor = None
+            all_results = []
         
-        while True:
-            kwargs = {}
-            if cursor:
-                kwargs["start_cursor"] = cursor
-            try:
-                response = self._client.search(**kwargs)
-                all_results.extend(response.get("results", []))
-                if not response.get("has_more"):
+            while True:
+                kwargs = {}
+                if cursor:
+                    kwargs["start_cursor"] = cursor
+                try:
+                    self.request_counts["search"] += 1
+                    response = self._client.search(**kwargs)
+                    all_results.extend(response.get("results", []))
+                    if not response.get("has_more"):
+                        break
+                    cursor = response.get("next_cursor")
+                except Exception as e:
+                    logger.error(f"Failed to search workspace: {e}")
                     break
-                cursor = response.get("next_cursor")
-            except Exception as e:
-                logger.error(f"Failed to search workspace: {e}")
-                break
 
-        pages_to_visit = []
-        databases_to_visit = []
+            pages_to_visit = []
+            databases_to_visit = []
 
-        for result in all_results:
-            obj_type = result.get("object")
-            obj_id = result.get("id")
-            if obj_type == "page":
-                pages_to_visit.append(obj_id)
-            elif obj_type == "database":
-                databases_to_visit.append(obj_id)
+            for result in all_results:
+                obj_type = result.get("object")
+                obj_id = result.get("id")
+                if obj_type == "page":
+                    pages_to_visit.append(obj_id)
+                elif obj_type == "database":
+                    databases_to_visit.append(obj_id)
 
-        logger.info(f"Search found {len(pages_to_visit)} pages and {len(databases_to_visit)} databases. Fetching contents...")
+            logger.info(f"Search found {len(pages_to_visit)} pages and {len(databases_to_visit)} databases. Fetching contents...")
         
-        # Reuse fetch_tree but pass all discovered pages & databases as seeds.
-        self.fetch_tree(pages_to_visit, databases_to_visit)
+            # Reuse fetch_tree but pass all discovered pages & databases as seeds.
+            self.fetch_tree(pages_to_visit, databases_to_visit)
+
+    async def fetch_all_async(self, on_page=None):
+        """Concurrent equivalent of fetch_all() using the async Notion client.
+
+        ``on_page`` (async callable) receives each NotionPage as soon as it is rendered.
+        """
+        from core.ai_support_bot.rag.notion_crawler import AsyncNotionCrawler
+
+        crawler = AsyncNotionCrawler(self._async_client)
+        logger.info("Searching workspace for all accessible Notion pages and databases (async)...")
+        pages_to_visit, databases_to_visit = await crawler.search_all()
+        logger.info(f"Search found {len(pages_to_visit)} pages and {len(databases_to_visit)} databases. Fetching contents...")
+
+        pages = await crawler.crawl(pages_to_visit, databases_to_visit, on_page=on_page)
+        self.last_crawl_stats = crawler.stats
+        crawled = {_normalize_id(p.id): p for p in pages}
+        if crawler.stats.errors:
+            # Some pages or databases failed: keep every previously cached page the
+            # crawl didn't reach (so nothing is pruned) and leave the watermarks and
+            # snapshot baseline alone; the next sync retries with a full crawl.
+            logger.warning(
+                f"Notion full crawl had {crawler.stats.errors} errors; "
+                f"keeping previous pages and retrying a full crawl next sync"
+            )
+            self._cached_pages.update(crawled)
+            self._full_crawl_pending = True
+            if self._page_store:
+                await asyncio.to_thread(self._page_store.upsert, pages)
+            return
+        self._cached_pages = crawled
+        self._full_crawl_pending = False
+        await asyncio.to_thread(self.commit_full_crawl)
+
+    async def fetch_changed_async(self, on_page=None) -> int:
+        """Incremental sync: re-crawl only pages edited since the last watermark.
+
+        Walks search results newest-first and stops at the watermark, then
+        fetches blocks for just those pages and replaces them in the cache.
+        Deleted/archived pages are only dropped by a full crawl.
+
+        Returns:
+            Number of pages re-fetched.
+        """
+        from core.ai_support_bot.rag.notion_crawler import AsyncNotionCrawler
+
+        crawler = AsyncNotionCrawler(self._async_client)
+        watermark = self._sync_state["watermark"]
+        page_times = self._sync_state["pages"]
+        edited = await crawler.search_edited_since(watermark)
+        changed = [
+            r for r in edited
+            if page_times.get(_normalize_id(r["id"])) != r.get("last_edited_time")
+        ]
+        changed_ids = [r["id"] for r in changed]
+        logger.info(f"Notion change feed: {len(changed_ids)} pages edited since {watermark}")
+
+        pages = (
+            await crawler.crawl(changed_ids, [], follow_children=False, on_page=on_page)
+            if changed_ids else []
+        )
+        self.last_crawl_stats = crawler.stats
+        for page in pages:
+            self._cached_pages[_normalize_id(page.id)] = page
+        # Pages that failed to fetch keep their old per-page time, and the global
+        # watermark stays at the oldest of them so the next sync retries them
+        fetched = {_normalize_id(page.id) for page in pages}
+        failed_times = [
+            r.get("last_edited_time", "") for r in changed
+            if _normalize_id(r["id"]) not in fetched
+        ]
+        if failed_times:
+            logger.warning(
+                f"Notion change feed: {len(failed_times)} pages failed to fetch; "
+                f"holding the watermark at {min(failed_times)}"
+            )
+        elif crawler.stats.errors:
+            logger.warning(
+                f"Notion change feed had {crawler.stats.errors} errors; "
+                f"next sync will be a full crawl"
+            )
+            self._full_crawl_pending = True
+        self.record_watermarks(pages, ceiling=min(failed_times) if failed_times else None)
+        if self._page_store:
+            await asyncio.to_thread(self._page_store.upsert, pages)
+        return len(pages)
+
+    async def sync_async(self, full: bool = False, on_page=None) -> int:
+        """Full crawl when requested or when there is no baseline; incremental otherwise.
+
+        ``on_page`` is called for every page (re-)fetched by this sync.
+        """
+        if full or self._full_crawl_pending or not self._sync_state["watermark"] or not self._cached_pages:
+            await self.fetch_all_async(on_page=on_page)
+            return len(self._cached_pages)
+        return await self.fetch_changed_async(on_page=on_page)
+
+    @property
+    def supports_async(self) -> bool:
+        return self._async_client is not None
@@ -0,0 +1,93 @@
+"""On-disk snapshot of rendered Notion pages for warm restarts."""
+
+from __future__ import annotations
+
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+
+from core.ai_support_bot.rag.notion_fetcher import NotionPage, _normalize_id
+
+logger = logging.getLogger("ai_support_bot.rag.page_store")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    norm_id TEXT PRIMARY KEY,
+    page_id TEXT NOT NULL,
+    title TEXT NOT NULL,
+    content TEXT NOT NULL,
+    url TEXT NOT NULL,
+    last_edited_time TEXT NOT NULL,
+    content_hash TEXT NOT NULL
+)
+"""
+
+
+class NotionPageStore:
+    """SQLite-backed snapshot of NotionPage objects keyed by normalized page ID.
+
+    Loaded once at startup so the index is usable without a crawl; full
+    crawls replace the snapshot and incremental syncs update it in place.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(_SCHEMA)
+        self._conn.commit()
+
+    def load_all(self) -> dict[str, NotionPage]:
+        """Return every stored page keyed by normalized page ID."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT norm_id, page_id, title, content, url, last_edited_time FROM pages"
+            ).fetchall()
+        pages = {
+            norm_id: NotionPage(id=page_id, title=title, content=content, url=url, last_edited_time=edited)
+            for norm_id, page_id, title, content, url, edited in rows
+        }
+        logger.info(f"Loaded {len(pages)} Notion pages from snapshot {self.path}")
+        return pages
+
+    def upsert(self, pages: list[NotionPage]) -> None:
+        """Insert or overwrite pages."""
+        if not pages:
+            return
+        rows = [
+            (_normalize_id(p.id), p.id, p.title, p.content, p.url, p.last_edited_time, p.content_hash)
+            for p in pages
+        ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO pages "
+                "(norm_id, page_id, title, content, url, last_edited_time, content_hash) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.commit()
+
+    def replace_all(self, pages: list[NotionPage]) -> None:
+        """Make the snapshot match ``pages`` exactly (after a full crawl)."""
+        keep = {_normalize_id(p.id) for p in pages}
+        with self._lock:
+            stale = [
+                (norm_id,)
+                for (norm_id,) in self._conn.execute("SELECT norm_id FROM pages").fetchall()
+                if norm_id not in keep
+            ]
+            self._conn.executemany("DELETE FROM pages WHERE norm_id = ?", stale)
+            self._conn.commit()
+        self.upsert(pages)
+
+    def size(self) -> int:
+        with self._lock:
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM pages").fetchone()
+        return int(count)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
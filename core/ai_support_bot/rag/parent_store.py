@@ -0,0 +1,161 @@
+"""SQLite-backed parent document store with an in-memory LRU of hot parents."""
+
+from __future__ import annotations
+
+import json
+import logging
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+try:
+    import zstandard
+    HAS_ZSTD = True
+except ImportError:
+    HAS_ZSTD = False
+
+logger = logging.getLogger("ai_support_bot.rag.parent_store")
+
+DEFAULT_CACHE_SIZE = 256
+DEFAULT_COMPRESS_MIN_BYTES = 4096  # Bodies at least this large are zstd-compressed
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS parents (
+    parent_id TEXT PRIMARY KEY,
+    body BLOB NOT NULL,
+    codec TEXT NOT NULL
+)
+"""
+
+
+class ParentStore:
+    """Parent documents keyed by parent ID, stored in SQLite (WAL).
+
+    - ``get`` is a primary-key lookup, served from an LRU of recently used parents
+    - ``put``/``delete`` are staged in memory and applied by ``commit`` in one
+      transaction, so a crash never leaves a half-written store; staged writes
+      are visible to ``get``/``ids`` immediately
+    - With the optional ``zstandard`` package, large bodies are stored compressed
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        cache_size: int = DEFAULT_CACHE_SIZE,
+        compress_min_bytes: int = DEFAULT_COMPRESS_MIN_BYTES,
+    ):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.cache_size = cache_size
+        self.compress_min_bytes = compress_min_bytes
+        self._lock = threading.Lock()
+        self._cache: OrderedDict[str, str] = OrderedDict()
+        self._pending: dict[str, str | None] = {}  # Staged writes; None stages a delete
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(_SCHEMA)
+        self._conn.commit()
+        self._compressor = zstandard.ZstdCompressor() if HAS_ZSTD else None
+        self._decompressor = zstandard.ZstdDecompressor() if HAS_ZSTD else None
+
+    def import_json(self, json_path: Path) -> int:
+        """One-off migration from the legacy parent_docs.json; returns parents imported."""
+        with open(json_path, encoding="utf-8") as f:
+            docs: dict[str, str] = json.load(f)
+        for parent_id, text in docs.items():
+            self.put(parent_id, text)
+        self.commit()
+        logger.info(f"Imported {len(docs)} parent documents from {json_path}")
+        return len(docs)
+
+    def _encode(self, text: str) -> tuple[bytes, str]:
+        raw = text.encode("utf-8")
+        if self._compressor is not None and len(raw) >= self.compress_min_bytes:
+            return self._compressor.compress(raw), "zstd"
+        return raw, "raw"
+
+    def _decode(self, body: bytes, codec: str) -> str:
+        if codec == "zstd":
+            if self._decompressor is None:
+                raise RuntimeError("Parent store contains zstd bodies but zstandard is not installed")
+            body = self._decompressor.decompress(body)
+        return body.decode("utf-8")
+
+    def _remember(self, parent_id: str, text: str) -> None:
+        self._cache[parent_id] = text
+        self._cache.move_to_end(parent_id)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def get(self, parent_id: str) -> str | None:
+        """Return a parent's full text, or None if unknown."""
+        with self._lock:
+            if parent_id in self._pending:
+                return self._pending[parent_id]
+            if parent_id in self._cache:
+                self._cache.move_to_end(parent_id)
+                return self._cache[parent_id]
+            row = self._conn.execute(
+                "SELECT body, codec FROM parents WHERE parent_id = ?", (parent_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            text = self._decode(*row)
+            self._remember(parent_id, text)
+            return text
+
+    def put(self, parent_id: str, text: str) -> None:
+        """Stage a parent for writing (applied by commit())."""
+        with self._lock:
+            self._pending[parent_id] = text
+
+    def delete(self, parent_id: str) -> None:
+        """Stage a parent for deletion (applied by commit())."""
+        with self._lock:
+            self._pending[parent_id] = None
+
+    def commit(self) -> None:
+        """Apply every staged write in a single transaction."""
+        with self._lock:
+            if not self._pending:
+                return
+            upserts = []
+            deletes = []
+            for parent_id, value in self._pending.items():
+                if value is None:
+                    deletes.append((parent_id,))
+                else:
+                    upserts.append((parent_id, *self._encode(value)))
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO parents (parent_id, body, codec) VALUES (?, ?, ?)", upserts
+                )
+                self._conn.executemany("DELETE FROM parents WHERE parent_id = ?", deletes)
+            for parent_id, value in self._pending.items():
+                if value is None:
+                    self._cache.pop(parent_id, None)
+                else:
+                    self._remember(parent_id, value)
+            self._pending.clear()
+
+    def rollback(self) -> None:
+        """Drop staged writes."""
+        with self._lock:
+            self._pending.clear()
+
+    def ids(self) -> list[str]:
+        """Return every parent ID (including staged writes)."""
+        with self._lock:
+            stored = [pid for (pid,) in self._conn.execute("SELECT parent_id FROM parents")]
+            deleted = {pid for pid, v in self._pending.items() if v is None}
+            ids = dict.fromkeys(pid for pid in stored if pid not in deleted)
+            ids.update(dict.fromkeys(pid for pid, v in self._pending.items() if v is not None))
+            return list(ids)
+
+    def __len__(self) -> int:
+        return len(self.ids())
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,66 @@
+"""In-memory LRU of retrieval results, scoped to one index version."""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from dataclasses import replace
+
+from core.ai_support_bot.rag.fusion import FusedHit
+
+DEFAULT_MAX_ENTRIES = 512
+
+
+class RetrievalCache:
+    """Maps a retrieval key to its ordered parent hits (documents not included).
+
+    Keys carry the index version they were computed against; the first lookup
+    under a new version drops every older entry, so ingestion invalidates the
+    cache just by bumping the version.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple, list[FusedHit]] = OrderedDict()
+        self._version: tuple | None = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _check_version(self, version: tuple) -> None:
+        if version != self._version:
+            self._entries.clear()
+            self._version = version
+
+    def get(self, version: tuple, key: tuple) -> list[FusedHit] | None:
+        """Cached hits for ``key`` (fresh copies without documents), or None."""
+        with self._lock:
+            self._check_version(version)
+            hits = self._entries.get(key)
+            if hits is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return [replace(hit, ranks=dict(hit.ranks)) for hit in hits]
+
+    def put(self, version: tuple, key: tuple, hits: list[FusedHit]) -> None:
+        if self.max_entries <= 0:
+            return
+        entry = [replace(hit, ranks=dict(hit.ranks), document="") for hit in hits]
+        with self._lock:
+            if version != self._version:
+                return  # Computed against an index that has since been replaced
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> int:
+        with self._lock:
+            count = len(self._entries)
+            self._entries.clear()
+            return count
@@ -2,133 +2,301 @@
 
 from __future__ import annotations
 
+import asyncio
 import logging
+import time
 from typing import TYPE_CHECKING
 
-try:
-    from rank_bm25 import BM25Okapi
-    from pythainlp.tokenize import word_tokenize
-    HAS_BM25 = True
-except ImportError:
-    HAS_BM25 = False
+from core.ai_support_bot.rag.bm25 import BM25Index, load_snapshot, save_snapshot
+from core.ai_support_bot.rag.filters import (
+    Filters,
+    QueryRouter,
+    describe_filters,
+    normalize_filters,
+)
+from core.ai_support_bot.rag.fusion import (
+    DEFAULT_RRF_K,
+    FusedHit,
+    aggregate_by_parent,
+    reciprocal_rank_fusion,
+)
+from core.ai_support_bot.rag.retrieval_cache import DEFAULT_MAX_ENTRIES, RetrievalCache
+from core.ai_support_bot.rag.search_executor import SearchExecutor
+from core.ai_support_bot.rag.tokenizer import HAS_PYTHAINLP as HAS_BM25
+from core.ai_support_bot.rag.tokenizer import TokenizationService, normalize_query
+from core.ai_support_bot.rag.vector_store import make_child_id
 
 if TYPE_CHECKING:
+    from core.ai_support_bot.ai.embedding import EmbeddingEngine
     from core.ai_support_bot.rag.notion_fetcher import NotionFetcher
     from core.ai_support_bot.rag.sheets_fetcher import SheetsFetcher
-    from core.ai_support_bot.ai.embedding import EmbeddingEngine
-    from core.ai_support_bot.rag.vector_store import VectorStore
+    from core.ai_support_bot.rag.vector_store import IndexVersion, VectorStore
 
 logger = logging.getLogger("ai_support_bot.rag.retriever")
 
 MAX_DISTANCE = 0.55  # Cosine distance threshold (0 = identical, 1 = orthogonal)
 # Tightened from 0.95 to 0.55 for better precision - only retrieve truly relevant chunks
+VECTOR = "vector"
+LEXICAL = "bm25"
 
 class ContextRetriever:
     """Hybrid retriever with Parent-Child chunk resolution.
     
     Search flow:
-    1. Vector search on CHILD chunks (precise paragraph-level)
-    2. BM25 keyword search on CHILD chunks (exact term matching)
-    3. Resolve matched children → unique PARENT documents
+    1. Vector search on CHILD chunks (precise paragraph-level) and, concurrently,
+       BM25 keyword search on CHILD chunks (exact term matching)
+    2. Fuse both child rankings with weighted Reciprocal Rank Fusion
+    3. Resolve fused children → unique PARENT documents (best child per parent)
     4. Return full parent documents as context
+
+    Both searches can be restricted to chunks matching metadata ``filters``
+    (e.g. ``{"source": "sheets"}``); with a ``router``, unfiltered queries get
+    filters picked from their keywords.
+
+    Results are cached per (normalized query, top_k, filters) for the current
+    index version, so a repeated query skips the embedding call and both
+    searches until ingestion changes the index.
     """
 
     def __init__(
         self,
-        embedding_engine: 'EmbeddingEngine' | None = None,
-        vector_store: 'VectorStore' | None = None,
-        notion_fetcher: 'NotionFetcher' | None = None,
-        sheets_fetcher: 'SheetsFetcher' | None = None,
+        embedding_engine: EmbeddingEngine | None = None,
+        vector_store: VectorStore | None = None,
+        notion_fetcher: NotionFetcher | None = None,
+        sheets_fetcher: SheetsFetcher | None = None,
+        tokenizer: TokenizationService | None = None,
+        executor: SearchExecutor | None = None,
+        rrf_k: int = DEFAULT_RRF_K,
+        fusion_weights: dict[str, float] | None = None,
+        router: QueryRouter | None = None,
+        retrieval_cache_size: int = DEFAULT_MAX_ENTRIES,
     ):
         self.embedding_engine = embedding_engine
         self.vector_store = vector_store
         self.notion_fetcher = notion_fetcher
         self.sheets_fetcher = sheets_fetcher
+        self.tokenizer = tokenizer or TokenizationService()
+        self.executor = executor or SearchExecutor()
+        self.rrf_k = rrf_k
+        self.fusion_weights = {VECTOR: 1.0, LEXICAL: 1.0, **(fusion_weights or {})}
+        self.router = router
+        self.retrieval_cache = RetrievalCache(retrieval_cache_size)
         
-        self.bm25: BM25Okapi | None = None
-        self.corpus_docs: list[str] = []
-        self.corpus_metas: list[dict] = []
+        self.bm25: BM25Index | None = None
+        self.bm25_version: str | None = None  # index_version the BM25 index reflects
         
         if HAS_BM25 and self.vector_store:
             self._rebuild_bm25_index()
 
+    @property
+    def bm25_snapshot_path(self):
+        """Directory of the persisted BM25 index, next to the vector index."""
+        return self.vector_store.persist_dir / f"bm25.{self.vector_store.collection_name}"
+
+    @property
+    def kb_version(self) -> tuple[str, str | None] | None:
+        """Version of the searchable knowledge base: (vector index, BM25 index)."""
+        if not self.vector_store:
+            return None
+        return self.vector_store.index_version, self.bm25_version
+
     def _rebuild_bm25_index(self):
-        """Rebuild BM25 index from all child chunks in ChromaDB."""
+        """Load the BM25 snapshot for the current index version, or rebuild it.
+
+        Rebuilding tokenizes every child chunk in the vector store and saves a
+        new snapshot tagged with the index version it was built from.
+        """
         try:
-            results = self.vector_store.collection.get(include=["documents", "metadatas"])
-            docs = results.get("documents", [])
-            metas = results.get("metadatas", [])
-            if not docs:
+            index_version = self.vector_store.index_version
+            loaded = load_snapshot(self.bm25_snapshot_path, index_version, expected_docs=self.vector_store.count())
+            if loaded is not None:
+                self.bm25, self.bm25_version = loaded, index_version
+                logger.info(f"Loaded BM25 snapshot with {len(loaded)} child chunks ({index_version}).")
                 return
-            
-            self.corpus_docs = docs
-            self.corpus_metas = metas if metas else [{}] * len(docs)
-            tokenized_corpus = [word_tokenize(doc, engine="newmm") for doc in docs]
-            self.bm25 = BM25Okapi(tokenized_corpus)
+
+            ids, docs, metas = self.vector_store.get_all_children()
+            tokenized_corpus = self.tokenizer.tokenize_corpus(docs)
+            self.bm25 = BM25Index(tokenized_corpus, keys=ids, metas=metas)
+            self.bm25_version = index_version
             logger.info(f"Built BM25 index with {len(docs)} child chunks.")
+            save_snapshot(self.bm25, self.bm25_snapshot_path, index_version)
         except Exception as e:
             logger.error(f"Failed to build BM25 index: {e}")
 
-    async def retrieve(self, query: str, top_k: int = 5) -> list[str]:
-        """Search children → resolve to unique parent documents."""
-        if not self.embedding_engine or not self.vector_store:
-            logger.warning("Vector search components not initialized.")
+    def update_bm25_index(
+        self,
+        base_version: str,
+        added_ids: list[str],
+        added_texts: list[str],
+        added_metas: list[dict],
+        removed_ids: list[str],
+        save: bool = True,
+    ):
+        """Apply child chunk changes (one sync, or one round of it) to the BM25 index.
+
+        Only the added chunks are tokenized. The updated index is built
+        copy-on-write and swapped in, so concurrent searches are unaffected.
+        Falls back to a full rebuild if the current index doesn't reflect
+        ``base_version`` (the index version the changes were written on).
+        With ``save=False`` the snapshot is left for a later call to write.
+        """
+        if not self.vector_store:
+            return
+        if self.bm25 is None or self.bm25_version != base_version:
+            self._rebuild_bm25_index()
+            return
+        try:
+            index_version = self.vector_store.index_version
+            tokenized = self.tokenizer.tokenize_corpus(added_texts)
+            self.bm25 = self.bm25.remove_documents(removed_ids).add_documents(added_ids, tokenized, added_metas)
+            self.bm25_version = index_version
+            logger.debug(f"Updated BM25 index: +{len(added_ids)} -{len(removed_ids)} child chunks")
+            if save:
+                logger.info(f"Saved BM25 index: {len(self.bm25)} child chunks, {len(self.bm25.segments)} segments.")
+                save_snapshot(self.bm25, self.bm25_snapshot_path, index_version)
+        except Exception as e:
+            logger.error(f"Failed to update BM25 index, rebuilding: {e}")
+            self._rebuild_bm25_index()
+
+    async def _vector_search(
+        self, index: IndexVersion, query: str, n_results: int, filters: Filters | None, timings: dict[str, float]
+    ) -> list[tuple[str, str]] | None:
+        """Ranked ``(child_id, parent_id)`` pairs within MAX_DISTANCE of the query (None if it failed)."""
+        if not self.embedding_engine:
             return []
-            
-        matched_parent_ids: dict[str, float] = {}  # parent_id → best score
-        
-        # 1. Vector Search on children
         try:
+            started = time.perf_counter()
             query_embeddings = await self.embedding_engine.embed([query])
-            if query_embeddings:
-                query_vector = query_embeddings[0]
-                results = self.vector_store.query(query_vector, n_results=top_k * 3)
-                
-                for doc, distance, meta in results:
-                    if distance > MAX_DISTANCE:
-                        continue
-                    parent_id = meta.get("parent_id", "")
-                    if parent_id:
-                        # Keep the best (lowest) distance per parent
-                        if parent_id not in matched_parent_ids or distance < matched_parent_ids[parent_id]:
-                            matched_parent_ids[parent_id] = distance
-                
-                logger.info(f"Vector search → {len(matched_parent_ids)} unique parents")
+            timings["embed"] = (time.perf_counter() - started) * 1000
+            self.executor.record("embed", timings["embed"] / 1000)
+            if not query_embeddings:
+                return []
+            results = await self.executor.run(
+                "vector", index.query, query_embeddings[0], n_results, filters, timings=timings
+            )
+            ranking = [
+                (make_child_id(meta["parent_id"], doc), meta["parent_id"])
+                for doc, distance, meta in results
+                if distance <= MAX_DISTANCE and meta.get("parent_id")
+            ]
+            logger.info(f"Vector search → {len(ranking)} child chunks")
+            return ranking
         except Exception as e:
             logger.error(f"Failed vector search: {e}")
-            
-        # 2. BM25 Keyword Search on children
-        if self.bm25 and HAS_BM25:
-            try:
-                if not self.corpus_docs:
-                    self._rebuild_bm25_index()
-                
-                if self.bm25:
-                    tokenized_query = word_tokenize(query, engine="newmm")
-                    scores = self.bm25.get_scores(tokenized_query)
-                    
-                    top_n = sorted(range(len(scores)), key=lambda i: scores[i], reverse=True)[:top_k * 2]
-                    bm25_added = 0
-                    for idx in top_n:
-                        if scores[idx] > 0 and idx < len(self.corpus_metas):
-                            parent_id = self.corpus_metas[idx].get("parent_id", "")
-                            if parent_id and parent_id not in matched_parent_ids:
-                                matched_parent_ids[parent_id] = 0.5  # Default relevance
-                                bm25_added += 1
-                    logger.info(f"BM25 search → added {bm25_added} new parents")
-            except Exception as e:
-                logger.error(f"Failed BM25 search: {e}")
-                
-        # 3. Resolve parent_ids → full parent documents
-        sorted_parents = sorted(matched_parent_ids.items(), key=lambda x: x[1])
-        
-        parent_docs = []
-        for parent_id, score in sorted_parents[:top_k * 2]:
-            full_doc = self.vector_store.get_parent(parent_id)
-            if full_doc:
-                parent_docs.append(full_doc)
-                title = full_doc.split('\n')[0] if '\n' in full_doc else full_doc[:50]
-                logger.info(f"  ✓ Parent '{title}' (best child dist: {score:.4f})")
-        
-        logger.info(f"Total: {len(parent_docs)} unique parent docs for: {query[:50]}")
-        return parent_docs
+            return None
+
+    async def _lexical_search(
+        self, query: str, n_results: int, filters: Filters | None, timings: dict[str, float]
+    ) -> list[tuple[str, str]] | None:
+        """Ranked ``(child_id, parent_id)`` pairs with a positive BM25 score (None if it failed)."""
+        bm25 = self.bm25  # Updates swap in a new index; keep using this one
+        if not bm25 or not HAS_BM25:
+            return []
+        try:
+            tokenized_query = await self.executor.run("tokenize", self.tokenizer.tokenize_query, query, timings=timings)
+            hits = await self.executor.run("bm25", bm25.search, tokenized_query, n_results, filters, timings=timings)
+            ranking = [
+                (bm25.key(slot), parent_id)
+                for slot, _ in hits
+                if (parent_id := bm25.meta(slot).get("parent_id", ""))
+            ]
+            logger.info(f"BM25 search → {len(ranking)} child chunks")
+            return ranking
+        except Exception as e:
+            logger.error(f"Failed BM25 search: {e}")
+            return None
+
+    async def search(self, query: str, top_k: int = 5, filters: dict | None = None) -> list[FusedHit]:
+        """Hybrid search returning fused parent hits with their documents.
+
+        Vector and BM25 search run concurrently, so latency is the slower of
+        the two rather than their sum. Each hit records the rank every
+        retriever gave it (``hit.ranks``). Vector search, query tokenization,
+        BM25 scoring and parent lookups run on ``self.executor``; the event
+        loop only awaits them.
+
+        ``filters`` restricts both searches to matching chunks (``{}`` searches
+        everything). When omitted, ``self.router`` may pick them; a routed
+        search that finds nothing is retried unfiltered.
+        """
+        if not self.embedding_engine or not self.vector_store:
+            logger.warning("Vector search components not initialized.")
+            return []
+
+        router = self.router if filters is None else None
+        routed = router is not None
+        resolved = router.route(query) if router is not None else normalize_filters(filters)
+        version = (self.vector_store.index_version, self.bm25_version)  # See kb_version
+        cache_key = (normalize_query(query), top_k, "auto" if routed else describe_filters(resolved))
+
+        # Pin one index version so a blue/green swap can't change it mid-query
+        with self.vector_store.reading() as index:
+            cached = self.retrieval_cache.get(version, cache_key)
+            if cached is not None:
+                return await self._resolve_cached(index, query, cached)
+
+            hits, complete = await self._search(index, query, top_k, resolved)
+            if routed and resolved and not hits:
+                logger.info(f"No results within routed filter {describe_filters(resolved)}; searching everything")
+                hits, complete = await self._search(index, query, top_k, None)
+        if complete and hits:
+            self.retrieval_cache.put(version, cache_key, hits)
+        return hits
+
+    async def _resolve_cached(self, index: IndexVersion, query: str, hits: list[FusedHit]) -> list[FusedHit]:
+        """Attach current parent documents to cached hits."""
+        started = time.perf_counter()
+        documents = await self.executor.run("parents", lambda: [index.get_parent(hit.parent_id) for hit in hits])
+        resolved = []
+        for hit, document in zip(hits, documents, strict=True):
+            if document:
+                hit.document = document
+                resolved.append(hit)
+        self.executor.record("search[cached]", time.perf_counter() - started)
+        logger.info(f"Retrieval cache hit: {len(resolved)} parent docs for: {query[:50]}")
+        return resolved
+
+    async def _search(
+        self, index: IndexVersion, query: str, top_k: int, filters: Filters | None
+    ) -> tuple[list[FusedHit], bool]:
+        """One hybrid search on a pinned version; also returns whether both searches succeeded."""
+        timings: dict[str, float] = {}  # stage → wall time in ms
+        started = time.perf_counter()
+
+        vector_ranking, lexical_ranking = await asyncio.gather(
+            self._vector_search(index, query, top_k * 3, filters, timings),
+            self._lexical_search(query, top_k * 2, filters, timings),
+        )
+        complete = vector_ranking is not None and lexical_ranking is not None
+        fused = reciprocal_rank_fusion(
+            {VECTOR: vector_ranking or [], LEXICAL: lexical_ranking or []}, self.fusion_weights, self.rrf_k
+        )
+        candidates = aggregate_by_parent(fused)[:top_k * 2]
+
+        # Resolve parent_ids → full parent documents
+        documents = await self.executor.run(
+            "parents", lambda: [index.get_parent(hit.parent_id) for hit in candidates], timings=timings
+        )
+
+        hits = []
+        for hit, document in zip(candidates, documents, strict=True):
+            if document:
+                hit.document = document
+                hits.append(hit)
+                title = document.split('\n')[0] if '\n' in document else document[:50]
+                logger.info(f"  ✓ Parent '{title}' (rrf {hit.score:.4f} via {'+'.join(hit.sources)})")
+
+        timings["total"] = (time.perf_counter() - started) * 1000
+        label = describe_filters(filters)
+        self.executor.record(f"search[{label}]", timings["total"] / 1000)
+        logger.info(f"Total: {len(hits)} unique parent docs for: {query[:50]}")
+        logger.info(
+            f"Retrieval timings [{label}]: "
+            + " ".join(f"{stage}={ms:.1f}ms" for stage, ms in timings.items())
+            + f" (search queue depth {self.executor.queue_depth})"
+        )
+        return hits, complete
+
+    async def retrieve(self, query: str, top_k: int = 5, filters: dict | None = None) -> list[str]:
+        """Search children → resolve to unique parent documents."""
+        return [hit.document for hit in await self.search(query, top_k, filters)]
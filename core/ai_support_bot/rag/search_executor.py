@@ -0,0 +1,125 @@
+"""Dedicated thread pool for blocking retrieval work (vector search, BM25, parent lookups)."""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any
+
+DEFAULT_WORKERS = 4
+
+
+@dataclass
+class StageTiming:
+    """Running totals for one retrieval stage."""
+    calls: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+
+    def record(self, seconds: float) -> None:
+        self.calls += 1
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+
+    @property
+    def mean_ms(self) -> float:
+        return self.total_seconds / self.calls * 1000 if self.calls else 0.0
+
+
+@dataclass
+class SearchExecutorStats:
+    """Per-stage run times plus queue depth and queue wait of the executor."""
+    stages: dict[str, StageTiming] = field(default_factory=dict)
+    queue_wait: StageTiming = field(default_factory=StageTiming)
+    queued: int = 0
+    running: int = 0
+    max_queued: int = 0
+
+    def summary(self) -> str:
+        per_stage = " ".join(
+            f"{name}={t.mean_ms:.1f}ms(max {t.max_seconds * 1000:.1f})"
+            for name, t in sorted(self.stages.items())
+        )
+        return (
+            f"{per_stage} queue_wait={self.queue_wait.mean_ms:.1f}ms "
+            f"queued={self.queued} running={self.running} max_queued={self.max_queued}"
+        )
+
+
+class SearchExecutor:
+    """Runs blocking search stages on a sized thread pool, off the event loop.
+
+    Chroma's HNSW search, the NumPy matmuls behind the exact and BM25 scorers
+    and SQLite parent lookups all release the GIL, so a small pool keeps
+    several queries in flight while the discord.py loop stays responsive.
+    ``stats`` accumulates run time per stage and how long jobs waited for a
+    free worker.
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_WORKERS):
+        self.max_workers = max_workers
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="search")
+        self._lock = threading.Lock()
+        self.stats = SearchExecutorStats()
+
+    @property
+    def queue_depth(self) -> int:
+        """Jobs submitted but not yet picked up by a worker."""
+        return self.stats.queued
+
+    def record(self, stage: str, seconds: float) -> None:
+        """Add a timing for a stage that ran elsewhere (e.g. the awaited embedding call)."""
+        with self._lock:
+            self.stats.stages.setdefault(stage, StageTiming()).record(seconds)
+
+    async def run(
+        self,
+        stage: str,
+        fn: Callable[..., Any],
+        *args: Any,
+        timings: dict[str, float] | None = None,
+    ) -> Any:
+        """Run ``fn(*args)`` on the pool as ``stage``.
+
+        If ``timings`` is given, the stage's wall time in milliseconds
+        (queue wait included) is stored under ``stage``.
+        """
+        submitted = time.perf_counter()
+        dequeued = False  # Set by whichever of job() / the cancel path takes it off the queue
+        with self._lock:
+            self.stats.queued += 1
+            self.stats.max_queued = max(self.stats.max_queued, self.stats.queued)
+
+        def job():
+            nonlocal dequeued
+            began = time.perf_counter()
+            with self._lock:
+                if not dequeued:
+                    dequeued = True
+                    self.stats.queued -= 1
+                self.stats.running += 1
+                self.stats.queue_wait.record(began - submitted)
+            try:
+                return fn(*args)
+            finally:
+                elapsed = time.perf_counter() - began
+                with self._lock:
+                    self.stats.running -= 1
+                    self.stats.stages.setdefault(stage, StageTiming()).record(elapsed)
+
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._pool, job)
+        finally:
+            with self._lock:
+                if not dequeued:  # Cancelled before a worker picked it up
+                    dequeued = True
+                    self.stats.queued -= 1
+            if timings is not None:
+                timings[stage] = (time.perf_counter() - submitted) * 1000
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -2,8 +2,10 @@
 
 from __future__ import annotations
 
+import hashlib
 import logging
-from dataclasses import dataclass
+import threading
+from dataclasses import dataclass, field
 
 logger = logging.getLogger("ai_support_bot.rag.sheets")
 
@@ -15,10 +17,21 @@ class SheetRow:
     text: str
     sheet_name: str
     row_number: int
+    spreadsheet_id: str = ""
+    key: str = ""  # Stable row identity (key column values or content hash)
+    key_label: str = ""  # Human-readable key, set only when derived from key columns
 
     @property
     def title(self) -> str:
-        """Return sheet name as title for compatibility with retriever."""
+        """Return sheet name as title for compatibility with retriever.
+
+        Keyed rows are titled by their key rather than their row number, so
+        inserting a row above them doesn't change their title (and text).
+        """
+        if self.key_label:
+            return f"{self.sheet_name} - {self.key_label}"
+        if self.key:
+            return self.sheet_name
         return f"{self.sheet_name} - Row {self.row_number}"
     
     @property
@@ -30,6 +43,85 @@ class SheetRow:
         return self.text
 
 
+def _quote_sheet_name(sheet_name: str) -> str:
+    """Quote a tab name for use in an A1 range (e.g. 'รับออเดอร์ (V5)')."""
+    return "'" + sheet_name.replace("'", "''") + "'"
+
+
+def _row_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+@dataclass
+class SheetDelta:
+    """Row-level changes of one sheet since the previous sync."""
+    sheet_name: str
+    inserted: list[SheetRow] = field(default_factory=list)
+    updated: list[SheetRow] = field(default_factory=list)
+    deleted: list[str] = field(default_factory=list)  # Row IDs
+    unchanged: int = 0
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.inserted or self.updated or self.deleted)
+
+    def summary(self) -> str:
+        return (
+            f"{self.sheet_name}: +{len(self.inserted)} ~{len(self.updated)} "
+            f"-{len(self.deleted)} ={self.unchanged}"
+        )
+
+
+def _rows_from_values(
+    values: list[list[str]],
+    spreadsheet_id: str,
+    sheet_name: str,
+    key_columns: list[str] | None = None,
+) -> list[SheetRow]:
+    """Convert a values grid (first row = headers) into SheetRow objects.
+
+    Each row gets a stable key: the values of the first configured key
+    columns present in the headers, or a hash of the row text when the sheet
+    has none (or the key cells are empty). Duplicate keys get a ``~N`` suffix.
+    Row IDs include the spreadsheet ID, since tab names repeat across
+    spreadsheets.
+    """
+    if not values:
+        return []
+
+    # First row = headers
+    headers = values[0]
+    key_indexes = [headers.index(c) for c in (key_columns or []) if c in headers]
+    seen_keys: dict[str, int] = {}
+    rows: list[SheetRow] = []
+
+    for i, row_data in enumerate(values[1:], start=2):
+        # Pad row to match headers length
+        padded = row_data + [""] * (len(headers) - len(row_data))
+        # Convert to "header: value" pairs
+        pairs = [f"{h}: {v}" for h, v in zip(headers, padded, strict=False) if v]
+        text = " | ".join(pairs)
+
+        if text.strip():
+            key_label = " / ".join(padded[k].strip() for k in key_indexes if padded[k].strip())
+            key = key_label or _row_hash(text)
+            seen_keys[key] = seen_keys.get(key, 0) + 1
+            if seen_keys[key] > 1:
+                key = f"{key}~{seen_keys[key]}"
+            rows.append(
+                SheetRow(
+                    id=f"sheets_{spreadsheet_id}_{sheet_name}_{key}",
+                    text=text,
+                    sheet_name=sheet_name,
+                    row_number=i,
+                    spreadsheet_id=spreadsheet_id,
+                    key=key,
+                    key_label=key_label,
+                )
+            )
+    return rows
+
+
 class SheetsFetcher:
     """Fetches data from Google Sheets and converts rows to plain text.
 
@@ -38,17 +130,29 @@ class SheetsFetcher:
         spreadsheet_id: The ID of the target spreadsheet.
     """
 
-    def __init__(self, credentials):
+    def __init__(self, credentials, key_columns: list[str] | None = None):
         self._credentials = credentials
         self._service = None
-        self._cached_rows = []
+        self._local = threading.local()  # googleapiclient services are not thread-safe
+        # (spreadsheet ID, sheet name) -> rows from its latest fetch (replaced, never appended to)
+        self._cached_sheets: dict[tuple[str, str], list[SheetRow]] = {}
+        self.key_columns = key_columns or []
+        # (spreadsheet ID, sheet name) -> {row ID: row hash} as of the previous sync
+        self._row_hashes: dict[tuple[str, str], dict[str, str]] = {}
+        self._row_hashes_lock = threading.Lock()
+
+    @property
+    def _cached_rows(self) -> list[SheetRow]:
+        """Rows from the latest fetch of every sheet."""
+        return [row for rows in self._cached_sheets.values() for row in rows]
 
     @classmethod
-    def from_base64_sa(cls, base64_sa: str):
+    def from_base64_sa(cls, base64_sa: str, key_columns: list[str] | None = None):
         """Create fetcher from base64-encoded service account JSON.
         
         Args:
             base64_sa: Base64-encoded service account JSON string.
+            key_columns: Header names identifying a row (see _rows_from_values).
             
         Returns:
             SheetsFetcher instance.
@@ -67,22 +171,36 @@ class SheetsFetcher:
             scopes=['https://www.googleapis.com/auth/spreadsheets.readonly']
         )
         
-        return cls(credentials)
+        return cls(credentials, key_columns=key_columns)
 
     def _get_service(self):
-        """Lazy-initialize the Sheets API service."""
-        if self._service is None:
+        """Lazy-initialize the Sheets API service (one per thread)."""
+        if self._service is not None:
+            return self._service
+        service = getattr(self._local, "service", None)
+        if service is None:
             from googleapiclient.discovery import build
-            self._service = build("sheets", "v4", credentials=self._credentials)
-        return self._service
+            service = build("sheets", "v4", credentials=self._credentials)
+            self._local.service = service
+        return service
+
+    def _sheet_titles(self, spreadsheet_id: str) -> list[str]:
+        """Tab titles of a spreadsheet (titles-only field mask); API errors propagate."""
+        spreadsheet = self._get_service().spreadsheets().get(
+            spreadsheetId=spreadsheet_id,
+            fields="sheets.properties.title",
+        ).execute()
+        sheets = spreadsheet.get("sheets", [])
+        return [s.get("properties", {}).get("title", "Sheet1") for s in sheets]
 
     def get_sheet_names(self, spreadsheet_id: str) -> list[str]:
-        """Fetch all sheet (tab) names from a spreadsheet."""
-        service = self._get_service()
+        """Fetch all sheet (tab) names from a spreadsheet ([] on API errors).
+
+        Only the tab titles are requested (field mask), not the full
+        spreadsheet metadata.
+        """
         try:
-            spreadsheet = service.spreadsheets().get(spreadsheetId=spreadsheet_id).execute()
-            sheets = spreadsheet.get("sheets", [])
-            return [s.get("properties", {}).get("title", "Sheet1") for s in sheets]
+            return self._sheet_titles(spreadsheet_id)
         except Exception as e:
             logger.error(f"Failed to list sheets for {spreadsheet_id}: {e}")
             return []
@@ -112,36 +230,10 @@ class SheetsFetcher:
             logger.error(f"Failed to fetch sheet '{sheet_name}': {e}")
             return []
 
-        values = result.get("values", [])
-        if not values:
-            return []
-
-        # First row = headers
-        headers = values[0]
-        rows: list[SheetRow] = []
-
-        for i, row_data in enumerate(values[1:], start=2):
-            # Pad row to match headers length
-            padded = row_data + [""] * (len(headers) - len(row_data))
-            # Convert to "header: value" pairs
-            pairs = [f"{h}: {v}" for h, v in zip(headers, padded, strict=False) if v]
-            text = " | ".join(pairs)
-
-            if text.strip():
-                rows.append(
-                    SheetRow(
-                        id=f"sheets_{sheet_name}_row{i}",
-                        text=text,
-                        sheet_name=sheet_name,
-                        row_number=i,
-                    )
-                )
-
+        rows = _rows_from_values(result.get("values", []), spreadsheet_id, sheet_name, self.key_columns)
         logger.info(f"Fetched {len(rows)} rows from sheet '{sheet_name}'")
         
-        # Cache the rows
-        self._cached_rows.extend(rows)
-        
+        self._cached_sheets[(spreadsheet_id, sheet_name)] = rows
         return rows
 
     def fetch_sheet_as_markdown_table(self, spreadsheet_id: str, sheet_name: str, range_notation: str = "") -> str:
@@ -187,6 +279,94 @@ class SheetsFetcher:
         logger.info(f"Converted sheet '{sheet_name}' to Markdown table ({len(values)-1} rows)")
         return markdown_table
 
+    def fetch_spreadsheet_rows(
+        self,
+        spreadsheet_id: str,
+        sheet_whitelist: list[str] | None = None,
+    ) -> dict[str, list[SheetRow]]:
+        """Fetch every (whitelisted) tab of a spreadsheet in two round trips.
+
+        One titles-only metadata call, then a single values.batchGet for all
+        wanted tabs.
+
+        Args:
+            spreadsheet_id: The spreadsheet ID to fetch from.
+            sheet_whitelist: Tab names to include; None/empty means all tabs.
+
+        Returns:
+            {sheet_name: rows} in tab order.
+
+        Raises:
+            Exception: API errors (e.g. 403/429/503) are logged and re-raised,
+                so a failed fetch is never mistaken for an empty spreadsheet.
+        """
+        try:
+            titles = self._sheet_titles(spreadsheet_id)
+        except Exception as e:
+            logger.error(f"Failed to list sheets for {spreadsheet_id}: {e}")
+            raise
+        sheet_names = [name for name in titles if not sheet_whitelist or name in sheet_whitelist]
+        if not sheet_names:
+            return {}
+
+        service = self._get_service()
+        try:
+            result = (
+                service.spreadsheets()
+                .values()
+                .batchGet(
+                    spreadsheetId=spreadsheet_id,
+                    ranges=[_quote_sheet_name(name) for name in sheet_names],
+                    majorDimension="ROWS",
+                    fields="valueRanges(values)",
+                )
+                .execute()
+            )
+        except Exception as e:
+            logger.error(f"Failed to batch-fetch sheets {sheet_names} from {spreadsheet_id}: {e}")
+            raise
+
+        # valueRanges come back in the same order as the requested ranges
+        rows_by_sheet: dict[str, list[SheetRow]] = {}
+        for name, value_range in zip(sheet_names, result.get("valueRanges", []), strict=False):
+            rows = _rows_from_values(value_range.get("values", []), spreadsheet_id, name, self.key_columns)
+            rows_by_sheet[name] = rows
+            self._cached_sheets[(spreadsheet_id, name)] = rows
+            logger.info(f"Fetched {len(rows)} rows from sheet '{name}'")
+        return rows_by_sheet
+
+    def has_baseline(self, spreadsheet_id: str, sheet_name: str) -> bool:
+        """Whether a previous sync recorded row hashes for this sheet."""
+        with self._row_hashes_lock:
+            return (spreadsheet_id, sheet_name) in self._row_hashes
+
+    def diff_rows(self, spreadsheet_id: str, sheet_name: str, rows: list[SheetRow]) -> SheetDelta:
+        """Compare rows to the row-hash table recorded by the last commit_rows().
+
+        Without a recorded baseline every row counts as inserted.
+        """
+        delta = SheetDelta(sheet_name)
+        with self._row_hashes_lock:
+            previous = dict(self._row_hashes.get((spreadsheet_id, sheet_name), {}))
+        current_ids = set()
+        for row in rows:
+            current_ids.add(row.id)
+            old_hash = previous.get(row.id)
+            if old_hash is None:
+                delta.inserted.append(row)
+            elif old_hash != _row_hash(row.text):
+                delta.updated.append(row)
+            else:
+                delta.unchanged += 1
+        delta.deleted = [row_id for row_id in previous if row_id not in current_ids]
+        return delta
+
+    def commit_rows(self, spreadsheet_id: str, sheet_name: str, rows: list[SheetRow]) -> None:
+        """Record rows as the sheet's baseline once they are indexed."""
+        table = {row.id: _row_hash(row.text) for row in rows}
+        with self._row_hashes_lock:
+            self._row_hashes[(spreadsheet_id, sheet_name)] = table
+
     def fetch_all_rows(self, spreadsheet_id: str, sheet_names: list[str]) -> list[SheetRow]:
         """Fetch rows from multiple sheets."""
         all_rows: list[SheetRow] = []
@@ -0,0 +1,132 @@
+"""Thai word tokenization (pythainlp newmm) for the BM25 index and queries."""
+
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import os
+import threading
+import unicodedata
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    from pythainlp.tokenize import word_tokenize
+    HAS_PYTHAINLP = True
+except ImportError:
+    HAS_PYTHAINLP = False
+
+logger = logging.getLogger("ai_support_bot.rag.tokenizer")
+
+DEFAULT_ENGINE = "newmm"
+DEFAULT_CHUNK_SIZE = 256  # Documents per process-pool task
+DEFAULT_QUERY_CACHE_SIZE = 1024
+WARMUP_TEXT = "ทดสอบการตัดคำภาษาไทย"  # Forces pythainlp to load the newmm dictionary trie
+
+
+def normalize_query(query: str) -> str:
+    """Cache key / tokenizer input for a query: NFC, trimmed, whitespace collapsed."""
+    return " ".join(unicodedata.normalize("NFC", query).split())
+
+
+def _warm_worker(engine: str) -> None:
+    word_tokenize(WARMUP_TEXT, engine=engine)
+
+
+def _tokenize_batch(texts: list[str], engine: str) -> list[list[str]]:
+    return [word_tokenize(text, engine=engine) for text in texts]
+
+
+class TokenizationService:
+    """Tokenizes corpora in a process pool and memoizes query tokens.
+
+    - ``tokenize_corpus`` runs small batches inline and fans large ones out
+      over a ``ProcessPoolExecutor`` in chunks of ``chunk_size`` documents
+      (newmm is pure Python, so threads would serialize on the GIL)
+    - ``tokenize_query`` keeps an LRU of recent normalized queries
+    - ``start_warmup`` loads the newmm dictionary in the background (and in
+      each pool worker as it starts) so the first query doesn't pay for it
+    """
+
+    def __init__(
+        self,
+        processes: int = 0,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        query_cache_size: int = DEFAULT_QUERY_CACHE_SIZE,
+        engine: str = DEFAULT_ENGINE,
+    ):
+        self.processes = processes or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.query_cache_size = query_cache_size
+        self.engine = engine
+        self._pool: ProcessPoolExecutor | None = None
+        self._pool_lock = threading.Lock()
+        self._cache: OrderedDict[str, tuple[str, ...]] = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self.query_hits = 0
+        self.query_misses = 0
+
+    def start_warmup(self) -> threading.Thread:
+        """Load the tokenizer dictionary on a background thread."""
+        thread = threading.Thread(target=self._warmup, name="tokenizer-warmup", daemon=True)
+        thread.start()
+        return thread
+
+    def _warmup(self) -> None:
+        try:
+            _warm_worker(self.engine)
+            logger.info(f"Tokenizer '{self.engine}' warmed up")
+        except Exception as e:
+            logger.error(f"Tokenizer warmup failed: {e}")
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                # Never fork: the bot process runs threads (discord, to_thread
+                # workers, warmup), and a forked child can inherit a held lock
+                method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.processes,
+                    mp_context=multiprocessing.get_context(method),
+                    initializer=_warm_worker,
+                    initargs=(self.engine,),
+                )
+            return self._pool
+
+    def tokenize_corpus(self, texts: list[str]) -> list[list[str]]:
+        """Tokenize documents, in parallel when there are more than two chunks' worth."""
+        if self.processes <= 1 or len(texts) <= 2 * self.chunk_size:
+            return _tokenize_batch(texts, self.engine)
+        chunks = [texts[start:start + self.chunk_size] for start in range(0, len(texts), self.chunk_size)]
+        try:
+            results = self._get_pool().map(_tokenize_batch, chunks, [self.engine] * len(chunks))
+            return [tokens for chunk in results for tokens in chunk]
+        except Exception as e:
+            logger.error(f"Parallel tokenization failed, tokenizing inline: {e}")
+            return _tokenize_batch(texts, self.engine)
+
+    def tokenize_query(self, query: str) -> tuple[str, ...]:
+        """Tokenize a query, memoized on its normalized form.
+
+        Returns a tuple so callers can't mutate the cached tokens.
+        """
+        key = normalize_query(query)
+        with self._cache_lock:
+            tokens = self._cache.get(key)
+            if tokens is not None:
+                self._cache.move_to_end(key)
+                self.query_hits += 1
+                return tokens
+            self.query_misses += 1
+        tokens = tuple(word_tokenize(key, engine=self.engine))
+        with self._cache_lock:
+            self._cache[key] = tokens
+            while len(self._cache) > self.query_cache_size:
+                self._cache.popitem(last=False)
+        return tokens
+
+    def close(self) -> None:
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(cancel_futures=True)
+                self._pool = None
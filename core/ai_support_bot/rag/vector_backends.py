@@ -0,0 +1,605 @@
+"""Storage/search engines behind VectorStore: ChromaDB and in-process NumPy."""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import shutil
+import threading
+from abc import ABC, abstractmethod
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+
+from core.ai_support_bot.rag.filters import Filters, SecondaryIndex, matches, to_chroma_where
+
+logger = logging.getLogger("ai_support_bot.rag.vector_backends")
+
+DEFAULT_MAX_BATCH = 5000  # Used when the Chroma client can't report its limit
+PARENT_FILTER_BATCH = 500  # Parent IDs per metadata ($in) filter
+MAX_SEGMENTS = 8  # NumPy segments before they are compacted into one
+MAX_DELETED_FRACTION = 0.25  # Tombstoned rows before a compaction
+
+BACKENDS = ("chroma", "numpy")
+QUANTIZATIONS = ("none", "float16", "int8")  # First-pass scan precision of the NumPy backend
+RESCORE_FACTOR = 10  # First-pass candidates per requested result, re-scored at full precision
+SCAN_BLOCK = 256  # Rows widened to float32 at a time during a quantized scan (stays in cache)
+
+
+def _chunks(items: list, size: int):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class VectorBackend(ABC):
+    """Child-chunk storage + nearest-neighbour search for one index version.
+
+    Distances are cosine distances (0 = identical), whatever the engine.
+    """
+
+    @abstractmethod
+    def upsert(self, ids: list[str], texts: list[str], embeddings: list[list[float]], metadatas: list[dict]):
+        """Insert or overwrite chunks by ID."""
+
+    @abstractmethod
+    def delete(self, ids: list[str]):
+        """Delete chunks by ID (unknown IDs are ignored)."""
+
+    @abstractmethod
+    def get_metadatas(self) -> dict[str, dict]:
+        """Return {child_id: metadata} for every chunk."""
+
+    @abstractmethod
+    def get_documents(self) -> tuple[list[str], list[str], list[dict]]:
+        """Return (ids, texts, metadatas) for every chunk."""
+
+    @abstractmethod
+    def get_ids_by_parent(self, parent_ids: list[str]) -> dict[str, set[str]]:
+        """Return {parent_id: child IDs} for the given parents (absent if none)."""
+
+    @abstractmethod
+    def count(self) -> int:
+        """Number of chunks."""
+
+    @abstractmethod
+    def query(
+        self, query_embedding: list[float], n_results: int, filters: Filters | None = None
+    ) -> list[tuple[str, float, dict]]:
+        """Return up to n_results (text, distance, metadata), nearest first.
+
+        With ``filters`` (see ``filters.normalize_filters``) only matching chunks are searched.
+        """
+
+    @abstractmethod
+    def flush(self):
+        """Persist buffered writes."""
+
+    @abstractmethod
+    def drop(self):
+        """Delete the version's data."""
+
+
+class ChromaBackend(VectorBackend):
+    """HNSW search in a persistent ChromaDB collection."""
+
+    def __init__(self, client, name: str):
+        self.client = client
+        self.name = name
+        self.collection = client.get_or_create_collection(name=name, metadata={"hnsw:space": "cosine"})
+        try:
+            self.max_batch_size = client.get_max_batch_size()
+        except Exception:
+            self.max_batch_size = DEFAULT_MAX_BATCH
+
+    def upsert(self, ids, texts, embeddings, metadatas):
+        for start in range(0, len(ids), self.max_batch_size):
+            end = start + self.max_batch_size
+            self.collection.upsert(
+                ids=ids[start:end],
+                documents=texts[start:end],
+                embeddings=embeddings[start:end],
+                metadatas=metadatas[start:end]
+            )
+
+    def delete(self, ids):
+        for batch in _chunks(list(ids), self.max_batch_size):
+            self.collection.delete(ids=batch)
+
+    def get_metadatas(self):
+        results = self.collection.get(include=["metadatas"])
+        ids = results.get("ids", [])
+        metas = results.get("metadatas") or [{}] * len(ids)
+        return {child_id: (meta or {}) for child_id, meta in zip(ids, metas, strict=True)}
+
+    def get_documents(self):
+        results = self.collection.get(include=["documents", "metadatas"])
+        docs = results.get("documents") or []
+        metas = results.get("metadatas") or [{}] * len(docs)
+        return results.get("ids", []), docs, [meta or {} for meta in metas]
+
+    def get_ids_by_parent(self, parent_ids):
+        children: dict[str, set[str]] = {}
+        for batch in _chunks(list(parent_ids), PARENT_FILTER_BATCH):
+            results = self.collection.get(where={"parent_id": {"$in": batch}}, include=["metadatas"])
+            ids = results.get("ids", [])
+            metas = results.get("metadatas") or [{}] * len(ids)
+            for child_id, meta in zip(ids, metas, strict=True):
+                children.setdefault((meta or {}).get("parent_id", ""), set()).add(child_id)
+        return children
+
+    def count(self):
+        return self.collection.count()
+
+    def query(self, query_embedding, n_results, filters=None):
+        count = self.collection.count()
+        if count == 0:
+            return []
+
+        results = self.collection.query(
+            query_embeddings=[query_embedding],
+            n_results=min(n_results, count),
+            where=to_chroma_where(filters),
+            include=["documents", "distances", "metadatas"]
+        )
+
+        matched = []
+        if results and results.get("documents") and results["documents"][0]:
+            docs = results["documents"][0]
+            distances = results["distances"][0]
+            metas = results["metadatas"][0] if results.get("metadatas") else [{}] * len(docs)
+
+            for doc, dist, meta in zip(docs, distances, metas, strict=True):
+                matched.append((doc, dist, meta))
+
+        return matched
+
+    def flush(self):
+        pass  # Chroma writes through
+
+    def drop(self):
+        try:
+            self.client.delete_collection(name=self.name)
+        except Exception as e:
+            logger.error(f"Failed to drop collection '{self.name}': {e}")
+
+
+class _ScanCopy:
+    """Compact in-memory copy of a segment matrix for the first-pass scan.
+
+    With ``dims`` only the first ``dims`` components of each row are kept and
+    re-normalized (Matryoshka-trained embeddings such as text-embedding-3 put
+    most of the signal there). ``float16`` halves the float32 size; ``int8``
+    stores each row as codes in [-127, 127] with one float32 scale per row
+    (row ≈ codes * scale).
+    """
+
+    def __init__(self, matrix: np.ndarray, kind: str, dims: int = 0):
+        self.kind = kind
+        self.dims = dims
+        if dims:
+            matrix = np.asarray(matrix[:, :dims], dtype=np.float32)
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            matrix = matrix / np.where(norms == 0, 1.0, norms)
+        if kind == "none":
+            self.codes = np.ascontiguousarray(matrix, dtype=np.float32)
+            self.scales = None
+        elif kind == "float16":
+            self.codes = np.asarray(matrix, dtype=np.float16)
+            self.scales = None
+        else:
+            matrix = np.asarray(matrix, dtype=np.float32)
+            max_abs = np.abs(matrix).max(axis=1) if len(matrix) else np.zeros(0, dtype=np.float32)
+            self.scales = np.where(max_abs == 0, 1.0, max_abs / 127.0).astype(np.float32)
+            self.codes = np.rint(matrix / self.scales[:, None]).astype(np.int8)
+
+    @property
+    def nbytes(self) -> int:
+        return self.codes.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+
+    def scores(self, q: np.ndarray, rows: np.ndarray | None = None) -> np.ndarray:
+        """Approximate dot products with ``q`` for ``rows`` (all rows if None)."""
+        if self.dims:
+            q = q[:self.dims]
+        if self.kind == "none":
+            exact: np.ndarray = self.codes @ q if rows is None else self.codes[rows] @ q
+            return exact
+        n = len(self.codes) if rows is None else len(rows)
+        out = np.empty(n, dtype=np.float32)
+        buffer = np.empty((SCAN_BLOCK, self.codes.shape[1]), dtype=np.float32)
+        for start in range(0, n, SCAN_BLOCK):
+            end = min(start + SCAN_BLOCK, n)
+            block_rows = slice(start, end) if rows is None else rows[start:end]
+            block = buffer[:end - start]
+            block[...] = self.codes[block_rows]
+            out[start:end] = block @ q
+            if self.scales is not None:
+                out[start:end] *= self.scales[block_rows]
+        return out
+
+
+class _Segment:
+    """One immutable block of rows: a (memory-mapped) matrix plus row data."""
+
+    def __init__(self, name: str, matrix: np.ndarray, ids: list[str], docs: list[str], metas: list[dict]):
+        self.name = name
+        self.matrix = matrix
+        self.ids = ids
+        self.docs = docs
+        self.metas = metas
+        self.live = np.ones(len(ids), dtype=bool)  # Writer-owned; queries read the published copy
+        self.scan: _ScanCopy | None = None  # Set when the backend scans a compact copy
+        self._secondary: SecondaryIndex | None = None
+
+    @property
+    def secondary(self) -> SecondaryIndex:
+        """Metadata value → rows, built on the first filtered query."""
+        if self._secondary is None:
+            self._secondary = SecondaryIndex(self.metas)
+        return self._secondary
+
+
+@dataclass(frozen=True)
+class _View:
+    """What one query reads: the segments with a copy of their live masks, plus the live tail rows.
+
+    The tail lists are only ever appended to (``flush`` starts new ones), so
+    the rows listed in ``tail_rows`` stay valid while writers carry on.
+    """
+    segments: tuple[_Segment, ...] = ()
+    live: tuple[np.ndarray, ...] = ()
+    tail_ids: Sequence[str] = ()
+    tail_docs: Sequence[str] = ()
+    tail_metas: Sequence[dict] = ()
+    tail_vectors: Sequence[np.ndarray] = ()
+    tail_rows: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.int64))
+    count: int = 0
+
+
+class NumpyBackend(VectorBackend):
+    """Exact cosine search over an L2-normalized float32 matrix.
+
+    Rows live in append-only segments (``seg-<n>.npy`` memory-mapped on load,
+    plus ``seg-<n>.json`` with IDs/texts/metadata); ``manifest.json`` lists the
+    segments and tombstoned rows. Writes go to an in-memory tail that ``flush``
+    turns into a new segment; segments are compacted when there are too many
+    or too many rows are deleted. A query is one matmul per segment plus an
+    ``argpartition`` over the scores; a filtered query multiplies only the
+    rows its segment's secondary index selects.
+
+    With ``quantization`` set to ``float16`` or ``int8``, and/or ``coarse_dims``
+    set (e.g. 256), the scan runs over a compact in-memory copy of each
+    segment instead (quantized and/or truncated to the leading dimensions),
+    and the best ``rescore_factor * n_results`` candidates are re-scored with
+    the full float32 vectors from the memory-mapped matrix (see
+    scripts/benchmark_quantization.py and scripts/benchmark_coarse_search.py).
+
+    Writes are serialized by a lock and end by publishing a new immutable
+    ``_View``; queries read whichever view was current when they started, so
+    a delta sync can write to the version that is serving queries.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        quantization: str = "none",
+        coarse_dims: int = 0,
+        rescore_factor: int = RESCORE_FACTOR,
+    ):
+        if quantization not in QUANTIZATIONS:
+            raise ValueError(f"Unknown quantization '{quantization}' (expected one of {', '.join(QUANTIZATIONS)})")
+        self.quantization = quantization
+        self.coarse_dims = coarse_dims
+        self.rescore_factor = rescore_factor
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.manifest_path = self.path / "manifest.json"
+        self._lock = threading.Lock()  # Serializes writers; readers never take it
+        self._view = _View()
+        self._segments: list[_Segment] = []
+        self._next_segment = 1
+        self._where: dict[str, tuple[int, int]] = {}  # id -> (segment index, row); -1 = tail
+        self._tail_ids: list[str] = []
+        self._tail_docs: list[str] = []
+        self._tail_metas: list[dict] = []
+        self._tail_vectors: list[np.ndarray] = []
+        self._tail_live: list[bool] = []
+        self._dirty = False
+        self._retired: list[Path] = []  # Files of compacted segments not deleted yet
+        self._load()
+        self._publish()
+
+    @property
+    def segments(self) -> tuple[_Segment, ...]:
+        return self._view.segments
+
+    def _publish(self):
+        """Swap in a view of the current writer state (call with the lock held)."""
+        self._view = _View(
+            segments=tuple(self._segments),
+            live=tuple(segment.live.copy() for segment in self._segments),
+            tail_ids=self._tail_ids,
+            tail_docs=self._tail_docs,
+            tail_metas=self._tail_metas,
+            tail_vectors=self._tail_vectors,
+            tail_rows=np.flatnonzero(np.asarray(self._tail_live, dtype=bool)),
+            count=len(self._where),
+        )
+
+    # ─── Persistence ──────────────────────────────────────────────────
+
+    def _load(self):
+        if not self.manifest_path.exists():
+            return
+        manifest = json.loads(self.manifest_path.read_text(encoding="utf-8"))
+        self._next_segment = manifest.get("next_segment", 1)
+        deleted = {tuple(pair) for pair in manifest.get("deleted", [])}
+        for name in manifest.get("segments", []):
+            matrix = np.load(self.path / f"{name}.npy", mmap_mode="r")
+            rows = json.loads((self.path / f"{name}.json").read_text(encoding="utf-8"))
+            segment = self._with_scan_copy(_Segment(name, matrix, rows["ids"], rows["docs"], rows["metas"]))
+            seg_index = len(self._segments)
+            for row, child_id in enumerate(segment.ids):
+                if (name, row) in deleted:
+                    segment.live[row] = False
+                else:
+                    self._where[child_id] = (seg_index, row)
+            self._segments.append(segment)
+
+    def _write_segment(self, ids, docs, metas, matrix: np.ndarray) -> _Segment:
+        name = f"seg-{self._next_segment:05d}"
+        self._next_segment += 1
+        np.save(self.path / f"{name}.npy", matrix.astype(np.float32, copy=False))
+        (self.path / f"{name}.json").write_text(
+            json.dumps({"ids": ids, "docs": docs, "metas": metas}, ensure_ascii=False), encoding="utf-8"
+        )
+        return self._with_scan_copy(_Segment(name, np.load(self.path / f"{name}.npy", mmap_mode="r"), ids, docs, metas))
+
+    @property
+    def two_stage(self) -> bool:
+        """Whether queries scan compact copies and re-score a shortlist."""
+        return self.quantization != "none" or self.coarse_dims > 0
+
+    def _with_scan_copy(self, segment: _Segment) -> _Segment:
+        dims = self.coarse_dims if 0 < self.coarse_dims < segment.matrix.shape[1] else 0
+        if self.quantization != "none" or dims:
+            segment.scan = _ScanCopy(segment.matrix, self.quantization, dims)
+        return segment
+
+    @property
+    def scan_nbytes(self) -> int:
+        """Bytes of vector data a full scan reads (scan copies, or the float32 matrices)."""
+        view = self._view
+        return int(sum(
+            segment.scan.nbytes if segment.scan is not None else segment.matrix.nbytes
+            for segment in view.segments
+        ) + sum(view.tail_vectors[row].nbytes for row in view.tail_rows))
+
+    def _write_manifest(self):
+        deleted = [
+            [segment.name, int(row)]
+            for segment in self._segments
+            for row in np.flatnonzero(~segment.live)
+        ]
+        tmp_path = self.manifest_path.with_suffix(".json.tmp")
+        tmp_path.write_text(json.dumps({
+            "segments": [segment.name for segment in self._segments],
+            "deleted": deleted,
+            "next_segment": self._next_segment,
+        }), encoding="utf-8")
+        os.replace(tmp_path, self.manifest_path)
+
+    def flush(self):
+        with self._lock:
+            self._remove_retired()
+            if not self._dirty:
+                return
+            live_tail = [i for i, live in enumerate(self._tail_live) if live]
+            if live_tail:
+                segment = self._write_segment(
+                    [self._tail_ids[i] for i in live_tail],
+                    [self._tail_docs[i] for i in live_tail],
+                    [self._tail_metas[i] for i in live_tail],
+                    np.stack([self._tail_vectors[i] for i in live_tail]),
+                )
+                seg_index = len(self._segments)
+                self._segments.append(segment)
+                for row, child_id in enumerate(segment.ids):
+                    self._where[child_id] = (seg_index, row)
+            # New lists, not clear(): published views still read the old ones
+            self._tail_ids, self._tail_docs, self._tail_metas = [], [], []
+            self._tail_vectors, self._tail_live = [], []
+
+            total = sum(len(segment.ids) for segment in self._segments)
+            deleted = sum(int((~segment.live).sum()) for segment in self._segments)
+            if len(self._segments) > MAX_SEGMENTS or (total and deleted / total > MAX_DELETED_FRACTION):
+                self._compact()
+            else:
+                self._write_manifest()
+                self._publish()
+            self._dirty = False
+
+    def _remove_retired(self):
+        """Delete files of compacted segments (retried later where an open memory map blocks it)."""
+        pending = []
+        for file in self._retired:
+            try:
+                file.unlink(missing_ok=True)
+            except OSError:
+                pending.append(file)
+        self._retired = pending
+
+    def _compact(self):
+        """Rewrite all live rows into a single segment."""
+        old_segments = self._segments
+        ids, docs, metas, blocks = [], [], [], []
+        for segment in old_segments:
+            rows = np.flatnonzero(segment.live)
+            ids.extend(segment.ids[r] for r in rows)
+            docs.extend(segment.docs[r] for r in rows)
+            metas.extend(segment.metas[r] for r in rows)
+            blocks.append(np.asarray(segment.matrix[rows]))
+        self._segments = []
+        self._where = {}
+        if ids:
+            segment = self._write_segment(ids, docs, metas, np.concatenate(blocks))
+            self._segments.append(segment)
+            self._where = {child_id: (0, row) for row, child_id in enumerate(ids)}
+        self._write_manifest()
+        self._publish()
+        # Queries that started earlier may still read the old memory maps. POSIX keeps
+        # unlinked files readable while mapped; elsewhere the unlink fails and is retried.
+        for segment in old_segments:
+            self._retired += [self.path / f"{segment.name}.npy", self.path / f"{segment.name}.json"]
+        self._remove_retired()
+        logger.debug(f"Compacted {len(old_segments)} segments into {len(self._segments)}")
+
+    # ─── Writes ───────────────────────────────────────────────────────
+
+    def _forget(self, child_id: str):
+        where = self._where.pop(child_id, None)
+        if where is None:
+            return
+        seg_index, row = where
+        if seg_index == -1:
+            self._tail_live[row] = False
+        else:
+            self._segments[seg_index].live[row] = False
+
+    def upsert(self, ids, texts, embeddings, metadatas):
+        if not ids:
+            return
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms == 0, 1.0, norms)
+        with self._lock:
+            for child_id, text, vector, meta in zip(ids, texts, vectors, metadatas, strict=True):
+                self._forget(child_id)
+                self._where[child_id] = (-1, len(self._tail_ids))
+                self._tail_ids.append(child_id)
+                self._tail_docs.append(text)
+                self._tail_metas.append(meta or {})
+                self._tail_vectors.append(vector)
+                self._tail_live.append(True)
+            self._dirty = True
+            self._publish()
+
+    def delete(self, ids):
+        with self._lock:
+            for child_id in ids:
+                self._forget(child_id)
+            self._dirty = True
+            self._publish()
+
+    # ─── Reads ────────────────────────────────────────────────────────
+
+    @staticmethod
+    def _rows(view: _View):
+        """Yield (id, text, metadata) for every live row of ``view``."""
+        for segment, live in zip(view.segments, view.live, strict=True):
+            for row in np.flatnonzero(live):
+                yield segment.ids[row], segment.docs[row], segment.metas[row]
+        for row in view.tail_rows:
+            yield view.tail_ids[row], view.tail_docs[row], view.tail_metas[row]
+
+    def get_metadatas(self):
+        return {child_id: meta for child_id, _, meta in self._rows(self._view)}
+
+    def get_documents(self):
+        rows = list(self._rows(self._view))
+        return [child_id for child_id, _, _ in rows], [doc for _, doc, _ in rows], [meta for _, _, meta in rows]
+
+    def get_ids_by_parent(self, parent_ids):
+        wanted = set(parent_ids)
+        children: dict[str, set[str]] = {}
+        for child_id, _, meta in self._rows(self._view):
+            parent_id = meta.get("parent_id", "")
+            if parent_id in wanted:
+                children.setdefault(parent_id, set()).add(child_id)
+        return children
+
+    def count(self):
+        return self._view.count
+
+    @staticmethod
+    def _candidates(view: _View, q: np.ndarray, filters: Filters | None):
+        """Yield (block, rows, scores) for the live rows passing ``filters``; block -1 is the tail.
+
+        Segment scores are approximate when the segment has a scan copy.
+        """
+        for seg_index, (segment, live) in enumerate(zip(view.segments, view.live, strict=True)):
+            if filters:
+                rows = segment.secondary.rows(filters)
+                rows = rows[live[rows]]
+                if not len(rows):
+                    continue
+                if segment.scan is not None:
+                    yield seg_index, rows, segment.scan.scores(q, rows)
+                else:
+                    yield seg_index, rows, np.asarray(segment.matrix[rows]) @ q
+            else:
+                rows = np.flatnonzero(live)
+                if segment.scan is not None:
+                    yield seg_index, rows, segment.scan.scores(q)[rows]
+                else:
+                    yield seg_index, rows, (segment.matrix @ q)[rows]
+        rows = np.asarray(
+            [row for row in view.tail_rows if matches(view.tail_metas[row], filters)], dtype=np.int64
+        )
+        if len(rows):
+            yield -1, rows, np.stack([view.tail_vectors[row] for row in rows]) @ q
+
+    def query(self, query_embedding, n_results, filters=None):
+        view = self._view  # One snapshot for the whole query, whatever writers do meanwhile
+        if not view.count or n_results <= 0:
+            return []
+        q = np.asarray(query_embedding, dtype=np.float32)
+        q = q / (np.linalg.norm(q) or 1.0)
+
+        parts = list(self._candidates(view, q, filters))
+        if not parts:
+            return []
+        blocks = np.concatenate([np.full(len(rows), block) for block, rows, _ in parts])
+        rows = np.concatenate([rows for _, rows, _ in parts])
+        scores = np.concatenate([scores for _, _, scores in parts])
+
+        if self.two_stage:
+            blocks, rows, scores = self._rescore(view, q, blocks, rows, scores, n_results * self.rescore_factor)
+
+        k = min(n_results, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k] if k < len(scores) else np.arange(len(scores))
+        top = top[np.argsort(-scores[top])]
+
+        matched = []
+        for i in top:
+            block, row = int(blocks[i]), int(rows[i])
+            if block >= 0:
+                segment = view.segments[block]
+                doc, meta = segment.docs[row], segment.metas[row]
+            else:
+                doc, meta = view.tail_docs[row], view.tail_metas[row]
+            matched.append((doc, float(1.0 - scores[i]), meta))
+        return matched
+
+    @staticmethod
+    def _rescore(view: _View, q, blocks, rows, scores, n_candidates):
+        """Keep the best ``n_candidates`` first-pass hits and re-score them with the full vectors."""
+        if n_candidates < len(scores):
+            keep = np.argpartition(-scores, n_candidates - 1)[:n_candidates]
+            blocks, rows, scores = blocks[keep], rows[keep], scores[keep]
+        for seg_index in np.unique(blocks[blocks >= 0]):
+            picked = np.flatnonzero(blocks == seg_index)
+            order = np.argsort(rows[picked])  # Ascending rows read the memory map sequentially
+            picked = picked[order]
+            scores[picked] = np.asarray(view.segments[seg_index].matrix[rows[picked]]) @ q
+        return blocks, rows, scores
+
+    def drop(self):
+        with self._lock:
+            self._segments, self._where = [], {}
+            self._tail_ids, self._tail_docs, self._tail_metas = [], [], []
+            self._tail_vectors, self._tail_live = [], []
+            self._publish()
+            shutil.rmtree(self.path, ignore_errors=True)
@@ -1,123 +1,456 @@
-"""Vector database manager using ChromaDB for Parent-Child semantic search."""
+"""Vector database manager for Parent-Child semantic search (ChromaDB or NumPy)."""
 
 from __future__ import annotations
 
+import hashlib
 import json
 import logging
-import uuid
+import os
+import shutil
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
 from pathlib import Path
 
 import chromadb
 
+from core.ai_support_bot.rag.filters import normalize_filters
+from core.ai_support_bot.rag.parent_store import DEFAULT_CACHE_SIZE, ParentStore
+from core.ai_support_bot.rag.vector_backends import (
+    BACKENDS,
+    QUANTIZATIONS,
+    ChromaBackend,
+    NumpyBackend,
+    VectorBackend,
+)
+
 logger = logging.getLogger("ai_support_bot.rag.vector_store")
 
+POINTER_FILE = "index_pointer.json"
+
+
+def make_child_id(parent_id: str, child_text: str) -> str:
+    """Deterministic child chunk ID: parent ID + hash of the chunk text."""
+    return f"{parent_id}#{hashlib.sha256(child_text.encode('utf-8')).hexdigest()[:32]}"
+
+
+class IndexVersion:
+    """One generation of the index: a vector backend plus its parent store.
+
+    Version 0 uses the legacy collection name (``collection_name``) and
+    ``parent_docs.sqlite3``, importing a pre-existing ``parent_docs.json`` once;
+    rebuilds create ``<name>__v<N>`` / ``parent_docs.<name>.v<N>.sqlite3``.
+    The ``numpy`` backend keeps its vectors in ``vectors.<collection>/``.
+    """
+
+    def __init__(
+        self,
+        client,
+        collection_name: str,
+        persist_dir: Path,
+        version: int,
+        parent_cache_size: int = DEFAULT_CACHE_SIZE,
+        backend: str = "chroma",
+        quantization: str = "none",
+        coarse_dims: int = 0,
+    ):
+        self.version = version
+        self.collection_name = collection_name if version == 0 else f"{collection_name}__v{version}"
+        if backend == "numpy":
+            self.vectors: VectorBackend = NumpyBackend(
+                persist_dir / f"vectors.{self.collection_name}", quantization=quantization, coarse_dims=coarse_dims
+            )
+        else:
+            self.vectors = ChromaBackend(client, self.collection_name)
+        # Parent document store
+        suffix = "" if version == 0 else f".{collection_name}.v{version}"
+        self.parent_store_path = persist_dir / f"parent_docs{suffix}.sqlite3"
+        is_new = not self.parent_store_path.exists()
+        self.parent_store = ParentStore(self.parent_store_path, cache_size=parent_cache_size)
+        legacy_json = persist_dir / "parent_docs.json"
+        if version == 0 and is_new and legacy_json.exists():
+            self._migrate_legacy_json(legacy_json)
+        self.readers = 0
+        self.retired = False
+
+    @property
+    def collection(self):
+        """Chroma collection (None for the numpy backend)."""
+        return getattr(self.vectors, "collection", None)
+
+    def _migrate_legacy_json(self, json_path: Path):
+        try:
+            self.parent_store.import_json(json_path)
+            os.replace(json_path, json_path.with_suffix(".json.migrated"))
+        except Exception as e:
+            logger.error(f"Failed to migrate parent docs from {json_path}: {e}")
+
+    def save_parent_docs(self):
+        """Persist buffered vectors and commit staged parent writes in one transaction."""
+        try:
+            self.vectors.flush()
+        except Exception as e:
+            logger.error(f"Failed to flush vectors: {e}")
+        try:
+            self.parent_store.commit()
+        except Exception as e:
+            logger.error(f"Failed to save parent docs: {e}")
+
+    def add_parent_document(self, parent_id: str, full_text: str):
+        """Stage a full parent document (call save_parent_docs() after batch)."""
+        self.parent_store.put(parent_id, full_text)
+
+    def remove_parent_document(self, parent_id: str):
+        """Stage a parent document removal (call save_parent_docs() after batch)."""
+        self.parent_store.delete(parent_id)
+
+    def list_parent_ids(self) -> list[str]:
+        """Return the IDs of all stored parent documents."""
+        return self.parent_store.ids()
+
+    def get_parent(self, parent_id: str) -> str | None:
+        """Retrieve the full parent document by its ID."""
+        return self.parent_store.get(parent_id)
+
+    def upsert_children(
+        self,
+        ids: list[str],
+        texts: list[str],
+        embeddings: list[list[float]],
+        metadatas: list[dict],
+    ):
+        """Insert or overwrite child chunks under caller-supplied (deterministic) IDs."""
+        if not ids:
+            return
+        self.vectors.upsert(ids, texts, embeddings, metadatas)
+        logger.debug(f"Upserted {len(ids)} child chunks to vector store.")
+
+    def count(self) -> int:
+        """Number of child chunks."""
+        return self.vectors.count()
+
+    def get_indexed_children(self) -> dict[str, dict]:
+        """Return {child_id: metadata} for every child chunk in the index."""
+        return self.vectors.get_metadatas()
+
+    def get_all_children(self) -> tuple[list[str], list[str], list[dict]]:
+        """Return (ids, texts, metadatas) for every child chunk in the index."""
+        return self.vectors.get_documents()
+
+    def get_ids_by_parent(self, parent_ids: list[str]) -> dict[str, set[str]]:
+        """Return {parent_id: child IDs} for the given parents (absent if none)."""
+        return self.vectors.get_ids_by_parent(parent_ids)
+
+    def delete_children(self, ids: list[str]):
+        """Delete child chunks by ID."""
+        if not ids:
+            return
+        self.vectors.delete(ids)
+        logger.debug(f"Deleted {len(ids)} child chunks from vector store.")
+
+    def delete_by_parent(self, parent_ids: list[str]) -> list[str]:
+        """Delete every child chunk of the given parents; returns the deleted child IDs."""
+        child_ids = [cid for ids in self.get_ids_by_parent(parent_ids).values() for cid in ids]
+        self.delete_children(child_ids)
+        return child_ids
+
+    def query(
+        self, query_embedding: list[float], n_results: int = 5, filters: dict | None = None
+    ) -> list[tuple[str, float, dict]]:
+        """Query for most similar child chunks, optionally only those matching ``filters``.
+
+        Returns:
+            List of tuples: (child_text, distance, metadata)
+        """
+        return self.vectors.query(query_embedding, n_results, normalize_filters(filters))
+
 
 class VectorStore:
-    """Manages ChromaDB with Parent-Child architecture.
-    
-    - 'children' collection: Small chunks used for precise vector search
-    - 'parent_docs' dict: Full parent documents mapped by parent_id
+    """Manages the vector index with Parent-Child architecture.
+
+    - children: Small chunks used for precise vector search, held by a
+      VectorBackend (``chroma``: HNSW in ChromaDB; ``numpy``: exact search over
+      a memory-mapped matrix, faster up to ~10k chunks; see
+      scripts/benchmark_vector_backends.py)
+    - parent store: Full parent documents mapped by parent_id (SQLite, see ParentStore)
+
+    Full rebuilds are blue/green: ``begin_rebuild()`` returns an empty shadow
+    IndexVersion, ``commit_rebuild()`` validates it and atomically repoints
+    ``index_pointer.json`` at it. Readers pin a version with ``reading()``; a
+    replaced version is deleted once its last reader is done.
     """
-    
-    def __init__(self, persist_dir: str = "./chroma_db", collection_name: str = "sokeber_knowledge"):
+
+    def __init__(
+        self,
+        persist_dir: str = "./chroma_db",
+        collection_name: str = "sokeber_knowledge",
+        parent_cache_size: int = DEFAULT_CACHE_SIZE,
+        backend: str = "chroma",
+        quantization: str = "none",
+        coarse_dims: int = 0,
+    ):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown vector backend '{backend}' (expected one of {', '.join(BACKENDS)})")
+        if quantization not in QUANTIZATIONS:
+            raise ValueError(f"Unknown quantization '{quantization}' (expected one of {', '.join(QUANTIZATIONS)})")
         self.persist_dir = Path(persist_dir)
         self.persist_dir.mkdir(parents=True, exist_ok=True)
-        self.client = chromadb.PersistentClient(path=str(self.persist_dir))
+        self.backend = backend
+        self.quantization = quantization  # First-pass scan precision (numpy backend only)
+        self.coarse_dims = coarse_dims  # First-pass scan dimensions, 0 = all (numpy backend only)
+        self.client = chromadb.PersistentClient(path=str(self.persist_dir)) if backend == "chroma" else None
         self.collection_name = collection_name
-        self.collection = self.client.get_or_create_collection(
-            name=collection_name,
-            metadata={"hnsw:space": "cosine"}
+        self.parent_cache_size = parent_cache_size
+        self.pointer_path = self.persist_dir / POINTER_FILE
+        self._lock = threading.Lock()
+
+        pointer = self._load_pointer()
+        self._revision: int = pointer.get("revision", 0)
+        self._active = self._open_version(pointer.get("version", 0))
+        self._drop_orphaned_versions()
+        logger.info(
+            f"Initialized VectorStore at {persist_dir} (Backend: {backend}, "
+            f"Collection: {self._active.collection_name}, "
+            f"Parents: {len(self._active.parent_store)})"
         )
-        # Parent document store
-        self.parent_docs_path = self.persist_dir / "parent_docs.json"
-        self.parent_docs: dict[str, str] = self._load_parent_docs()
-        logger.info(f"Initialized VectorStore at {persist_dir} (Collection: {collection_name}, Parents: {len(self.parent_docs)})")
 
-    def _load_parent_docs(self) -> dict[str, str]:
-        """Load parent documents from disk."""
-        if self.parent_docs_path.exists():
+    # ─── Version pointer ──────────────────────────────────────────────
+
+    def _load_pointer(self) -> dict:
+        if self.pointer_path.exists():
             try:
-                with open(self.parent_docs_path, "r", encoding="utf-8") as f:
-                    return json.load(f)
+                pointer: dict = json.loads(self.pointer_path.read_text(encoding="utf-8"))
+                return pointer
             except Exception as e:
-                logger.error(f"Failed to load parent docs: {e}")
+                logger.error(f"Failed to load index pointer: {e}")
         return {}
 
-    def _save_parent_docs(self):
-        """Save parent documents to disk."""
+    def _save_pointer(self):
+        tmp_path = self.pointer_path.with_suffix(".json.tmp")
+        tmp_path.write_text(
+            json.dumps({"version": self._active.version, "revision": self._revision}),
+            encoding="utf-8",
+        )
+        os.replace(tmp_path, self.pointer_path)
+
+    def _open_version(self, version: int) -> IndexVersion:
+        return IndexVersion(
+            self.client, self.collection_name, self.persist_dir, version, self.parent_cache_size, self.backend,
+            self.quantization, self.coarse_dims,
+        )
+
+    def _version_names(self) -> list[str]:
+        prefix = f"{self.collection_name}__v"
+        if self.client is None:  # numpy backend
+            names = [p.name[len("vectors."):] for p in self.persist_dir.glob("vectors.*") if p.is_dir()]
+        else:
+            names = [str(getattr(c, "name", c)) for c in self.client.list_collections()]
+        return [n for n in names if n == self.collection_name or n.startswith(prefix)]
+
+    def _drop_orphaned_versions(self):
+        """Delete versions left behind by a crash mid-rebuild or before GC."""
+        for name in self._version_names():
+            if name != self._active.collection_name:
+                self._drop_collection(name)
+        stale_paths = list(self.persist_dir.glob(f"parent_docs.{self.collection_name}.v*.sqlite3"))
+        if self._active.version != 0:
+            stale_paths.append(self.persist_dir / "parent_docs.sqlite3")
+        for path in stale_paths:
+            if path != self._active.parent_store_path:
+                self._unlink_sqlite(path)
+
+    def _drop_collection(self, name: str):
         try:
-            with open(self.parent_docs_path, "w", encoding="utf-8") as f:
-                json.dump(self.parent_docs, f, ensure_ascii=False, indent=2)
+            if self.client is None:  # numpy backend
+                shutil.rmtree(self.persist_dir / f"vectors.{name}")
+            else:
+                self.client.delete_collection(name=name)
+            logger.info(f"Dropped retired index collection '{name}'")
         except Exception as e:
-            logger.error(f"Failed to save parent docs: {e}")
+            logger.error(f"Failed to drop index collection '{name}': {e}")
 
-    def reset_collection(self):
-        """Delete and recreate the collection. Used for full refresh (!sync)."""
+    @staticmethod
+    def _unlink_sqlite(path: Path):
+        for suffix in ("", "-wal", "-shm"):
+            Path(f"{path}{suffix}").unlink(missing_ok=True)
+
+    def _drop_version(self, index: IndexVersion):
+        index.vectors.drop()
+        index.parent_store.close()
+        self._unlink_sqlite(index.parent_store_path)
+
+    @property
+    def index_version(self) -> str:
+        """Identifier of the index contents; changes on every committed write or swap."""
+        return f"v{self._active.version}.r{self._revision}"
+
+    @property
+    def collection(self):
+        """Chroma collection of the active version (None for the numpy backend)."""
+        return self._active.collection
+
+    # ─── Readers ──────────────────────────────────────────────────────
+
+    @contextmanager
+    def reading(self) -> Iterator[IndexVersion]:
+        """Pin the active IndexVersion for the duration of a query."""
+        with self._lock:
+            index = self._active
+            index.readers += 1
         try:
-            self.client.delete_collection(name=self.collection_name)
-        except ValueError:
-            pass
-        
-        self.collection = self.client.get_or_create_collection(
-            name=self.collection_name,
-            metadata={"hnsw:space": "cosine"}
-        )
-        self.parent_docs = {}
-        if self.parent_docs_path.exists():
-            self.parent_docs_path.unlink()
+            yield index
+        finally:
+            with self._lock:
+                index.readers -= 1
+                drop = index.retired and index.readers == 0
+            if drop:
+                self._drop_version(index)
+
+    # ─── Blue/green rebuilds ──────────────────────────────────────────
+
+    def begin_rebuild(self) -> IndexVersion:
+        """Create an empty shadow version to build a full index into."""
+        existing = [
+            int(name.rsplit("__v", 1)[1]) for name in self._version_names()
+            if name.rsplit("__v", 1)[-1].isdigit() and name != self.collection_name
+        ]
+        version = max([self._active.version, *existing]) + 1
+        shadow = self._open_version(version)
+        logger.info(f"Building shadow index '{shadow.collection_name}'")
+        return shadow
+
+    def commit_rebuild(self, shadow: IndexVersion, expected_children: int | None = None):
+        """Validate a shadow version and atomically make it the active one.
+
+        Raises:
+            ValueError: If the shadow is empty or is missing children; the
+                active version is left untouched (call abort_rebuild()).
+        """
+        shadow.vectors.flush()
+        count = shadow.count()
+        parents = len(shadow.list_parent_ids())
+        if count == 0 or not parents or (
+            expected_children is not None and count != expected_children
+        ):
+            raise ValueError(
+                f"Shadow index failed validation ({count} children, "
+                f"{parents} parents, expected {expected_children} children)"
+            )
+        shadow.save_parent_docs()
+        self._swap(shadow)
+
+    def abort_rebuild(self, shadow: IndexVersion):
+        """Discard a shadow version."""
+        self._drop_version(shadow)
+        logger.warning(f"Discarded shadow index '{shadow.collection_name}'")
+
+    def _swap(self, index: IndexVersion):
+        with self._lock:
+            old, self._active = self._active, index
+            self._revision += 1
+            self._save_pointer()
+            old.retired = True
+            drop = old.readers == 0
+        logger.info(f"Swapped active index to '{index.collection_name}' ({self.index_version})")
+        if drop:
+            self._drop_version(old)
+
+    @contextmanager
+    def reset_collection(self, expected_children: int | None = None) -> Iterator[IndexVersion]:
+        """Rebuild the collection from scratch without readers ever seeing it empty.
+
+        Yields an empty shadow IndexVersion to fill; it is committed (see
+        commit_rebuild()) when the block exits, or discarded if the block
+        raises or validation fails, leaving the active version serving.
+        """
+        shadow = self.begin_rebuild()
+        try:
+            yield shadow
+            self.commit_rebuild(shadow, expected_children)
+        except BaseException:
+            self.abort_rebuild(shadow)
+            raise
         logger.info(f"Reset VectorStore collection '{self.collection_name}'")
 
+    # ─── Active-version operations ────────────────────────────────────
+
     def add_parent_document(self, parent_id: str, full_text: str):
-        """Store a full parent document in memory (call save_parent_docs() after batch)."""
-        self.parent_docs[parent_id] = full_text
+        """Stage a full parent document (call save_parent_docs() after batch)."""
+        self._active.add_parent_document(parent_id, full_text)
 
     def save_parent_docs(self):
-        """Persist all parent documents to disk. Call once after a batch of add_parent_document()."""
-        self._save_parent_docs()
+        """Commit staged parent writes. Call once after a batch of add_parent_document()."""
+        self._active.save_parent_docs()
+        with self._lock:
+            self._revision += 1
+            self._save_pointer()
+
+    def remove_parent_document(self, parent_id: str):
+        """Stage a parent document removal (call save_parent_docs() after batch)."""
+        self._active.remove_parent_document(parent_id)
+
+    def list_parent_ids(self) -> list[str]:
+        """Return the IDs of all stored parent documents."""
+        return self._active.list_parent_ids()
 
     def add_documents(self, texts: list[str], embeddings: list[list[float]], metadatas: list[dict]):
-        """Add child chunks with their embeddings and metadata (including parent_id)."""
+        """Add child chunks with their embeddings and metadata (including parent_id).
+
+        IDs are derived from each chunk's parent_id and text (see make_child_id),
+        so re-adding the same chunk overwrites it instead of duplicating it.
+        """
         if not texts:
             return
-            
-        ids = [str(uuid.uuid4()) for _ in texts]
-        
-        self.collection.add(
-            ids=ids,
-            documents=texts,
-            embeddings=embeddings,
-            metadatas=metadatas
-        )
-        logger.debug(f"Added {len(texts)} child chunks to vector store.")
 
-    def query(self, query_embedding: list[float], n_results: int = 5) -> list[tuple[str, float, dict]]:
-        """Query for most similar child chunks.
-        
+        ids = [make_child_id(meta.get("parent_id", "doc"), text) for text, meta in zip(texts, metadatas, strict=True)]
+        self._active.upsert_children(ids, texts, embeddings, metadatas)
+
+    def upsert_children(
+        self,
+        ids: list[str],
+        texts: list[str],
+        embeddings: list[list[float]],
+        metadatas: list[dict],
+    ):
+        """Insert or overwrite child chunks under caller-supplied (deterministic) IDs."""
+        self._active.upsert_children(ids, texts, embeddings, metadatas)
+
+    def count(self) -> int:
+        """Number of child chunks in the active version."""
+        return self._active.count()
+
+    def get_indexed_children(self) -> dict[str, dict]:
+        """Return {child_id: metadata} for every child chunk in the index."""
+        return self._active.get_indexed_children()
+
+    def get_all_children(self) -> tuple[list[str], list[str], list[dict]]:
+        """Return (ids, texts, metadatas) for every child chunk in the active version."""
+        with self.reading() as index:
+            return index.get_all_children()
+
+    def get_ids_by_parent(self, parent_ids: list[str]) -> dict[str, set[str]]:
+        """Return {parent_id: child IDs} for the given parents (absent if none)."""
+        return self._active.get_ids_by_parent(parent_ids)
+
+    def delete_children(self, ids: list[str]):
+        """Delete child chunks by ID."""
+        self._active.delete_children(ids)
+
+    def delete_by_parent(self, parent_ids: list[str]) -> list[str]:
+        """Delete every child chunk of the given parents; returns the deleted child IDs."""
+        return self._active.delete_by_parent(parent_ids)
+
+    def query(
+        self, query_embedding: list[float], n_results: int = 5, filters: dict | None = None
+    ) -> list[tuple[str, float, dict]]:
+        """Query for most similar child chunks, optionally only those matching ``filters``.
+
         Returns:
             List of tuples: (child_text, distance, metadata)
         """
-        if self.collection.count() == 0:
-            return []
-            
-        n = min(n_results, self.collection.count())
-        
-        results = self.collection.query(
-            query_embeddings=[query_embedding],
-            n_results=n,
-            include=["documents", "distances", "metadatas"]
-        )
-        
-        matched = []
-        if results and results.get("documents") and results["documents"][0]:
-            docs = results["documents"][0]
-            distances = results["distances"][0]
-            metas = results["metadatas"][0] if results.get("metadatas") else [{}] * len(docs)
-            
-            for doc, dist, meta in zip(docs, distances, metas):
-                matched.append((doc, dist, meta))
-                
-        return matched
+        with self.reading() as index:
+            return index.query(query_embedding, n_results, filters)
 
     def get_parent(self, parent_id: str) -> str | None:
         """Retrieve the full parent document by its ID."""
-        return self.parent_docs.get(parent_id)
+        return self._active.get_parent(parent_id)
@@ -7,7 +7,7 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".
 
 from core.ai_support_bot.config import load_config
 from core.ai_support_bot.ai.embedding import EmbeddingEngine
-from core.ai_support_bot.rag.vector_store import VectorStore
+from core.ai_support_bot.rag.vector_store import VectorStore, make_child_id
 from core.ai_support_bot.rag.retriever import ContextRetriever
 
 logging.basicConfig(level=logging.INFO)
@@ -36,9 +36,12 @@ async def test_rag():
     print(f"   => Embedded {len(embeddings)} texts, first vector len {len(embeddings[0])}")
     
     print("5. Resetting and Adding to VectorStore...")
-    vector_store.reset_collection()
-    metadatas = [{"source": "test", "title": f"Title {i}"} for i in range(len(test_texts))]
-    vector_store.add_documents(test_texts, embeddings, metadatas)
+    metadatas = [{"source": "test", "title": f"Title {i}", "parent_id": f"test-{i}"} for i in range(len(test_texts))]
+    with vector_store.reset_collection() as shadow:
+        for text, meta in zip(test_texts, metadatas, strict=True):
+            shadow.add_parent_document(meta["parent_id"], text)
+        ids = [make_child_id(meta["parent_id"], text) for text, meta in zip(test_texts, metadatas, strict=True)]
+        shadow.upsert_children(ids, test_texts, embeddings, metadatas)
     
     print("6. Testing query: 'เรื่องระบบทุจริตโกงเงินบิดแอดมิน'")
     query = "เรื่องระบบทุจริตโกงเงินบิดแอดมิน"
@@ -45,7 +45,7 @@ async def main():
     
     # 5. Inspect cache
     print("\n=== Lodaed Data ===")
-    notion_pages = notion_fetcher._cached_pages
+    notion_pages = list(notion_fetcher._cached_pages.values())
     print(f"Notion pages in cache: {len(notion_pages)}")
     for p in notion_pages:
         print(f" - [Notion] {p.title} ({len(p.content or '')} chars)")
@@ -0,0 +1,70 @@
+"""Benchmark BM25 query latency: rank_bm25.BM25Okapi vs the sparse BM25Index.
+
+Usage: python scripts/benchmark_bm25.py [--sizes 10000 100000] [--queries 20]
+
+Documents are drawn from a Zipf-distributed synthetic vocabulary (about the
+length of a child chunk after newmm tokenization). Each query is scored and
+its top 10 selected, the way ContextRetriever does.
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+from rank_bm25 import BM25Okapi
+
+from core.ai_support_bot.rag.bm25 import BM25Index
+
+
+def _corpus(rng: np.random.Generator, n_docs: int, vocab: int, doc_len: int) -> list[list[str]]:
+    ranks = np.minimum(rng.zipf(1.2, size=n_docs * doc_len), vocab) - 1
+    words = [f"t{i}" for i in range(vocab)]
+    return [[words[r] for r in ranks[i * doc_len:(i + 1) * doc_len]] for i in range(n_docs)]
+
+
+def _median_ms(fn, queries) -> float:
+    timings = []
+    for query in queries:
+        started = time.perf_counter()
+        fn(query)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--vocab", type=int, default=50000)
+    parser.add_argument("--doc-len", type=int, default=120)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'chunks':>8} {'engine':>10} {'build s':>8} {'query ms':>9}")
+    for size in args.sizes:
+        corpus = _corpus(rng, size, args.vocab, args.doc_len)
+        queries = [corpus[int(i)][:6] for i in rng.integers(0, size, args.queries)]
+
+        started = time.perf_counter()
+        okapi = BM25Okapi(corpus)
+        okapi_build = time.perf_counter() - started
+
+        def okapi_top(query):
+            scores = okapi.get_scores(query)
+            return sorted(range(len(scores)), key=lambda i: scores[i], reverse=True)[:10]
+
+        started = time.perf_counter()
+        index = BM25Index(corpus)
+        index_build = time.perf_counter() - started
+
+        print(f"{size:>8} {'BM25Okapi':>10} {okapi_build:>8.1f} {_median_ms(okapi_top, queries):>9.1f}")
+        print(f"{size:>8} {'BM25Index':>10} {index_build:>8.1f} "
+              f"{_median_ms(lambda q: index.search(q, 10), queries):>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Benchmark two-stage search: a truncated (Matryoshka) first pass re-ranked with full vectors.
+
+Usage:
+  python scripts/benchmark_coarse_search.py --persist-dir ./chroma_db [--backend chroma]
+      [--query-log core/ai_support_bot/debug_logs] [--dims 128 256 512] [--rescore-factors 4 8]
+  python scripts/benchmark_coarse_search.py --synthetic 20000
+
+With an index and a query log (the pipeline debug logs' "Question:" lines, or
+a text file with one query per line), the logged queries are embedded with
+EMBEDDING_MODEL (needs OPENROUTER_API_KEY) and run against the index's own
+vectors. Recall@10 is measured against exact full-dimension search.
+"--synthetic N" uses random vectors whose energy decays over the dimensions
+instead (a rough stand-in; real embeddings are the number to trust).
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+
+from core.ai_support_bot.rag.vector_backends import NumpyBackend
+
+QUESTION_PREFIX = "Question:"
+
+
+def _read_query_log(path: Path) -> list[str]:
+    files = sorted(path.glob("*.txt")) if path.is_dir() else [path]
+    queries = []
+    for file in files:
+        lines = file.read_text(encoding="utf-8").splitlines()
+        if path.is_dir():
+            lines = [line.strip()[len(QUESTION_PREFIX):] for line in lines if line.strip().startswith(QUESTION_PREFIX)]
+        queries.extend(line.strip() for line in lines if line.strip())
+    return list(dict.fromkeys(queries))
+
+
+def _index_vectors(persist_dir: str, collection: str, backend: str) -> np.ndarray:
+    from core.ai_support_bot.rag.vector_store import VectorStore
+
+    store = VectorStore(persist_dir=persist_dir, collection_name=collection, backend=backend)
+    with store.reading() as index:
+        if backend == "numpy":
+            return np.concatenate([np.asarray(s.matrix)[s.live] for s in index.vectors.segments])
+        return np.asarray(index.vectors.collection.get(include=["embeddings"])["embeddings"], dtype=np.float32)
+
+
+def _embed_queries(queries: list[str]) -> np.ndarray:
+    from core.ai_support_bot.ai.embedding import EmbeddingEngine
+
+    engine = EmbeddingEngine(
+        api_key=os.environ["OPENROUTER_API_KEY"],
+        model=os.getenv("EMBEDDING_MODEL", "openai/text-embedding-3-small"),
+        dimensions=int(os.getenv("EMBEDDING_DIMENSIONS", "0")) or None,
+    )
+    return np.asarray(asyncio.run(engine.embed(queries)), dtype=np.float32)
+
+
+def _synthetic(rng: np.random.Generator, n: int, n_queries: int, dim: int) -> tuple[np.ndarray, np.ndarray]:
+    decay = np.linspace(2.0, 0.3, dim).astype(np.float32)
+    centres = rng.normal(size=(200, dim)).astype(np.float32)
+    vectors = (centres[rng.integers(0, 200, n)] + 0.6 * rng.normal(size=(n, dim))) * decay
+    queries = vectors[rng.integers(0, n, n_queries)] + 0.3 * rng.normal(size=(n_queries, dim)) * decay
+    return vectors.astype(np.float32), queries.astype(np.float32)
+
+
+def _run(backend: NumpyBackend, queries: np.ndarray, top_k: int) -> tuple[list[list[str]], float]:
+    results, timings = [], []
+    for q in queries:
+        started = time.perf_counter()
+        results.append([doc for doc, _, _ in backend.query(q, top_k)])
+        timings.append((time.perf_counter() - started) * 1000)
+    return results, statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--persist-dir", default="./chroma_db")
+    parser.add_argument("--collection", default="sokeber_knowledge")
+    parser.add_argument("--backend", default="chroma", choices=["chroma", "numpy"])
+    parser.add_argument("--query-log", type=Path, default=Path("core/ai_support_bot/debug_logs"))
+    parser.add_argument("--synthetic", type=int, default=0, help="Use N synthetic vectors instead of the index")
+    parser.add_argument("--dim", type=int, default=1536, help="Synthetic vector size")
+    parser.add_argument("--queries", type=int, default=200, help="Synthetic query count")
+    parser.add_argument("--dims", type=int, nargs="+", default=[128, 256, 512])
+    parser.add_argument("--rescore-factors", type=int, nargs="+", default=[4, 8])
+    parser.add_argument("--top-k", type=int, default=10)
+    args = parser.parse_args()
+
+    if args.synthetic:
+        vectors, queries = _synthetic(np.random.default_rng(0), args.synthetic, args.queries, args.dim)
+        print(f"Synthetic: {len(vectors)} vectors x {vectors.shape[1]} dims, {len(queries)} queries")
+    else:
+        logged = _read_query_log(args.query_log)
+        if not logged:
+            sys.exit(f"No queries found in {args.query_log}")
+        vectors = _index_vectors(args.persist_dir, args.collection, args.backend)
+        queries = _embed_queries(logged)
+        print(f"Index: {len(vectors)} vectors x {vectors.shape[1]} dims, {len(queries)} logged queries")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        writer = NumpyBackend(Path(tmp) / "vectors")
+        writer.upsert(
+            [f"bench:{i}#0" for i in range(len(vectors))], [str(i) for i in range(len(vectors))],
+            vectors, [{"parent_id": f"bench:{i}"} for i in range(len(vectors))],
+        )
+        writer.flush()
+
+        exact = NumpyBackend(Path(tmp) / "vectors")
+        truth, exact_ms = _run(exact, queries, args.top_k)
+        print(f"{'dims':>6} {'rescore':>7} {'scan MB':>8} {'recall':>7} {'p50 ms':>7}")
+        print(f"{'full':>6} {'-':>7} {exact.scan_nbytes / 2**20:>8.1f} {1.0:>7.3f} {exact_ms:>7.2f}")
+        for dims in args.dims:
+            for factor in args.rescore_factors:
+                coarse = NumpyBackend(Path(tmp) / "vectors", coarse_dims=dims, rescore_factor=factor)
+                found, coarse_ms = _run(coarse, queries, args.top_k)
+                recall = statistics.mean(
+                    len(set(f) & set(t)) / len(t) for f, t in zip(found, truth) if t
+                )
+                print(f"{dims:>6} {factor:>7} {coarse.scan_nbytes / 2**20:>8.1f} {recall:>7.3f} {coarse_ms:>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
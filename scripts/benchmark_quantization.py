@@ -0,0 +1,79 @@
+"""Benchmark memory, recall@10 and latency of the numpy backend's quantized scan.
+
+Usage: python scripts/benchmark_quantization.py [--sizes 10000 50000] [--dim 1536]
+
+Vectors are drawn around random cluster centres (like topic-grouped
+embeddings); queries are perturbed copies of stored vectors. Recall@10 is
+measured against the exact float32 search. "scan MB" is the vector data a
+query scans; "list MB" is the same vectors held as Python lists of floats.
+"""
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+
+from core.ai_support_bot.rag.vector_backends import QUANTIZATIONS, NumpyBackend
+
+
+def _vectors(rng: np.random.Generator, n: int, dim: int, clusters: int) -> np.ndarray:
+    centres = rng.normal(size=(clusters, dim)).astype(np.float32)
+    vectors = centres[rng.integers(0, clusters, n)] + 0.6 * rng.normal(size=(n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def _list_bytes(n: int, dim: int) -> int:
+    # list header + one pointer per element + one 24-byte float object per element
+    return n * (sys.getsizeof([]) + dim * (8 + sys.getsizeof(1.0)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 50000])
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--top-k", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'chunks':>8} {'scan':>8} {'list MB':>8} {'scan MB':>8} {'recall':>7} {'p50 ms':>7}")
+    for size in args.sizes:
+        vectors = _vectors(rng, size, args.dim, args.clusters)
+        picks = rng.integers(0, size, args.queries)
+        queries = vectors[picks] + 0.3 * rng.normal(size=(args.queries, args.dim)).astype(np.float32)
+        ids = [f"bench:{i}#0" for i in range(size)]
+        texts = [str(i) for i in range(size)]
+        metas = [{"parent_id": f"bench:{i}"} for i in range(size)]
+
+        with tempfile.TemporaryDirectory() as tmp:
+            writer = NumpyBackend(Path(tmp) / "vectors")
+            writer.upsert(ids, texts, vectors, metas)
+            writer.flush()
+
+            exact = None
+            for quantization in QUANTIZATIONS:
+                backend = NumpyBackend(Path(tmp) / "vectors", quantization=quantization)
+                timings, results = [], []
+                for q in queries:
+                    started = time.perf_counter()
+                    results.append([doc for doc, _, _ in backend.query(q, args.top_k)])
+                    timings.append((time.perf_counter() - started) * 1000)
+                if exact is None:
+                    exact = results
+                recall = statistics.mean(
+                    len(set(found) & set(truth)) / len(truth) for found, truth in zip(results, exact)
+                )
+                print(
+                    f"{size:>8} {quantization:>8} {_list_bytes(size, args.dim) / 2**20:>8.0f} "
+                    f"{backend.scan_nbytes / 2**20:>8.1f} {recall:>7.3f} {statistics.median(timings):>7.2f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Benchmark query latency of the chroma and numpy vector backends.
+
+Usage: python scripts/benchmark_vector_backends.py [--sizes 1000 5000 20000] [--dim 1536]
+
+Random unit vectors stand in for embeddings; each backend is loaded with the
+same rows and answers the same queries (top 20, like ContextRetriever).
+"""
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+
+from core.ai_support_bot.rag.vector_store import VectorStore
+
+
+def _load(store: VectorStore, vectors: np.ndarray):
+    ids = [f"bench:{i // 4}#{i}" for i in range(len(vectors))]
+    metas = [{"parent_id": f"bench:{i // 4}"} for i in range(len(vectors))]
+    store.upsert_children(ids, [f"chunk {i}" for i in range(len(vectors))], vectors.tolist(), metas)
+    store.save_parent_docs()
+
+
+def _time_queries(store: VectorStore, queries: np.ndarray, top_k: int) -> list[float]:
+    timings = []
+    for q in queries:
+        started = time.perf_counter()
+        store.query(q.tolist(), top_k)
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 20000])
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    queries = rng.normal(size=(args.queries, args.dim)).astype(np.float32)
+    print(f"{'chunks':>8} {'backend':>8} {'p50 ms':>8} {'p95 ms':>8} {'load s':>8}")
+    for size in args.sizes:
+        vectors = rng.normal(size=(size, args.dim)).astype(np.float32)
+        for backend in ("numpy", "chroma"):
+            with tempfile.TemporaryDirectory() as tmp:
+                store = VectorStore(persist_dir=tmp, collection_name="benchmark", backend=backend)
+                started = time.perf_counter()
+                _load(store, vectors)
+                load_seconds = time.perf_counter() - started
+                timings = sorted(_time_queries(store, queries, args.top_k))
+                p95 = timings[int(len(timings) * 0.95) - 1]
+                print(
+                    f"{size:>8} {backend:>8} {statistics.median(timings):>8.2f} "
+                    f"{p95:>8.2f} {load_seconds:>8.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
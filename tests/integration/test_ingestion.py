@@ -0,0 +1,331 @@
+"""Integration tests for delta ingestion — real ChromaDB store, fake embeddings."""
+
+import asyncio
+import threading
+
+import pytest
+
+from core.ai_support_bot.rag.ingestion import DataIngestionTask
+from core.ai_support_bot.rag.sheets_fetcher import SheetsFetcher, _rows_from_values
+from core.ai_support_bot.rag.vector_store import VectorStore
+
+
+class FakeEmbeddingEngine:
+    """Deterministic embedder that records every call."""
+
+    def __init__(self):
+        self.calls: list[list[str]] = []
+
+    async def embed(self, texts: list[str]) -> list[list[float]]:
+        self.calls.append(list(texts))
+        return [[float(len(t) % 7), float(len(t) % 11), 1.0] for t in texts]
+
+    async def embed_batch(self, texts: list[str]) -> list[list[float]]:
+        return await self.embed(texts)
+
+    @property
+    def embedded_count(self) -> int:
+        return sum(len(c) for c in self.calls)
+
+
+def _doc(title: str, body: str) -> str:
+    return f"[{title}]\n{body}"
+
+
+FAQ = _doc("FAQ", "### Pricing\n" + "Basic plan costs 100 baht per month. " * 3
+           + "\n### Refunds\n" + "Refunds are available within 7 days of purchase. " * 3)
+SHIPPING = _doc("Shipping", "We ship every weekday from Bangkok. Orders arrive in 2-3 days.")
+
+
+@pytest.fixture
+def task(tmp_path):
+    store = VectorStore(persist_dir=str(tmp_path / "chroma"), collection_name="test_knowledge")
+    engine = FakeEmbeddingEngine()
+    return DataIngestionTask(embedding_engine=engine, vector_store=store)
+
+
+def _sync(task, docs):
+    texts = [text for _, text in docs]
+    metas = [{"source": "notion", "title": pid, "id": pid} for pid, _ in docs]
+    return asyncio.run(task._rebuild_index(texts, metas))
+
+
+class TestDeltaIngestion:
+    """Only new or changed content should be embedded."""
+
+    def test_first_sync_adds_everything(self, task):
+        stats = _sync(task, [("faq", FAQ), ("ship", SHIPPING)])
+        assert stats.added == 2
+        assert stats.unchanged == 0
+        assert stats.chunks_embedded == task.embedding_engine.embedded_count
+        assert task.vector_store.count() == stats.chunks_embedded
+
+    def test_unchanged_sync_makes_no_embedding_calls(self, task):
+        _sync(task, [("faq", FAQ), ("ship", SHIPPING)])
+        task.embedding_engine.calls.clear()
+
+        stats = _sync(task, [("faq", FAQ), ("ship", SHIPPING)])
+        assert stats.unchanged == 2
+        assert stats.added == stats.updated == stats.removed == 0
+        assert task.embedding_engine.calls == []
+
+    def test_changed_parent_embeds_only_new_children(self, task):
+        _sync(task, [("faq", FAQ), ("ship", SHIPPING)])
+        task.embedding_engine.calls.clear()
+        edited = FAQ.replace("7 days", "14 days")
+
+        stats = _sync(task, [("faq", edited), ("ship", SHIPPING)])
+        assert stats.updated == 1
+        assert stats.unchanged == 1
+        assert stats.chunks_embedded == 1  # only the Refunds section changed
+        assert stats.chunks_deleted == 1
+        assert "14 days" in task.vector_store.get_parent("notion:faq")
+
+    def test_removed_parent_deletes_children(self, task):
+        _sync(task, [("faq", FAQ), ("ship", SHIPPING)])
+
+        stats = _sync(task, [("faq", FAQ)])
+        assert stats.removed == 1
+        assert task.vector_store.get_parent("notion:ship") is None
+        parents = {m["parent_id"] for m in task.vector_store.get_indexed_children().values()}
+        assert parents == {"notion:faq"}
+
+
+class TestParentIds:
+
+    def test_hyphens_are_only_dropped_from_notion_ids(self, task):
+        texts = [SHIPPING, FAQ, _doc("Page", "Notion page body text")]
+        metas = [
+            {"source": "sheets", "id": "A-1"},
+            {"source": "sheets", "id": "A1"},
+            {"source": "notion", "id": "1a2b-3c4d"},
+        ]
+        asyncio.run(task._rebuild_index(texts, metas))
+
+        assert sorted(task.vector_store.list_parent_ids()) == ["notion:1a2b3c4d", "sheets:A-1", "sheets:A1"]
+
+
+class FakeSheetsFetcher(SheetsFetcher):
+    """SheetsFetcher serving an in-memory grid instead of the Sheets API."""
+
+    def __init__(self, grid):
+        super().__init__(credentials=None)
+        self.grid = grid
+        self.grids: dict[str, list[list[str]]] = {}  # Per-spreadsheet overrides of grid
+        self.error: Exception | None = None  # Raised by the next fetches when set
+
+    def fetch_spreadsheet_rows(self, spreadsheet_id, sheet_whitelist=None):
+        if self.error is not None:
+            raise self.error
+        grid = self.grids.get(spreadsheet_id, self.grid)
+        return {"FAQ": _rows_from_values(grid, spreadsheet_id, "FAQ")}
+
+
+class TestSheetsDeltaIngestion:
+    """After a baseline, a sheets sync only indexes changed rows."""
+
+    GRID = [
+        ["Question", "Answer"],
+        ["How long is shipping?", "Two to three working days"],
+        ["Can I get a refund?", "Yes, within seven days"],
+    ]
+
+    def _task(self, tmp_path):
+        store = VectorStore(persist_dir=str(tmp_path / "chroma"), collection_name="test_knowledge")
+        return DataIngestionTask(
+            embedding_engine=FakeEmbeddingEngine(),
+            vector_store=store,
+            sheets_fetcher=FakeSheetsFetcher([list(r) for r in self.GRID]),
+            sheets_spreadsheet_ids=["sid"],
+        )
+
+    def test_inserted_row_only_indexes_that_row(self, tmp_path):
+        task = self._task(tmp_path)
+        assert asyncio.run(task.ingest_sheets_only()).added == 2
+        # A document from another source must survive partial sheets syncs
+        asyncio.run(task._rebuild_index([SHIPPING], [{"source": "notion", "id": "ship"}], prune=False))
+        task.embedding_engine.calls.clear()
+
+        task.sheets_fetcher.grid.insert(1, ["Do you ship abroad?", "Only within Thailand"])
+        stats = asyncio.run(task.ingest_sheets_only())
+
+        assert (stats.added, stats.updated, stats.removed, stats.unchanged) == (1, 0, 0, 2)
+        assert task.embedding_engine.embedded_count == 1
+        assert task.vector_store.get_parent("notion:ship") == SHIPPING
+
+    def test_deleted_row_is_removed(self, tmp_path):
+        task = self._task(tmp_path)
+        asyncio.run(task.ingest_sheets_only())
+
+        del task.sheets_fetcher.grid[1]
+        stats = asyncio.run(task.ingest_sheets_only())
+
+        assert (stats.added, stats.removed, stats.unchanged) == (0, 1, 1)
+        assert len(task.vector_store.list_parent_ids()) == 1
+
+    def test_same_tab_name_in_two_spreadsheets(self, tmp_path):
+        task = self._task(tmp_path)
+        task.sheets_spreadsheet_ids = ["sid", "sid2"]
+        task.sheets_fetcher.grids["sid2"] = [list(self.GRID[0]), list(self.GRID[1])]
+        assert asyncio.run(task.ingest_sheets_only()).added == 3
+        assert len(task.vector_store.list_parent_ids()) == 3
+
+        del task.sheets_fetcher.grids["sid2"][1]
+        stats = asyncio.run(task.ingest_sheets_only())
+
+        assert (stats.added, stats.removed, stats.unchanged) == (0, 1, 2)
+        parents = task.vector_store.list_parent_ids()
+        assert len(parents) == 2
+        assert all(p.startswith("sheets:sheets_sid_FAQ_") for p in parents)
+
+
+class TestPerSourcePruning:
+    """A failed or empty source never causes another source's parents to be pruned."""
+
+    def _task(self, tmp_path):
+        return DataIngestionTask(
+            embedding_engine=FakeEmbeddingEngine(),
+            vector_store=VectorStore(persist_dir=str(tmp_path / "chroma"), collection_name="test_knowledge"),
+            sheets_fetcher=FakeSheetsFetcher([list(r) for r in TestSheetsDeltaIngestion.GRID]),
+            sheets_spreadsheet_ids=["sid"],
+        )
+
+    def _sync(self, task, notion_docs):
+        notion = task._list_source(
+            [text for _, text in notion_docs], [{"source": "notion", "id": pid} for pid, _ in notion_docs]
+        )
+        return asyncio.run(task._sync_index([notion, task._sheets_source()]))
+
+    def test_failed_sheets_fetch_keeps_sheets_parents(self, tmp_path):
+        task = self._task(tmp_path)
+        assert self._sync(task, [("faq", FAQ), ("ship", SHIPPING)]).added == 4
+
+        task.sheets_fetcher.error = ConnectionError("503 Service Unavailable")
+        stats = self._sync(task, [("faq", FAQ)])
+
+        assert stats.removed == 1  # Notion completed, so its deleted page still goes
+        parents = task.vector_store.list_parent_ids()
+        assert "notion:ship" not in parents
+        assert sum(p.startswith("sheets:") for p in parents) == 2
+
+    def test_empty_notion_result_keeps_notion_parents(self, tmp_path):
+        task = self._task(tmp_path)
+        self._sync(task, [("faq", FAQ)])
+
+        stats = self._sync(task, [])
+
+        assert stats.removed == 0
+        assert task.vector_store.get_parent("notion:faq") == FAQ
+
+
+class TestConcurrentSyncs:
+    """The periodic loop and !sync commands never run two syncs at once."""
+
+    def test_entry_points_serialize(self, tmp_path, monkeypatch):
+        task = TestPerSourcePruning()._task(tmp_path)
+        sync_index = task._sync_index
+        active = []
+        overlaps = []
+
+        async def tracked(*args, **kwargs):
+            active.append(1)
+            overlaps.append(len(active))
+            await asyncio.sleep(0.02)
+            try:
+                return await sync_index(*args, **kwargs)
+            finally:
+                active.pop()
+        monkeypatch.setattr(task, "_sync_index", tracked)
+
+        async def run():
+            return await asyncio.gather(
+                task.ingest_now(), task.ingest_notion_only(), task.ingest_sheets_only()
+            )
+
+        results = asyncio.run(run())
+
+        assert overlaps == [1, 1]
+        assert results[0].added == 2
+        assert results[2].unchanged == 2  # Ran after the others, against their baseline
+        assert len(task.vector_store.list_parent_ids()) == 2
+
+
+class TestStreamingPipeline:
+    """Documents flow through bounded queues into chunked writes."""
+
+    def test_embedding_starts_before_source_is_drained(self, task):
+        task.pipeline_write_chunk = 1
+        docs = [(f"doc{i}", _doc(f"Doc {i}", f"Body number {i} " * 3)) for i in range(6)]
+        embedded_when_emitting = []
+
+        async def source(emit):
+            for pid, text in docs:
+                embedded_when_emitting.append(task.embedding_engine.embedded_count)
+                await emit(text, {"source": "notion", "id": pid})
+                await asyncio.sleep(0.01)
+
+        stats = asyncio.run(task._sync_index([source]))
+
+        assert stats.added == 6
+        assert embedded_when_emitting[-1] > 0  # earlier docs were embedded mid-stream
+        assert all(len(call) == 1 for call in task.embedding_engine.calls)
+        assert [st.name for st in stats.stages] == ["fetch", "split", "embed", "write"]
+        assert stats.stages[0].items == 6
+        assert "bottleneck=" in stats.stage_summary()
+
+    def test_parent_store_is_not_touched_on_the_event_loop(self, task, monkeypatch):
+        _sync(task, [("faq", FAQ)])
+        loop_threads = []
+        store_threads = []
+
+        def watch(name):
+            original = getattr(task.vector_store, name)
+
+            def wrapper(*args, **kwargs):
+                store_threads.append(threading.get_ident())
+                return original(*args, **kwargs)
+            monkeypatch.setattr(task.vector_store, name, wrapper)
+
+        for name in ("get_parent", "save_parent_docs", "list_parent_ids"):
+            watch(name)
+
+        async def run():
+            loop_threads.append(threading.get_ident())
+            return await task._rebuild_index([FAQ.replace("7 days", "9 days"), SHIPPING], [
+                {"source": "notion", "id": "faq"}, {"source": "notion", "id": "ship"},
+            ])
+
+        stats = asyncio.run(run())
+
+        assert (stats.updated, stats.added) == (1, 1)
+        assert store_threads and loop_threads[0] not in store_threads
+
+    def test_failed_source_skips_removals(self, task):
+        _sync(task, [("faq", FAQ), ("ship", SHIPPING)])
+
+        async def broken(emit):
+            await emit(FAQ, {"source": "notion", "id": "faq"})
+            raise ConnectionError("Notion unavailable")
+
+        stats = asyncio.run(task._sync_index([broken]))
+
+        assert stats.removed == 0
+        assert task.vector_store.get_parent("notion:ship") == SHIPPING
+
+
+class TestPartialUpdate:
+
+    def test_partial_update_does_not_scan_whole_collection(self, task, monkeypatch):
+        _sync(task, [("faq", FAQ), ("ship", SHIPPING)])
+
+        def full_scan():
+            raise AssertionError("partial update must not read every child")
+
+        monkeypatch.setattr(task.vector_store, "get_indexed_children", full_scan)
+        edited = FAQ.replace("7 days", "30 days")
+        stats = asyncio.run(task._rebuild_index(
+            [edited], [{"source": "notion", "id": "faq"}], prune=False, remove_parent_ids=["notion:ship"],
+        ))
+
+        assert (stats.updated, stats.removed, stats.chunks_embedded) == (1, 1, 1)
+        assert task.vector_store.get_ids_by_parent(["notion:ship"]) == {}
@@ -0,0 +1,259 @@
+"""Integration tests for the async Notion crawler — uses a fake async client."""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from core.ai_support_bot.rag.notion_crawler import AsyncNotionCrawler, AsyncTokenBucket
+from core.ai_support_bot.rag.notion_fetcher import NotionFetcher
+
+
+def _para(text: str, block_id: str = "", has_children: bool = False) -> dict:
+    return {
+        "id": block_id or f"b-{text}",
+        "type": "paragraph",
+        "has_children": has_children,
+        "paragraph": {"rich_text": [{"plain_text": text}]},
+    }
+
+
+def _page(title: str, edited: str = "2026-01-01T00:00:00.000Z") -> dict:
+    return {
+        "object": "page",
+        "url": f"https://notion.so/{title}",
+        "last_edited_time": edited,
+        "properties": {"Name": {"type": "title", "title": [{"plain_text": title}]}},
+    }
+
+
+class RateLimited(Exception):
+    status = 429
+    code = "rate_limited"
+    headers = {"retry-after": "0"}
+
+
+class FakeAsyncNotion:
+    """Minimal async stand-in for notion_client.AsyncClient."""
+
+    def __init__(self, pages, children, databases, rate_limit_once=()):
+        self._pages = pages
+        self._children = children
+        self._databases = databases
+        self._rate_limit_once = set(rate_limit_once)
+        self.calls: list[tuple[str, str]] = []
+        self.pages = SimpleNamespace(retrieve=self._retrieve)
+        self.blocks = SimpleNamespace(children=SimpleNamespace(list=self._list))
+        self.databases = SimpleNamespace(query=self._query)
+
+    async def search(self, start_cursor=None, sort=None, filter=None, page_size=100):
+        self.calls.append(("search", ""))
+        results = [{"id": pid, **page} for pid, page in self._pages.items()]
+        if sort:
+            results.sort(key=lambda r: r["last_edited_time"], reverse=True)
+        return {"results": results, "has_more": False}
+
+    async def _retrieve(self, page_id):
+        self.calls.append(("pages.retrieve", page_id))
+        if page_id in self._rate_limit_once:
+            self._rate_limit_once.discard(page_id)
+            raise RateLimited("slow down")
+        return self._pages[page_id]
+
+    async def _list(self, block_id, page_size=100, start_cursor=None):
+        self.calls.append(("blocks.children.list", block_id))
+        return {"results": self._children.get(block_id, []), "has_more": False}
+
+    async def _query(self, database_id, page_size=100, start_cursor=None):
+        self.calls.append(("databases.query", database_id))
+        rows = [{"id": r, **self._pages[r]} for r in self._databases[database_id]]
+        return {"results": rows, "has_more": False}
+
+
+@pytest.fixture
+def client():
+    return FakeAsyncNotion(
+        pages={"root": _page("Root"), "child": _page("Child"), "row-1": _page("Row")},
+        children={
+            "root": [
+                _para("Intro"),
+                _para("Toggle", block_id="toggle", has_children=True),
+                {"id": "child", "type": "child_page", "has_children": True, "child_page": {}},
+                {"id": "db", "type": "child_database", "has_children": False, "child_database": {}},
+            ],
+            "toggle": [_para("Nested detail")],
+            "child": [_para("Child body")],
+            "row-1": [_para("Row body")],
+        },
+        databases={"db": ["row-1", "child"]},
+        rate_limit_once=["child"],
+    )
+
+
+class TestAsyncNotionCrawler:
+
+    def test_crawls_whole_tree_once(self, client):
+        crawler = AsyncNotionCrawler(client, rate_per_second=1000, burst=1000)
+        pages = asyncio.run(crawler.crawl(["root"], []))
+
+        assert sorted(p.title for p in pages) == ["Child", "Root", "Row"]
+        root = next(p for p in pages if p.title == "Root")
+        assert "Intro" in root.content
+        assert "  Nested detail" in root.content
+        assert root.last_edited_time == "2026-01-01T00:00:00.000Z"
+        # "child" is reachable twice (child_page + database row) but crawled once
+        listed = [target for call, target in client.calls if call == "blocks.children.list"]
+        assert listed.count("child") == 1
+        retrieved = [target for call, target in client.calls if call == "pages.retrieve"]
+        assert retrieved.count("root") == 1
+        # Database rows come back as full page objects, so they are never re-retrieved
+        assert "row-1" not in retrieved
+
+    def test_reports_stats_and_retries_429(self, client):
+        crawler = AsyncNotionCrawler(client, rate_per_second=1000, burst=1000)
+        asyncio.run(crawler.crawl(["root"], []))
+
+        assert crawler.stats.pages == 3
+        assert crawler.stats.databases == 1
+        assert crawler.stats.rate_limited == 1
+        assert crawler.stats.requests == len(client.calls)
+        assert sum(crawler.stats.requests_by_endpoint.values()) == crawler.stats.requests
+        assert crawler.stats.requests_by_endpoint["databases.query"] == 1
+
+
+class TestAsyncTokenBucket:
+
+    def test_enforces_rate(self):
+        async def run():
+            bucket = AsyncTokenBucket(rate=50, capacity=1)
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            for _ in range(6):
+                await bucket.acquire()
+            return loop.time() - start
+
+        assert asyncio.run(run()) >= 0.09  # 5 refills at 50/s
+
+
+class TestIncrementalNotionSync:
+    """NotionFetcher.sync_async should only re-crawl pages edited since the watermark."""
+
+    def _client(self):
+        return FakeAsyncNotion(
+            pages={
+                "a": _page("A", "2026-01-01T00:00:00.000Z"),
+                "b": _page("B", "2026-01-02T00:00:00.000Z"),
+                "c": _page("C", "2026-01-03T00:00:00.000Z"),
+            },
+            children={"a": [_para("alpha")], "b": [_para("bravo")], "c": [_para("charlie")]},
+            databases={},
+        )
+
+    def test_first_sync_is_full_and_persists_watermark(self, tmp_path):
+        client = self._client()
+        fetcher = NotionFetcher(None, async_client=client, state_path=tmp_path / "state.json")
+        asyncio.run(fetcher.sync_async())
+
+        assert sorted(p.title for p in fetcher._cached_pages.values()) == ["A", "B", "C"]
+        reloaded = NotionFetcher(None, async_client=client, state_path=tmp_path / "state.json")
+        assert reloaded._sync_state["watermark"] == "2026-01-03T00:00:00.000Z"
+
+    def test_unchanged_workspace_costs_one_request(self, tmp_path):
+        client = self._client()
+        fetcher = NotionFetcher(None, async_client=client, state_path=tmp_path / "state.json")
+        asyncio.run(fetcher.sync_async())
+        client.calls.clear()
+
+        assert asyncio.run(fetcher.sync_async()) == 0
+        assert client.calls == [("search", "")]
+
+    def test_only_edited_pages_are_recrawled(self, tmp_path):
+        client = self._client()
+        fetcher = NotionFetcher(None, async_client=client, state_path=tmp_path / "state.json")
+        asyncio.run(fetcher.sync_async())
+        client.calls.clear()
+
+        client._pages["a"] = _page("A", "2026-02-01T00:00:00.000Z")
+        client._children["a"] = [_para("alpha v2")]
+        assert asyncio.run(fetcher.sync_async()) == 1
+
+        assert ("blocks.children.list", "a") in client.calls
+        assert not any(target in ("b", "c") for _, target in client.calls)
+        contents = {p.title: p.content for p in fetcher._cached_pages.values()}
+        assert contents == {"A": "alpha v2", "B": "bravo", "C": "charlie"}
+        assert fetcher._sync_state["watermark"] == "2026-02-01T00:00:00.000Z"
+
+    def test_warm_restart_uses_snapshot(self, tmp_path):
+        from core.ai_support_bot.rag.page_store import NotionPageStore
+
+        client = self._client()
+        state = tmp_path / "state.json"
+        first = NotionFetcher(None, async_client=client, state_path=state,
+                              page_store=NotionPageStore(tmp_path / "pages.sqlite3"))
+        asyncio.run(first.sync_async())
+        client.calls.clear()
+
+        restarted = NotionFetcher(None, async_client=client, state_path=state,
+                                  page_store=NotionPageStore(tmp_path / "pages.sqlite3"))
+        assert sorted(restarted._cached_pages) == ["a", "b", "c"]
+        assert asyncio.run(restarted.sync_async()) == 0
+        assert client.calls == [("search", "")]
+
+    def test_delta_crawl_with_errors_retries_failed_pages(self, tmp_path):
+        client = self._client()
+        fetcher = NotionFetcher(None, async_client=client, state_path=tmp_path / "state.json")
+        asyncio.run(fetcher.sync_async())
+
+        real_list = client._list
+
+        async def failing_list(block_id, **kwargs):
+            if block_id == "a":
+                raise ValueError("bad block")
+            return await real_list(block_id, **kwargs)
+
+        client.blocks.children.list = failing_list
+        client._pages["a"] = _page("A", "2026-02-01T10:00:00.000Z")
+        client._children["a"] = [_para("alpha v2")]
+        client._pages["b"] = _page("B", "2026-02-01T10:05:00.000Z")
+        client._children["b"] = [_para("bravo v2")]
+        assert asyncio.run(fetcher.sync_async()) == 1
+
+        assert fetcher.last_crawl_stats.errors == 1
+        assert fetcher._sync_state["watermark"] == "2026-02-01T10:00:00.000Z"
+        assert fetcher._sync_state["pages"]["a"] == "2026-01-01T00:00:00.000Z"
+
+        client.blocks.children.list = real_list
+        client.calls.clear()
+        assert asyncio.run(fetcher.sync_async()) == 1  # Only the failed page is retried
+        assert ("blocks.children.list", "a") in client.calls
+        assert ("blocks.children.list", "b") not in client.calls
+        contents = {p.title: p.content for p in fetcher._cached_pages.values()}
+        assert contents == {"A": "alpha v2", "B": "bravo v2", "C": "charlie"}
+        assert fetcher._sync_state["watermark"] == "2026-02-01T10:05:00.000Z"
+
+    def test_full_crawl_with_errors_keeps_pages_and_watermarks(self, tmp_path):
+        client = self._client()
+        fetcher = NotionFetcher(None, async_client=client, state_path=tmp_path / "state.json")
+        asyncio.run(fetcher.sync_async())
+        watermarks = dict(fetcher._sync_state["pages"])
+
+        real_list = client._list
+
+        async def failing_list(block_id, **kwargs):
+            if block_id == "b":
+                raise ValueError("bad block")
+            return await real_list(block_id, **kwargs)
+
+        client.blocks.children.list = failing_list
+        client._pages["c"] = _page("C", "2026-03-01T00:00:00.000Z")
+        asyncio.run(fetcher.fetch_all_async())
+
+        assert fetcher.last_crawl_stats.errors == 1
+        assert sorted(p.title for p in fetcher._cached_pages.values()) == ["A", "B", "C"]
+        assert fetcher._sync_state["pages"] == watermarks
+
+        client.blocks.children.list = real_list
+        client.calls.clear()
+        asyncio.run(fetcher.sync_async())  # Retried as a full crawl, then committed
+        assert ("blocks.children.list", "b") in client.calls
+        assert fetcher._sync_state["watermark"] == "2026-03-01T00:00:00.000Z"
@@ -164,3 +164,65 @@ class TestNotionFetcherWithMock:
         fetcher = NotionFetcher(mock_client)
         page = fetcher.fetch_page_content("empty-page")
         assert page.content == ""
+
+
+class TestNotionFetcherCrawlMemo:
+    """fetch_tree should request each page / block list at most once per crawl."""
+
+    def _make_tree_client(self):
+        def page(title):
+            return {"url": "", "properties": {"Name": {"type": "title", "title": [{"plain_text": title}]}}}
+
+        children = {
+            "root": [
+                {"id": "db", "type": "child_database", "has_children": False, "child_database": {}},
+                {"id": "row-1", "type": "link_to_page", "link_to_page": {"type": "page_id", "page_id": "row-1"}},
+            ],
+            "row-1": [{"id": "p1", "type": "paragraph", "paragraph": {"rich_text": [{"plain_text": "Row body"}]}}],
+        }
+        client = MagicMock()
+        client.pages.retrieve.side_effect = lambda page_id: page(page_id)
+        client.blocks.children.list.side_effect = (
+            lambda block_id, **kw: {"results": children.get(block_id, []), "has_more": False}
+        )
+        client.databases.query.return_value = {
+            "results": [{"id": "row-1", **page("Row 1")}],
+            "has_more": False,
+        }
+        return client
+
+    def test_each_node_requested_once(self):
+        client = self._make_tree_client()
+        fetcher = NotionFetcher(client)
+        fetcher.fetch_tree(["root"], [])
+
+        listed = [c.kwargs["block_id"] for c in client.blocks.children.list.call_args_list]
+        assert sorted(listed) == ["root", "row-1"]
+        # row-1 is reachable via link_to_page and the database, but requested once
+        retrieved = [c.kwargs["page_id"] for c in client.pages.retrieve.call_args_list]
+        assert retrieved == ["root", "row-1"]
+        assert sorted(p.id for p in fetcher._cached_pages.values()) == ["root", "row-1"]
+
+    def test_request_counts_per_endpoint(self):
+        fetcher = NotionFetcher(self._make_tree_client())
+        fetcher.fetch_tree(["root"], [])
+        assert fetcher.request_counts == {
+            "pages.retrieve": 2,
+            "blocks.children.list": 2,
+            "databases.query": 1,
+        }
+
+    def test_memo_does_not_outlive_crawl(self):
+        client = self._make_tree_client()
+        fetcher = NotionFetcher(client)
+        fetcher.fetch_tree(["root"], [])
+        fetcher.fetch_tree(["root"], [])
+        retrieved = [c.kwargs["page_id"] for c in client.pages.retrieve.call_args_list]
+        assert retrieved == ["root", "row-1", "root", "row-1"]
+
+    def test_database_rows_are_not_retrieved_again(self):
+        client = self._make_tree_client()
+        fetcher = NotionFetcher(client)
+        fetcher.fetch_tree([], ["db"])
+        client.pages.retrieve.assert_not_called()
+        assert [p.title for p in fetcher._cached_pages.values()] == ["Row 1"]
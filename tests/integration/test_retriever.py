@@ -0,0 +1,295 @@
+"""Integration tests for ContextRetriever's lexical (BM25) index."""
+
+import asyncio
+import threading
+
+import pytest
+
+from core.ai_support_bot.rag import retriever as retriever_module
+from core.ai_support_bot.rag import tokenizer as tokenizer_module
+from core.ai_support_bot.rag.ingestion import DataIngestionTask
+from core.ai_support_bot.rag.retriever import ContextRetriever
+from core.ai_support_bot.rag.vector_store import VectorStore
+
+pytestmark = pytest.mark.skipif(not retriever_module.HAS_BM25, reason="pythainlp not installed")
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = VectorStore(persist_dir=str(tmp_path / "index"), collection_name="kbase", backend="numpy")
+    texts = ["refund policy thirty days", "pricing basic plan", "support hours bangkok"]
+    store.upsert_children(
+        [f"p{i}#0" for i in range(3)], texts,
+        [[1.0, float(i), 0.0] for i in range(3)], [{"parent_id": f"p{i}"} for i in range(3)],
+    )
+    store.save_parent_docs()
+    return store
+
+
+@pytest.fixture
+def tokenize_calls(monkeypatch):
+    calls = []
+    real = tokenizer_module.word_tokenize
+
+    def counting(text, engine="newmm"):
+        calls.append(text)
+        return real(text, engine=engine)
+
+    monkeypatch.setattr(tokenizer_module, "word_tokenize", counting)
+    return calls
+
+
+class TestBM25Snapshot:
+
+    def test_restart_loads_snapshot_without_tokenizing(self, store, tokenize_calls):
+        ContextRetriever(vector_store=store)
+        assert len(tokenize_calls) == 3
+        assert store.persist_dir.joinpath("bm25.kbase", "manifest.json").exists()
+
+        tokenize_calls.clear()
+        restarted = ContextRetriever(vector_store=store)
+        assert tokenize_calls == []
+        assert [restarted.bm25.meta(slot)["parent_id"] for slot, _ in restarted.bm25.search(["pricing"], 5)] == ["p1"]
+
+    def test_index_change_triggers_rebuild(self, store, tokenize_calls):
+        retriever = ContextRetriever(vector_store=store)
+        store.delete_by_parent(["p0"])
+        store.save_parent_docs()
+
+        tokenize_calls.clear()
+        retriever._rebuild_bm25_index()
+        assert len(tokenize_calls) == 2
+        assert len(retriever.bm25) == 2
+
+
+class FakeEmbeddingEngine:
+
+    async def embed(self, texts):
+        return [[1.0, float(len(t) % 5), 0.5] for t in texts]
+
+    async def embed_batch(self, texts):
+        return await self.embed(texts)
+
+
+class TestIncrementalBM25:
+
+    def _sync(self, task, docs):
+        texts = [f"[{title}]\n{body}" for title, body in docs.items()]
+        metas = [{"source": "notion", "id": title} for title in docs]
+        return asyncio.run(task._rebuild_index(texts, metas))
+
+    def test_partial_sync_tokenizes_only_changed_chunks(self, tmp_path, tokenize_calls):
+        store = VectorStore(persist_dir=str(tmp_path / "index"), collection_name="kbase", backend="numpy")
+        retriever = ContextRetriever(vector_store=store)
+        task = DataIngestionTask(embedding_engine=FakeEmbeddingEngine(), vector_store=store)
+        task.context_retriever = retriever
+        docs = {
+            "refunds": "refund policy thirty days", "pricing": "pricing basic plan", "hours": "support hours",
+            "shipping": "shipping to thailand", "accounts": "account settings", "faq": "common questions",
+        }
+        self._sync(task, docs)
+        first_version = retriever.bm25_version
+
+        tokenize_calls.clear()
+        docs["pricing"] = "pricing premium plan"
+        del docs["hours"]
+        self._sync(task, docs)
+
+        assert tokenize_calls == ["[pricing]\npricing premium plan"]
+        assert retriever.bm25_version == store.index_version != first_version
+        assert len(retriever.bm25) == store.count()
+        parents = lambda query: {retriever.bm25.meta(slot)["parent_id"] for slot, _ in retriever.bm25.search([query], 5)}
+        assert parents("premium") == {"notion:pricing"}
+        assert parents("basic") == set()
+        assert parents("hours") == set()
+
+    def test_sync_applies_each_write_round_and_saves_once(self, tmp_path, monkeypatch):
+        store = VectorStore(persist_dir=str(tmp_path / "index"), collection_name="kbase", backend="numpy")
+        retriever = ContextRetriever(vector_store=store)
+        task = DataIngestionTask(embedding_engine=FakeEmbeddingEngine(), vector_store=store, pipeline_write_chunk=1)
+        task.context_retriever = retriever
+        rounds, saves = [], []
+        real_update = retriever.update_bm25_index
+
+        def recording_update(base_version, added_ids, added_texts, added_metas, removed_ids, save=True):
+            rounds.append(len(added_texts))
+            saves.append(save)
+            return real_update(base_version, added_ids, added_texts, added_metas, removed_ids, save)
+
+        monkeypatch.setattr(retriever, "update_bm25_index", recording_update)
+        self._sync(task, {f"doc{i}": f"topic{i} answer" for i in range(6)})
+
+        assert max(rounds) == 1 and sum(rounds) == 6  # One round's texts at a time
+        assert saves.count(True) == 1 and saves[-1]
+        assert retriever.bm25_version == store.index_version and len(retriever.bm25) == 6
+        restarted = ContextRetriever(vector_store=store)
+        assert len(restarted.bm25) == 6 and restarted.bm25_version == store.index_version
+
+    def test_out_of_date_index_is_rebuilt(self, store, tokenize_calls):
+        retriever = ContextRetriever(vector_store=store)
+        tokenize_calls.clear()
+
+        retriever.update_bm25_index("v0.r999", ["p9#0"], ["new chunk"], [{"parent_id": "p9"}], [])
+        assert "new chunk" not in tokenize_calls  # reloaded from the store, the delta is ignored
+        assert len(retriever.bm25) == 3
+
+
+class TestSearchOffEventLoop:
+
+    def test_search_stages_run_on_the_executor(self, store, monkeypatch):
+        retriever = ContextRetriever(embedding_engine=FakeEmbeddingEngine(), vector_store=store)
+        threads = []
+        real_search = retriever.bm25.search
+
+        def recording_search(tokens, top_k, filters=None):
+            threads.append(threading.current_thread().name)
+            return real_search(tokens, top_k, filters)
+
+        monkeypatch.setattr(retriever.bm25, "search", recording_search)
+
+        async def run():
+            return threading.current_thread().name, await retriever.retrieve("refund policy", top_k=2)
+
+        loop_thread, docs = asyncio.run(run())
+        stages = retriever.executor.stats.stages
+
+        assert threads and all(name.startswith("search") and name != loop_thread for name in threads)
+        assert {"embed", "vector", "tokenize", "bm25", "parents"} <= set(stages)
+        assert retriever.executor.queue_depth == 0 and retriever.executor.stats.running == 0
+
+
+class SlowEmbeddingEngine(FakeEmbeddingEngine):
+
+    def __init__(self, events):
+        self.events = events
+
+    async def embed(self, texts):
+        self.events.append("embed start")
+        await asyncio.sleep(0.2)
+        self.events.append("embed end")
+        return await super().embed(texts)
+
+
+class TestHybridFusion:
+
+    def test_lexical_search_overlaps_embedding(self, store, monkeypatch):
+        events = []
+        retriever = ContextRetriever(embedding_engine=SlowEmbeddingEngine(events), vector_store=store)
+        real_search = retriever.bm25.search
+        monkeypatch.setattr(
+            retriever.bm25, "search",
+            lambda tokens, top_k, filters=None: events.append("bm25") or real_search(tokens, top_k, filters),
+        )
+
+        asyncio.run(retriever.search("refund policy", top_k=2))
+
+        assert events.index("bm25") < events.index("embed end")
+
+    def test_hits_record_contributing_retrievers(self, store):
+        retriever = ContextRetriever(embedding_engine=FakeEmbeddingEngine(), vector_store=store)
+        for i, text in enumerate(["refund policy thirty days", "pricing basic plan", "support hours bangkok"]):
+            store.add_parent_document(f"p{i}", text)
+        store.save_parent_docs()
+
+        hits = asyncio.run(retriever.search("refund policy", top_k=2))
+        by_parent = {hit.parent_id: hit for hit in hits}
+
+        assert by_parent["p0"].ranks.get("bm25") == 1
+        assert by_parent["p0"].document == "refund policy thirty days"
+        assert all(set(hit.ranks) <= {"vector", "bm25"} and hit.ranks for hit in hits)
+        assert hits == sorted(hits, key=lambda hit: hit.score, reverse=True)
+
+
+@pytest.fixture
+def mixed_store(tmp_path):
+    store = VectorStore(persist_dir=str(tmp_path / "index"), collection_name="kbase", backend="numpy")
+    rows = {
+        "notion:refunds": ("notion", "refund policy thirty days"),
+        "notion:hours": ("notion", "support hours bangkok"),
+        "sheets:1": ("sheets", "order 1 refund pending"),
+        "sheets:2": ("sheets", "order 2 pricing basic plan"),
+    }
+    for i, (parent_id, (source, text)) in enumerate(rows.items()):
+        store.upsert_children(
+            [f"{parent_id}#0"], [text], [[1.0, float(i), 0.0]], [{"parent_id": parent_id, "source": source}]
+        )
+        store.add_parent_document(parent_id, text)
+    store.save_parent_docs()
+    return store
+
+
+class TestFilteredRetrieval:
+
+    def test_explicit_filters_restrict_both_searches(self, mixed_store):
+        retriever = ContextRetriever(embedding_engine=FakeEmbeddingEngine(), vector_store=mixed_store)
+
+        hits = asyncio.run(retriever.search("refund", top_k=3, filters={"source": "sheets"}))
+        everything = asyncio.run(retriever.search("refund", top_k=3, filters={}))
+
+        assert hits and {hit.parent_id for hit in hits} <= {"sheets:1", "sheets:2"}
+        assert "notion:refunds" in {hit.parent_id for hit in everything}
+        assert "search[source=sheets]" in retriever.executor.stats.stages
+        assert "search[all]" in retriever.executor.stats.stages
+
+    def test_router_picks_filters_and_falls_back_when_empty(self, mixed_store):
+        class FixedRouter:
+            def __init__(self, source):
+                self.source = source
+
+            def route(self, query):
+                return {"source": frozenset({self.source})}
+
+        retriever = ContextRetriever(
+            embedding_engine=FakeEmbeddingEngine(), vector_store=mixed_store, router=FixedRouter("notion")
+        )
+        assert {hit.parent_id for hit in asyncio.run(retriever.search("refund", top_k=3))} <= {
+            "notion:refunds", "notion:hours"
+        }
+
+        retriever.router = FixedRouter("web")
+        retriever.retrieval_cache.clear()
+        assert asyncio.run(retriever.search("refund", top_k=3))
+        assert {"search[source=web]", "search[all]"} <= set(retriever.executor.stats.stages)
+
+
+class CountingEmbeddingEngine(FakeEmbeddingEngine):
+
+    def __init__(self):
+        self.calls = 0
+
+    async def embed(self, texts):
+        self.calls += 1
+        return await super().embed(texts)
+
+
+class TestRetrievalCache:
+
+    def test_repeated_query_skips_search_until_index_changes(self, mixed_store):
+        engine = CountingEmbeddingEngine()
+        retriever = ContextRetriever(embedding_engine=engine, vector_store=mixed_store)
+
+        first = asyncio.run(retriever.search("refund policy", top_k=3))
+        again = asyncio.run(retriever.search("  refund   policy ", top_k=3))
+        assert engine.calls == 1 and retriever.retrieval_cache.hits == 1
+        assert [(h.parent_id, h.score, h.ranks, h.document) for h in again] == [
+            (h.parent_id, h.score, h.ranks, h.document) for h in first
+        ]
+
+        asyncio.run(retriever.search("refund policy", top_k=2))
+        asyncio.run(retriever.search("refund policy", top_k=3, filters={"source": "notion"}))
+        assert engine.calls == 3
+
+        mixed_store.add_parent_document("notion:refunds", "refund policy sixty days")
+        mixed_store.save_parent_docs()  # Bumps the index version
+        updated = asyncio.run(retriever.search("refund policy", top_k=3))
+        assert engine.calls == 4 and len(retriever.retrieval_cache) == 1
+        assert "refund policy sixty days" in [hit.document for hit in updated]
+
+    def test_failed_search_is_not_cached(self, mixed_store):
+        class FailingEngine:
+            async def embed(self, texts):
+                raise RuntimeError("API down")
+
+        retriever = ContextRetriever(embedding_engine=FailingEngine(), vector_store=mixed_store)
+        assert asyncio.run(retriever.search("refund policy", top_k=3))  # BM25 still answers
+        assert len(retriever.retrieval_cache) == 0
@@ -4,7 +4,7 @@ from unittest.mock import MagicMock, patch
 
 import pytest
 
-from core.ai_support_bot.rag.sheets_fetcher import SheetsFetcher, SheetRow
+from core.ai_support_bot.rag.sheets_fetcher import SheetsFetcher, SheetRow, _rows_from_values
 
 
 class TestSheetsFetcherWithMock:
@@ -88,3 +88,104 @@ class TestSheetsFetcherWithMock:
         rows = fetcher.fetch_all_rows(["Sheet1", "Sheet2"])
         # Each sheet call returns 2 rows, 2 sheets = 4 total
         assert len(rows) == 4
+
+
+class TestSheetsBatchFetch:
+    """fetch_spreadsheet_rows should cost two round trips regardless of tab count."""
+
+    def _fetcher(self, titles: list[str], grids: dict[str, list[list[str]]]):
+        fetcher = SheetsFetcher(credentials=MagicMock())
+        service = MagicMock()
+        spreadsheets = service.spreadsheets.return_value
+        spreadsheets.get.return_value.execute.return_value = {
+            "sheets": [{"properties": {"title": t}} for t in titles]
+        }
+
+        def batch_get(spreadsheetId, ranges, **kwargs):
+            request = MagicMock()
+            request.execute.return_value = {
+                "valueRanges": [{"values": grids[r.strip("'").replace("''", "'")]} for r in ranges]
+            }
+            return request
+
+        spreadsheets.values.return_value.batchGet.side_effect = batch_get
+        fetcher._service = service
+        return fetcher, spreadsheets
+
+    def test_fetches_whitelisted_tabs_in_one_batch(self):
+        fetcher, spreadsheets = self._fetcher(
+            ["Plans", "Internal", "FAQ's"],
+            {
+                "Plans": [["Name", "Price"], ["Basic", "$10"]],
+                "FAQ's": [["Q", "A"], ["Refund?", "Yes"], ["Trial?", "7 days"]],
+            },
+        )
+        rows = fetcher.fetch_spreadsheet_rows("sid", ["Plans", "FAQ's"])
+
+        assert {name: len(r) for name, r in rows.items()} == {"Plans": 1, "FAQ's": 2}
+        assert rows["Plans"][0].text == "Name: Basic | Price: $10"
+        spreadsheets.get.assert_called_once_with(spreadsheetId="sid", fields="sheets.properties.title")
+        batch = spreadsheets.values.return_value.batchGet
+        batch.assert_called_once()
+        assert batch.call_args.kwargs["ranges"] == ["'Plans'", "'FAQ''s'"]
+        spreadsheets.values.return_value.get.assert_not_called()
+
+    def test_repeated_syncs_replace_cached_rows(self):
+        fetcher, _ = self._fetcher(["Plans"], {"Plans": [["Name", "Price"], ["Basic", "$10"]]})
+        for _ in range(3):
+            fetcher.fetch_spreadsheet_rows("sid", ["Plans"])
+        assert len(fetcher._cached_rows) == 1
+
+    def test_api_errors_propagate(self):
+        fetcher, spreadsheets = self._fetcher(["Plans"], {})
+        spreadsheets.values.return_value.batchGet.side_effect = ConnectionError("503")
+        with pytest.raises(ConnectionError):
+            fetcher.fetch_spreadsheet_rows("sid", ["Plans"])
+
+    def test_no_matching_tabs_skips_batch_get(self):
+        fetcher, spreadsheets = self._fetcher(["Internal"], {})
+        assert fetcher.fetch_spreadsheet_rows("sid", ["Plans"]) == {}
+        spreadsheets.values.return_value.batchGet.assert_not_called()
+
+
+class TestSheetRowKeys:
+    """Row IDs must not depend on row position."""
+
+    ORDERS = [
+        ["Order ID", "Item", "Status"],
+        ["A-1", "Shirt", "Paid"],
+        ["A-2", "Hat", "Shipped"],
+    ]
+
+    def test_key_columns_survive_row_insertion(self):
+        before = _rows_from_values(self.ORDERS, "sid", "Orders", ["Order ID"])
+        inserted = [self.ORDERS[0], ["A-0", "Socks", "New"], *self.ORDERS[1:]]
+        after = _rows_from_values(inserted, "sid", "Orders", ["Order ID"])
+
+        assert [r.id for r in before] == ["sheets_sid_Orders_A-1", "sheets_sid_Orders_A-2"]
+        assert {r.id for r in before} < {r.id for r in after}
+        assert after[1].title == "Orders - A-1"
+
+    def test_content_hash_keys_and_duplicates(self):
+        values = [["Q", "A"], ["Refund?", "Yes"], ["Refund?", "Yes"], ["Trial?", "7 days"]]
+        rows = _rows_from_values(values, "sid", "FAQ")
+        shifted = _rows_from_values([values[0], ["New?", "Row"], *values[1:]], "sid", "FAQ")
+
+        assert rows[1].id == rows[0].id + "~2"
+        assert [r.id for r in rows] == [r.id for r in shifted[1:]]
+        assert rows[0].title == "FAQ"
+
+    def test_diff_rows_against_committed_baseline(self):
+        fetcher = SheetsFetcher(credentials=MagicMock(), key_columns=["Order ID"])
+        rows = _rows_from_values(self.ORDERS, "sid", "Orders", fetcher.key_columns)
+        assert not fetcher.has_baseline("sid", "Orders")
+        assert len(fetcher.diff_rows("sid", "Orders", rows).inserted) == 2
+
+        fetcher.commit_rows("sid", "Orders", rows)
+        changed = [self.ORDERS[0], ["A-2", "Hat", "Delivered"], ["A-3", "Bag", "Paid"]]
+        delta = fetcher.diff_rows("sid", "Orders", _rows_from_values(changed, "sid", "Orders", fetcher.key_columns))
+
+        assert [r.key for r in delta.inserted] == ["A-3"]
+        assert [r.key for r in delta.updated] == ["A-2"]
+        assert delta.deleted == ["sheets_sid_Orders_A-1"]
+        assert delta.unchanged == 0
@@ -0,0 +1,197 @@
+"""Integration tests for blue/green index versions in VectorStore."""
+
+import asyncio
+
+import pytest
+
+from core.ai_support_bot.rag.ingestion import DataIngestionTask
+from core.ai_support_bot.rag.vector_store import VectorStore
+
+
+def _fill(index, parent_id: str, text: str, vector=(1.0, 0.0, 0.0)):
+    index.upsert_children([f"{parent_id}#0"], [text], [list(vector)], [{"parent_id": parent_id}])
+    index.add_parent_document(parent_id, text)
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = VectorStore(persist_dir=str(tmp_path / "chroma"), collection_name="kbase")
+    _fill(store, "old", "old document")
+    store.save_parent_docs()
+    return store
+
+
+def _collections(store) -> set[str]:
+    return {getattr(c, "name", c) for c in store.client.list_collections()}
+
+
+class TestBlueGreenRebuild:
+
+    def test_active_index_serves_until_commit(self, store):
+        shadow = store.begin_rebuild()
+        _fill(shadow, "new", "new document")
+
+        assert store.get_parent("old") == "old document"
+        assert [meta["parent_id"] for _, _, meta in store.query([1.0, 0.0, 0.0])] == ["old"]
+
+        before = store.index_version
+        store.commit_rebuild(shadow, expected_children=1)
+
+        assert store.get_parent("new") == "new document"
+        assert store.get_parent("old") is None
+        assert store.index_version != before
+        assert _collections(store) == {"kbase__v1"}
+
+    def test_pointer_survives_restart(self, store, tmp_path):
+        shadow = store.begin_rebuild()
+        _fill(shadow, "new", "new document")
+        store.commit_rebuild(shadow)
+
+        reopened = VectorStore(persist_dir=str(tmp_path / "chroma"), collection_name="kbase")
+        assert reopened.get_parent("new") == "new document"
+        assert reopened.count() == 1
+        assert reopened.index_version == store.index_version
+
+    def test_old_version_dropped_after_last_reader(self, store):
+        shadow = store.begin_rebuild()
+        _fill(shadow, "new", "new document")
+
+        with store.reading() as pinned:
+            store.commit_rebuild(shadow)
+            assert "kbase" in _collections(store)
+            assert pinned.get_parent("old") == "old document"
+            assert pinned.query([1.0, 0.0, 0.0])
+        assert _collections(store) == {"kbase__v1"}
+
+    def test_failed_validation_keeps_current_index(self, store):
+        shadow = store.begin_rebuild()
+        with pytest.raises(ValueError):
+            store.commit_rebuild(shadow)
+        store.abort_rebuild(shadow)
+
+        assert store.get_parent("old") == "old document"
+        assert _collections(store) == {"kbase"}
+
+    def test_reset_collection_commits_on_exit(self, store):
+        with store.reset_collection(expected_children=1) as shadow:
+            _fill(shadow, "new", "new document")
+            assert store.get_parent("old") == "old document"
+
+        assert store.get_parent("new") == "new document"
+        assert _collections(store) == {"kbase__v1"}
+
+    def test_reset_collection_never_serves_an_empty_index(self, store):
+        with pytest.raises(ValueError), store.reset_collection():
+            pass
+
+        assert store.get_parent("old") == "old document"
+        assert store.count() == 1
+        assert _collections(store) == {"kbase"}
+
+    def test_legacy_parent_json_is_migrated(self, tmp_path):
+        persist = tmp_path / "legacy"
+        persist.mkdir()
+        (persist / "parent_docs.json").write_text('{"notion:a": "legacy doc"}', encoding="utf-8")
+
+        store = VectorStore(persist_dir=str(persist), collection_name="kbase")
+        assert store.get_parent("notion:a") == "legacy doc"
+        assert not (persist / "parent_docs.json").exists()
+
+    def test_orphaned_shadow_removed_on_startup(self, store, tmp_path):
+        _fill(store.begin_rebuild(), "half", "half-built")  # crash before commit
+
+        VectorStore(persist_dir=str(tmp_path / "chroma"), collection_name="kbase")
+        assert _collections(store) == {"kbase"}
+
+
+class TestChildBulkApi:
+
+    def test_upsert_is_chunked_and_idempotent(self, store):
+        store._active.vectors.max_batch_size = 2
+        ids = [f"p1#{i}" for i in range(5)]
+        vectors = [[1.0, float(i), 0.0] for i in range(5)]
+        metas = [{"parent_id": "p1"}] * 5
+        store.upsert_children(ids, [f"chunk {i}" for i in range(5)], vectors, metas)
+        store.upsert_children(ids, [f"chunk {i}" for i in range(5)], vectors, metas)
+
+        assert store.count() == 6  # 5 new + the fixture's "old#0"
+        assert store.get_ids_by_parent(["p1", "missing"]) == {"p1": set(ids)}
+
+    def test_delete_by_parent(self, store):
+        _fill(store, "p2", "second parent")
+        assert store.delete_by_parent(["old", "missing"]) == ["old#0"]
+        assert set(store.get_indexed_children()) == {"p2#0"}
+
+    def test_add_documents_uses_deterministic_ids(self, store):
+        for _ in range(2):
+            store.add_documents(["same text"], [[0.0, 1.0, 0.0]], [{"parent_id": "p3"}])
+        assert len(store.get_ids_by_parent(["p3"])["p3"]) == 1
+
+
+class FakeEmbeddingEngine:
+
+    async def embed(self, texts):
+        return [[1.0, float(len(t) % 5), 0.5] for t in texts]
+
+    async def embed_batch(self, texts):
+        return await self.embed(texts)
+
+
+class TestFullIngestionSwap:
+
+    def test_queries_see_old_index_during_full_rebuild(self, store):
+        task = DataIngestionTask(embedding_engine=FakeEmbeddingEngine(), vector_store=store)
+        seen_during_build = []
+
+        async def source(emit):
+            await emit("[New]\nbrand new knowledge base entry", {"source": "notion", "id": "new"})
+            seen_during_build.append(store.get_parent("old"))
+
+        stats = asyncio.run(task._sync_index([source], full=True))
+
+        assert not stats.failed
+        assert seen_during_build == ["old document"]
+        assert store.list_parent_ids() == ["notion:new"]
+
+    def test_failed_source_aborts_full_rebuild(self, store):
+        task = DataIngestionTask(embedding_engine=FakeEmbeddingEngine(), vector_store=store)
+
+        async def broken(emit):
+            await emit("[New]\nbrand new knowledge base entry", {"source": "notion", "id": "new"})
+            raise ConnectionError("Notion unavailable")
+
+        stats = asyncio.run(task._sync_index([broken], full=True))
+
+        assert stats.failed
+        assert store.list_parent_ids() == ["old"]
+        assert _collections(store) == {"kbase"}
+
+
+class TestNumpyBackendStore:
+
+    def test_blue_green_rebuild_with_numpy_backend(self, tmp_path):
+        persist = tmp_path / "vectors"
+        store = VectorStore(persist_dir=str(persist), collection_name="kbase", backend="numpy")
+        assert store.client is None
+        _fill(store, "old", "old document")
+        store.save_parent_docs()
+
+        shadow = store.begin_rebuild()
+        _fill(shadow, "new", "new document")
+        store.commit_rebuild(shadow, expected_children=1)
+
+        reopened = VectorStore(persist_dir=str(persist), collection_name="kbase", backend="numpy")
+        assert [meta["parent_id"] for _, _, meta in reopened.query([1.0, 0.0, 0.0])] == ["new"]
+        assert sorted(p.name for p in persist.glob("vectors.*")) == ["vectors.kbase__v1"]
+
+    def test_unknown_backend_rejected(self, tmp_path):
+        with pytest.raises(ValueError):
+            VectorStore(persist_dir=str(tmp_path), backend="faiss")
+
+    def test_chroma_query_applies_filters(self, store):
+        store.upsert_children(
+            ["row#0"], ["order row"], [[1.0, 0.0, 0.0]], [{"parent_id": "row", "source": "sheets"}]
+        )
+
+        assert [meta["parent_id"] for _, _, meta in store.query([1.0, 0.0, 0.0], 5, {"source": "sheets"})] == ["row"]
+        assert len(store.query([1.0, 0.0, 0.0], 5)) == 2
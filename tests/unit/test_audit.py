@@ -58,6 +58,20 @@ class TestAuditLogging:
         record = json.loads(lines[-1])
         assert record["error"] == "Gemini timeout"
 
+    def test_log_interaction_semantic_similarity(self):
+        log_interaction(
+            user_id=1,
+            channel_id=2,
+            input_length=10,
+            response_length=50,
+            cache_hit=True,
+            tokens_used=0,
+            latency_ms=20,
+            semantic_similarity=0.934567,
+        )
+        record = json.loads(self.log_file.read_text().strip().split("\n")[-1])
+        assert record["semantic_similarity"] == 0.9346
+
     def test_log_interaction_no_message_content(self):
         """Verify that actual message content is NEVER logged (privacy)."""
         log_interaction(
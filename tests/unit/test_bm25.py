@@ -0,0 +1,166 @@
+"""Unit tests for the sparse BM25 index (checked against rank_bm25.BM25Okapi)."""
+
+import random
+
+import numpy as np
+import pytest
+
+from core.ai_support_bot.rag import bm25 as bm25_module
+from core.ai_support_bot.rag.bm25 import BM25Index, load_snapshot, save_snapshot
+from core.ai_support_bot.rag.filters import normalize_filters
+
+rank_bm25 = pytest.importorskip("rank_bm25")
+
+
+def _corpus(n_docs: int = 300, vocab: int = 80, seed: int = 1) -> list[list[str]]:
+    rng = random.Random(seed)
+    words = [f"w{i}" for i in range(vocab)]
+    # Skewed word choice so some terms appear in most documents (negative IDF)
+    return [
+        [words[min(int(rng.expovariate(0.08)), vocab - 1)] for _ in range(rng.randint(0, 40))]
+        for _ in range(n_docs)
+    ]
+
+
+class TestBM25Index:
+
+    @pytest.mark.parametrize("query", [["w0"], ["w1", "w7", "w30"], ["w2", "w2", "w5"], ["missing"], []])
+    def test_scores_match_bm25okapi(self, query):
+        corpus = _corpus()
+        reference = rank_bm25.BM25Okapi(corpus)
+        index = BM25Index(corpus)
+
+        np.testing.assert_allclose(index.get_scores(query), reference.get_scores(query), rtol=1e-9, atol=1e-12)
+
+    def test_search_matches_full_sort(self):
+        corpus = _corpus()
+        reference = rank_bm25.BM25Okapi(corpus)
+        index = BM25Index(corpus)
+
+        for query in (["w3", "w9"], ["w0", "w1", "w2"], ["w60"]):
+            scores = reference.get_scores(query)
+            expected = [i for i in sorted(range(len(scores)), key=lambda i: scores[i], reverse=True)[:10]
+                        if scores[i] > 0]
+            assert [doc for doc, _ in index.search(query, 10)] == expected
+
+    def test_ties_keep_document_order(self):
+        index = BM25Index([["a", "b"], ["c", "d"], ["a", "b"], ["a", "b"], ["e", "f"]])
+        assert [doc for doc, _ in index.search(["a"], 2)] == [0, 2]
+
+    def test_no_match_and_empty_corpus(self):
+        assert BM25Index([["a"], ["b"]]).search(["z"], 5) == []
+        assert BM25Index([]).search(["a"], 5) == []
+
+
+class TestIncrementalUpdates:
+
+    def _reference_ranking(self, docs: dict[str, list[str]], query, top_k=10):
+        keys = list(docs)
+        scores = rank_bm25.BM25Okapi(list(docs.values())).get_scores(query)
+        ranked = sorted(range(len(scores)), key=lambda i: scores[i], reverse=True)[:top_k]
+        return [keys[i] for i in ranked if scores[i] > 0], scores
+
+    def test_add_and_remove_match_a_fresh_build(self):
+        corpus = _corpus()
+        docs = {f"c{i}": tokens for i, tokens in enumerate(corpus)}
+        index = BM25Index(corpus[:200], keys=list(docs)[:200])
+
+        index = index.add_documents(list(docs)[200:], corpus[200:])
+        removed = [f"c{i}" for i in range(0, 300, 7)]
+        index = index.remove_documents(removed + ["missing"])
+        for key in removed:
+            del docs[key]
+
+        for query in (["w0"], ["w3", "w9"], ["w1", "w1", "w40"]):
+            expected, scores = self._reference_ranking(docs, query)
+            assert [index.key(slot) for slot, _ in index.search(query, 10)] == expected
+            live_slots = np.flatnonzero(~np.concatenate(index.deleted))
+            np.testing.assert_allclose(index.get_scores(query)[live_slots], scores, rtol=1e-9, atol=1e-12)
+
+    def test_updates_are_copy_on_write(self):
+        corpus = [["a", "b"], ["c"], ["e"], ["f"], ["g"]]
+        index = BM25Index(corpus, keys=list("xyzuv"), metas=[{"parent_id": f"p{i}"} for i in range(5)])
+        updated = index.add_documents(["x"], [["c", "d"]], [{"parent_id": "p9"}])
+
+        assert [index.meta(slot)["parent_id"] for slot, _ in index.search(["a"], 5)] == ["p0"]
+        assert updated.search(["a"], 5) == []
+        assert [updated.meta(slot)["parent_id"] for slot, _ in updated.search(["d"], 5)] == ["p9"]
+        assert len(index) == 5 and len(updated) == 5
+        assert updated.segments[0] is index.segments[0]
+
+    def test_segments_merge_without_changing_scores(self, monkeypatch):
+        monkeypatch.setattr(bm25_module, "MAX_SEGMENTS", 2)
+        corpus = _corpus(n_docs=60)
+        index = BM25Index(corpus[:20], keys=[f"c{i}" for i in range(20)])
+        for start in (20, 40):
+            index = index.add_documents([f"c{i}" for i in range(start, start + 20)], corpus[start:start + 20])
+        index = index.remove_documents(["c3"])
+
+        assert len(index.segments) == 1 and index.deleted_count == 1
+        fresh = BM25Index([tokens for i, tokens in enumerate(corpus) if i != 3])
+        for query in (["w2"], ["w5", "w11"]):
+            assert [s for _, s in index.search(query, 8)] == pytest.approx([s for _, s in fresh.search(query, 8)])
+
+
+class TestSnapshot:
+
+    def test_round_trip_is_memory_mapped(self, tmp_path):
+        corpus = _corpus()
+        metas = [{"parent_id": f"p{i}"} for i in range(len(corpus))]
+        index = BM25Index(corpus, metas=metas)
+        save_snapshot(index, tmp_path / "bm25", "v0.r3")
+
+        loaded = load_snapshot(tmp_path / "bm25", "v0.r3", expected_docs=len(corpus))
+        assert loaded.meta(5) == metas[5]
+        assert isinstance(loaded.segments[0].doc_ids, np.memmap)
+        assert loaded.search(["w1", "w7"], 10) == index.search(["w1", "w7"], 10)
+
+    def test_incremental_save_writes_only_new_segment(self, tmp_path):
+        index = BM25Index([[letter] for letter in "abcdefghij"], keys=list("qrstuvwxyz"))
+        save_snapshot(index, tmp_path / "bm25", "v0.r1")
+        base_glob = f"{index.segments[0].name}.*"
+        base_files = {p.name: p.stat().st_mtime_ns for p in (tmp_path / "bm25").glob(base_glob)}
+        assert base_files
+
+        updated = index.remove_documents(["r"]).add_documents(["z"], [["b", "c"]])
+        save_snapshot(updated, tmp_path / "bm25", "v0.r2")
+        loaded = load_snapshot(tmp_path / "bm25", "v0.r2", expected_docs=9)
+
+        assert {p.name: p.stat().st_mtime_ns for p in (tmp_path / "bm25").glob(base_glob)} == base_files
+        assert [loaded.key(slot) for slot, _ in loaded.search(["b"], 5)] == ["z"]
+        assert not list((tmp_path / "bm25").glob("*.v0.r1.*"))
+
+    def test_rebuilt_index_replaces_previous_snapshot(self, tmp_path):
+        old = BM25Index([["alpha"], ["beta"], ["beta"]], keys=["a1", "a2", "a3"])
+        save_snapshot(old, tmp_path / "bm25", "v1.r4")
+        rebuilt = BM25Index([["gamma"], ["delta"], ["delta"]], keys=["b1", "b2", "b3"])  # Fresh build, same directory
+        save_snapshot(rebuilt, tmp_path / "bm25", "v1.r5")
+
+        loaded = load_snapshot(tmp_path / "bm25", "v1.r5", expected_docs=3)
+        assert [loaded.key(slot) for slot in range(3)] == ["b1", "b2", "b3"]
+        assert [loaded.key(slot) for slot, _ in loaded.search(["gamma"], 5)] == ["b1"]
+        assert {path.name.split(".")[0] for path in (tmp_path / "bm25").glob("seg-*")} == {rebuilt.segments[0].name}
+
+    def test_stale_or_missing_snapshot_is_ignored(self, tmp_path):
+        save_snapshot(BM25Index([["a"], ["b"]]), tmp_path / "bm25", "v0.r1")
+
+        assert load_snapshot(tmp_path / "bm25", "v0.r2") is None
+        assert load_snapshot(tmp_path / "bm25", "v0.r1", expected_docs=3) is None
+        assert load_snapshot(tmp_path / "missing", "v0.r1") is None
+
+
+class TestFilteredSearch:
+
+    def test_filter_restricts_scoring_to_matching_documents(self):
+        corpus = _corpus()
+        metas = [{"source": "sheets" if i % 4 == 0 else "notion"} for i in range(len(corpus))]
+        index = BM25Index(corpus[:200], metas=metas[:200]).add_documents(
+            [str(i) for i in range(200, 300)], corpus[200:], metas[200:]
+        )
+        filters = normalize_filters({"source": "sheets"})
+
+        for query in (["w0"], ["w3", "w9"]):
+            scores = index.get_scores(query)
+            expected = [slot for slot in np.argsort(-scores, kind="stable")
+                        if index.meta(int(slot))["source"] == "sheets" and scores[slot] > 0][:10]
+            assert [slot for slot, _ in index.search(query, 10, filters)] == [int(s) for s in expected]
@@ -0,0 +1,107 @@
+"""Unit tests for the persistent embedding cache."""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from core.ai_support_bot.ai.embedding import EmbeddingEngine
+from core.ai_support_bot.cache.embedding_cache import EmbeddingCache
+
+MODEL = "openai/text-embedding-3-small"
+
+
+@pytest.fixture
+def cache(tmp_path):
+    c = EmbeddingCache(tmp_path / "emb.sqlite3", max_entries=100)
+    yield c
+    c.close()
+
+
+class TestEmbeddingCache:
+    """Test suite for EmbeddingCache class."""
+
+    def test_put_and_get(self, cache):
+        cache.put_many(MODEL, ["hello"], [[0.5, -1.0, 2.0]])
+        assert cache.get_many(MODEL, ["hello"]) == [[0.5, -1.0, 2.0]]
+
+    def test_miss_returns_none(self, cache):
+        assert cache.get_many(MODEL, ["nothing"]) == [None]
+
+    def test_model_isolation(self, cache):
+        cache.put_many(MODEL, ["hello"], [[1.0, 2.0]])
+        assert cache.get_many("openai/text-embedding-3-large", ["hello"]) == [None]
+
+    def test_hit_miss_counters(self, cache):
+        cache.put_many(MODEL, ["a"], [[1.0]])
+        cache.get_many(MODEL, ["a", "b", "a"])
+        stats = cache.stats()
+        assert stats["hits"] == 2
+        assert stats["misses"] == 1
+        assert stats["size"] == 1
+
+    def test_persists_across_instances(self, tmp_path):
+        path = tmp_path / "emb.sqlite3"
+        first = EmbeddingCache(path)
+        first.put_many(MODEL, ["สินค้าราคาเท่าไหร่"], [[0.25, 0.75]])
+        first.close()
+
+        second = EmbeddingCache(path)
+        assert second.get_many(MODEL, ["สินค้าราคาเท่าไหร่"]) == [[0.25, 0.75]]
+        second.close()
+
+    def test_lru_eviction(self, tmp_path):
+        cache = EmbeddingCache(tmp_path / "emb.sqlite3", max_entries=2)
+        cache.put_many(MODEL, ["a"], [[1.0]])
+        cache.put_many(MODEL, ["b"], [[2.0]])
+        cache.get_many(MODEL, ["a"])  # "b" is now least recently used
+        cache.put_many(MODEL, ["c"], [[3.0]])
+
+        assert cache.size() == 2
+        assert cache.get_many(MODEL, ["a", "b", "c"]) == [[1.0], None, [3.0]]
+        cache.close()
+
+    def test_clear(self, cache):
+        cache.put_many(MODEL, ["a", "b"], [[1.0], [2.0]])
+        assert cache.clear() == 2
+        assert cache.size() == 0
+
+
+class TestEmbeddingEngineWithCache:
+    """EmbeddingEngine should only send cache misses to the API."""
+
+    def test_only_misses_are_requested(self, cache):
+        engine = EmbeddingEngine(api_key="test", model=MODEL, cache=cache)
+        requested: list[list[str]] = []
+
+        async def fake_request(texts):
+            requested.append(list(texts))
+            return [[float(len(t))] for t in texts]
+
+        engine._request_embeddings = fake_request
+
+        first = asyncio.run(engine.embed(["aa", "bbb", "aa"]))
+        assert first == [[2.0], [3.0], [2.0]]
+        assert requested == [["aa", "bbb"]]
+
+        second = asyncio.run(engine.embed(["bbb", "cccc"]))
+        assert second == [[3.0], [4.0]]
+        assert requested[-1] == ["cccc"]
+
+    def test_reduced_dimensions_are_cached_separately(self, cache):
+        full = EmbeddingEngine(api_key="test", model=MODEL, cache=cache)
+        short = EmbeddingEngine(api_key="test", model=MODEL, cache=cache, dimensions=256)
+        calls = []
+
+        class FakeEmbeddings:
+            async def create(self, **kwargs):
+                calls.append(kwargs)
+                size = kwargs.get("dimensions", 4)
+                return SimpleNamespace(data=[SimpleNamespace(embedding=[1.0] * size) for _ in kwargs["input"]])
+
+        full.client = short.client = SimpleNamespace(embeddings=FakeEmbeddings())
+
+        assert len(asyncio.run(full.embed(["hello"]))[0]) == 4
+        assert len(asyncio.run(short.embed(["hello"]))[0]) == 256
+        assert "dimensions" not in calls[0] and calls[1]["dimensions"] == 256
+        assert short.cache_key == f"{MODEL}@256"
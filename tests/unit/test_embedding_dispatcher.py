@@ -0,0 +1,106 @@
+"""Unit tests for the token-budgeted embedding dispatcher."""
+
+import asyncio
+
+import pytest
+
+from core.ai_support_bot.ai.embedding_dispatcher import EmbeddingDispatcher, estimate_tokens
+
+
+class PayloadTooLarge(Exception):
+    status_code = 413
+
+
+class FakeEngine:
+    """Embeds each text as [index-in-input]; tracks concurrency."""
+
+    def __init__(self, max_items: int | None = None, fail_times: int = 0, delay: float = 0.0):
+        self.max_items = max_items
+        self.fail_times = fail_times
+        self.delay = delay
+        self.batches: list[list[str]] = []
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    async def embed_batch(self, texts):
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+            if self.fail_times > 0:
+                self.fail_times -= 1
+                raise ConnectionError("transient")
+            if self.max_items is not None and len(texts) > self.max_items:
+                raise PayloadTooLarge("payload too large")
+            self.batches.append(list(texts))
+            return [[float(t.split("-")[1])] for t in texts]
+        finally:
+            self.in_flight -= 1
+
+
+def _texts(n: int, size: int = 10) -> list[str]:
+    return [f"t-{i}-" + "x" * size for i in range(n)]
+
+
+class TestEstimateTokens:
+
+    def test_thai_counts_more_than_ascii(self):
+        assert estimate_tokens("ราคาเท่าไหร่") > estimate_tokens("how much")
+
+
+class TestEmbeddingDispatcher:
+
+    def test_preserves_order(self):
+        engine = FakeEngine(delay=0.001)
+        dispatcher = EmbeddingDispatcher(engine, max_batch_tokens=20, max_concurrency=3)
+        vectors = asyncio.run(dispatcher.embed(_texts(25)))
+        assert vectors == [[float(i)] for i in range(25)]
+
+    def test_packs_by_token_budget(self):
+        dispatcher = EmbeddingDispatcher(FakeEngine(), max_batch_tokens=10)
+        texts = ["a" * 16, "b" * 16, "ก" * 7, "c" * 4]  # 5, 5, 8, 2 tokens
+        assert dispatcher.pack_batches(texts) == [(0, 2), (2, 4)]
+
+    def test_concurrency_is_bounded(self):
+        engine = FakeEngine(delay=0.01)
+        dispatcher = EmbeddingDispatcher(engine, max_batch_items=1, max_concurrency=2)
+        asyncio.run(dispatcher.embed(_texts(8)))
+        assert engine.peak_in_flight == 2
+        assert dispatcher.last_stats.batches == 8
+
+    def test_concurrency_is_bounded_across_calls_and_stats_accumulate(self):
+        engine = FakeEngine(delay=0.01)
+        dispatcher = EmbeddingDispatcher(engine, max_batch_items=1, max_concurrency=2)
+
+        async def run():
+            await asyncio.gather(*(dispatcher.embed(_texts(4)) for _ in range(3)))
+
+        asyncio.run(run())
+        assert engine.peak_in_flight == 2
+        assert (dispatcher.last_stats.chunks, dispatcher.last_stats.batches) == (12, 12)
+        assert dispatcher.last_stats.elapsed_seconds > 0
+
+        previous = dispatcher.reset_stats()
+        asyncio.run(dispatcher.embed(_texts(2)))  # A new event loop gets its own semaphore
+        assert previous.batches == 12 and dispatcher.last_stats.batches == 2
+
+    def test_splits_on_payload_too_large(self):
+        engine = FakeEngine(max_items=3)
+        dispatcher = EmbeddingDispatcher(engine, max_batch_items=10)
+        vectors = asyncio.run(dispatcher.embed(_texts(10)))
+        assert vectors == [[float(i)] for i in range(10)]
+        assert all(len(b) <= 3 for b in engine.batches)
+        assert dispatcher.last_stats.splits > 0
+
+    def test_retries_transient_errors(self):
+        engine = FakeEngine(fail_times=2)
+        dispatcher = EmbeddingDispatcher(engine, base_delay=0.001)
+        vectors = asyncio.run(dispatcher.embed(_texts(3)))
+        assert len(vectors) == 3
+        assert dispatcher.last_stats.retries == 2
+
+    def test_gives_up_after_max_retries(self):
+        engine = FakeEngine(fail_times=10)
+        dispatcher = EmbeddingDispatcher(engine, max_retries=1, base_delay=0.001)
+        with pytest.raises(ConnectionError):
+            asyncio.run(dispatcher.embed(_texts(2)))
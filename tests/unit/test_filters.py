@@ -0,0 +1,67 @@
+"""Unit tests for metadata filters, secondary indexes and the query router."""
+
+import numpy as np
+import pytest
+
+from core.ai_support_bot.rag.filters import (
+    QueryRouter,
+    SecondaryIndex,
+    describe_filters,
+    matches,
+    normalize_filters,
+    to_chroma_where,
+)
+
+
+class TestFilters:
+
+    def test_normalize_and_describe(self):
+        filters = normalize_filters({"source": "sheets", "title": ["B", "A"]})
+
+        assert filters == {"source": frozenset({"sheets"}), "title": frozenset({"A", "B"})}
+        assert describe_filters(filters) == "source=sheets,title=A|B"
+        assert normalize_filters({}) is None and describe_filters(None) == "all"
+        with pytest.raises(ValueError):
+            normalize_filters({"parent_id": "p1"})
+
+    def test_matches_and_chroma_where(self):
+        filters = normalize_filters({"source": ["notion"], "title": "FAQ"})
+
+        assert matches({"source": "notion", "title": "FAQ"}, filters)
+        assert not matches({"source": "sheets", "title": "FAQ"}, filters)
+        assert to_chroma_where(normalize_filters({"source": "sheets"})) == {"source": {"$in": ["sheets"]}}
+        assert to_chroma_where(filters) == {
+            "$and": [{"source": {"$in": ["notion"]}}, {"title": {"$in": ["FAQ"]}}]
+        }
+
+
+class TestSecondaryIndex:
+
+    def test_rows_union_values_and_intersect_fields(self):
+        metas = [
+            {"source": "notion", "title": "FAQ"},
+            {"source": "sheets", "title": "Orders"},
+            {"source": "notion", "title": "Policy"},
+            {"source": "sheets", "title": "FAQ"},
+            {},
+        ]
+        index = SecondaryIndex(metas)
+
+        np.testing.assert_array_equal(index.rows(normalize_filters({"source": ["notion", "sheets"]})), [0, 1, 2, 3])
+        np.testing.assert_array_equal(index.rows(normalize_filters({"source": "sheets", "title": "FAQ"})), [3])
+        assert len(index.rows(normalize_filters({"source": "unknown"}))) == 0
+        assert index.mask(normalize_filters({"title": "Policy"})).tolist() == [False, False, True, False, False]
+
+
+class TestQueryRouter:
+
+    @pytest.mark.parametrize("query, source", [
+        ("ราคาแพ็กเกจเท่าไหร่", "sheets"),
+        ("Where is my ORDER?", "sheets"),
+        ("นโยบายการคืนเงินเป็นยังไง", "notion"),
+        ("ราคาและนโยบายคืนเงิน", None),
+        ("สวัสดีครับ", None),
+    ])
+    def test_routes_only_unambiguous_queries(self, query, source):
+        expected = {"source": frozenset({source})} if source else None
+        assert QueryRouter().route(query) == expected
@@ -0,0 +1,43 @@
+"""Unit tests for weighted Reciprocal Rank Fusion."""
+
+import pytest
+
+from core.ai_support_bot.rag.fusion import aggregate_by_parent, reciprocal_rank_fusion
+
+
+class TestReciprocalRankFusion:
+
+    def test_scores_sum_weighted_reciprocal_ranks(self):
+        fused = reciprocal_rank_fusion(
+            {"vector": [("a", "p1"), ("b", "p2")], "bm25": [("b", "p2"), ("c", "p3")]},
+            weights={"vector": 1.0, "bm25": 2.0},
+            k=10,
+        )
+
+        scores = {hit.child_id: hit.score for hit in fused}
+        assert scores == pytest.approx({"a": 1 / 11, "b": 1 / 12 + 2 / 11, "c": 2 / 12})
+        assert [hit.child_id for hit in fused] == ["b", "c", "a"]
+        assert fused[0].ranks == {"vector": 2, "bm25": 1} and fused[0].sources == ["bm25", "vector"]
+        assert fused[1].sources == ["bm25"]
+
+    def test_ties_keep_first_seen_order_and_duplicates_keep_best_rank(self):
+        fused = reciprocal_rank_fusion({"vector": [("a", "p1"), ("a", "p1")], "bm25": [("b", "p2")]})
+
+        assert [hit.child_id for hit in fused] == ["a", "b"]
+        assert fused[0].ranks == {"vector": 1}
+
+    def test_empty_rankings(self):
+        assert reciprocal_rank_fusion({"vector": [], "bm25": []}) == []
+
+
+class TestAggregateByParent:
+
+    def test_parent_keeps_best_child_and_merges_sources(self):
+        fused = reciprocal_rank_fusion(
+            {"vector": [("a1", "p1"), ("b1", "p2")], "bm25": [("b1", "p2"), ("a2", "p1")]}, k=10
+        )
+        parents = aggregate_by_parent(fused)
+
+        assert [hit.parent_id for hit in parents] == ["p2", "p1"]
+        assert parents[1].child_id == "a1" and parents[1].score == pytest.approx(1 / 11)
+        assert parents[1].ranks == {"vector": 1, "bm25": 2}
@@ -0,0 +1,42 @@
+"""Unit tests for the Notion page snapshot store."""
+
+import pytest
+
+from core.ai_support_bot.rag.notion_fetcher import NotionPage
+from core.ai_support_bot.rag.page_store import NotionPageStore
+
+
+def _page(page_id: str, content: str = "body", edited: str = "2026-01-01T00:00:00.000Z") -> NotionPage:
+    return NotionPage(id=page_id, title=f"Title {page_id}", content=content,
+                      url=f"https://notion.so/{page_id}", last_edited_time=edited)
+
+
+@pytest.fixture
+def store(tmp_path):
+    s = NotionPageStore(tmp_path / "pages.sqlite3")
+    yield s
+    s.close()
+
+
+class TestNotionPageStore:
+
+    def test_round_trip_keyed_by_normalized_id(self, store):
+        store.upsert([_page("aaaa-bbbb")])
+        loaded = store.load_all()
+        assert list(loaded) == ["aaaabbbb"]
+        assert loaded["aaaabbbb"] == _page("aaaa-bbbb")
+
+    def test_upsert_updates_in_place(self, store):
+        store.upsert([_page("p1", "old")])
+        store.upsert([_page("p1", "new", edited="2026-02-01T00:00:00.000Z")])
+        assert store.size() == 1
+        assert store.load_all()["p1"].content == "new"
+
+    def test_replace_all_drops_missing_pages(self, store):
+        store.upsert([_page("p1"), _page("p2")])
+        store.replace_all([_page("p2"), _page("p3")])
+        assert sorted(store.load_all()) == ["p2", "p3"]
+
+    def test_content_hash_tracks_content(self):
+        assert _page("p1", "a").content_hash == _page("p1", "a").content_hash
+        assert _page("p1", "a").content_hash != _page("p1", "b").content_hash
@@ -0,0 +1,75 @@
+"""Unit tests for the SQLite parent document store."""
+
+import json
+
+import pytest
+
+from core.ai_support_bot.rag import parent_store as parent_store_module
+from core.ai_support_bot.rag.parent_store import ParentStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ParentStore(tmp_path / "parents.sqlite3", cache_size=2)
+
+
+class TestParentStore:
+
+    def test_staged_writes_visible_before_commit(self, store, tmp_path):
+        store.put("a", "alpha")
+        assert store.get("a") == "alpha"
+        assert ParentStore(tmp_path / "parents.sqlite3").get("a") is None
+
+        store.commit()
+        assert ParentStore(tmp_path / "parents.sqlite3").get("a") == "alpha"
+
+    def test_rollback_discards_batch(self, store):
+        store.put("a", "alpha")
+        store.commit()
+        store.put("b", "bravo")
+        store.delete("a")
+        store.rollback()
+
+        assert store.ids() == ["a"]
+        assert store.get("b") is None
+
+    def test_delete_and_ids(self, store):
+        for pid in ("a", "b", "c"):
+            store.put(pid, pid * 3)
+        store.commit()
+        store.delete("b")
+        assert sorted(store.ids()) == ["a", "c"]
+        store.commit()
+        assert store.get("b") is None
+        assert len(store) == 2
+
+    def test_lru_is_bounded(self, store):
+        for pid in ("a", "b", "c"):
+            store.put(pid, pid)
+        store.commit()
+        assert len(store._cache) == 2
+        assert store.get("a") == "a"  # evicted, read back from SQLite
+        assert list(store._cache) == ["c", "a"]
+
+    def test_import_legacy_json(self, store, tmp_path):
+        legacy = tmp_path / "parent_docs.json"
+        legacy.write_text(json.dumps({"notion:x": "ข้อมูล"}), encoding="utf-8")
+        assert store.import_json(legacy) == 1
+        assert store.get("notion:x") == "ข้อมูล"
+
+    def test_large_bodies_compressed_when_zstd_available(self, tmp_path):
+        pytest.importorskip("zstandard")
+        store = ParentStore(tmp_path / "z.sqlite3", compress_min_bytes=10)
+        store.put("big", "x" * 1000)
+        store.commit()
+        (codec,) = store._conn.execute("SELECT codec FROM parents").fetchone()
+        assert codec == "zstd"
+        assert ParentStore(tmp_path / "z.sqlite3").get("big") == "x" * 1000
+
+    def test_raw_bodies_without_zstd(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(parent_store_module, "HAS_ZSTD", False)
+        store = ParentStore(tmp_path / "r.sqlite3", compress_min_bytes=10)
+        store.put("big", "x" * 1000)
+        store.commit()
+        (codec,) = store._conn.execute("SELECT codec FROM parents").fetchone()
+        assert codec == "raw"
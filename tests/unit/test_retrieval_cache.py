@@ -0,0 +1,45 @@
+"""Unit tests for the retrieval result LRU."""
+
+from core.ai_support_bot.rag.fusion import FusedHit
+from core.ai_support_bot.rag.retrieval_cache import RetrievalCache
+
+V1 = ("v0.r1", "v0.r1")
+V2 = ("v0.r2", "v0.r2")
+
+
+def _hits(*parent_ids):
+    return [FusedHit(f"{p}#0", p, 1.0 / (i + 1), {"vector": i + 1}, document=f"doc {p}") for i, p in enumerate(parent_ids)]
+
+
+class TestRetrievalCache:
+
+    def test_hit_returns_copies_without_documents(self):
+        cache = RetrievalCache()
+        assert cache.get(V1, ("q", 5, "all")) is None
+        cache.put(V1, ("q", 5, "all"), _hits("a", "b"))
+
+        cached = cache.get(V1, ("q", 5, "all"))
+        assert [hit.parent_id for hit in cached] == ["a", "b"] and cached[0].document == ""
+        cached[0].ranks["bm25"] = 1
+        assert cache.get(V1, ("q", 5, "all"))[0].ranks == {"vector": 1}
+        assert (cache.hits, cache.misses) == (2, 1)
+
+    def test_lru_eviction(self):
+        cache = RetrievalCache(max_entries=2)
+        cache.get(V1, ("a",))
+        for key in ("a", "b"):
+            cache.put(V1, (key,), _hits(key))
+        cache.get(V1, ("a",))
+        cache.put(V1, ("c",), _hits("c"))
+
+        assert cache.get(V1, ("b",)) is None
+        assert cache.get(V1, ("a",)) is not None and cache.get(V1, ("c",)) is not None
+
+    def test_new_version_invalidates_and_stale_puts_are_dropped(self):
+        cache = RetrievalCache()
+        cache.get(V1, ("q",))
+        cache.put(V1, ("q",), _hits("a"))
+
+        assert cache.get(V2, ("q",)) is None and len(cache) == 0
+        cache.put(V1, ("late",), _hits("b"))  # Finished after the index changed
+        assert len(cache) == 0
@@ -0,0 +1,58 @@
+"""Unit tests for the retrieval SearchExecutor."""
+
+import asyncio
+import threading
+
+from core.ai_support_bot.rag.search_executor import SearchExecutor
+
+
+class TestSearchExecutor:
+
+    def test_runs_off_the_event_loop_and_times_stages(self):
+        executor = SearchExecutor(max_workers=2)
+
+        async def run():
+            timings = {}
+            worker = await executor.run("vector", lambda: threading.current_thread().name, timings=timings)
+            return threading.current_thread().name, worker, timings
+
+        loop_thread, worker_thread, timings = asyncio.run(run())
+        executor.close()
+
+        assert worker_thread != loop_thread and worker_thread.startswith("search")
+        assert executor.stats.stages["vector"].calls == 1
+        assert "vector" in timings and executor.stats.queue_wait.calls == 1
+
+    def test_queue_depth_counts_jobs_waiting_for_a_worker(self):
+        executor = SearchExecutor(max_workers=1)
+        release = threading.Event()
+
+        async def run():
+            tasks = [asyncio.create_task(executor.run("bm25", release.wait)) for _ in range(3)]
+            while executor.stats.running == 0:
+                await asyncio.sleep(0.01)
+            depth = executor.queue_depth
+            release.set()
+            await asyncio.gather(*tasks)
+            return depth
+
+        assert asyncio.run(run()) == 2
+        executor.close()
+        assert executor.queue_depth == 0 and executor.stats.max_queued >= 2
+        assert executor.stats.stages["bm25"].calls == 3
+
+    def test_errors_propagate_and_are_still_timed(self):
+        executor = SearchExecutor(max_workers=1)
+
+        def boom():
+            raise ValueError("bad query")
+
+        async def run():
+            try:
+                await executor.run("parents", boom)
+            except ValueError as e:
+                return str(e)
+
+        assert asyncio.run(run()) == "bad query"
+        executor.close()
+        assert executor.stats.stages["parents"].calls == 1 and executor.stats.running == 0
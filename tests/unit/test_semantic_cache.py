@@ -0,0 +1,95 @@
+"""Unit tests for the semantic answer cache."""
+
+import time
+
+import numpy as np
+
+from core.ai_support_bot.cache.semantic_cache import SemanticCache
+
+V1 = ("v0.r1", "v0.r1")
+V2 = ("v0.r2", "v0.r2")
+
+
+def _vector(angle: float, dim: int = 8) -> np.ndarray:
+    """Unit vector at ``angle`` radians from the first axis (cosine = cos(angle))."""
+    vector = np.zeros(dim, dtype=np.float32)
+    vector[0], vector[1] = np.cos(angle), np.sin(angle)
+    return vector
+
+
+class TestSemanticCache:
+    """Test suite for SemanticCache class."""
+
+    def test_similar_question_hits(self):
+        cache = SemanticCache(threshold=0.9)
+        cache.lookup(_vector(0), V1)
+        cache.put(_vector(0) * 3, "answer", V1)
+
+        result = cache.lookup(list(_vector(0.1)), V1)  # cos(0.1) ≈ 0.995; unnormalized and list input both fine
+        assert result.hit and result.answer == "answer"
+        assert abs(result.similarity - np.cos(0.1)) < 1e-5
+        assert cache.stats.hits == 1
+
+    def test_near_miss_and_miss_are_counted(self):
+        cache = SemanticCache(threshold=0.9, near_miss_margin=0.1)
+        cache.lookup(_vector(0), V1)
+        cache.put(_vector(0), "answer", V1)
+
+        near = cache.lookup(_vector(np.arccos(0.85)), V1)
+        far = cache.lookup(_vector(np.pi / 2), V1)
+        assert not near.hit and abs(near.similarity - 0.85) < 1e-5
+        assert not far.hit and abs(far.similarity) < 1e-5
+        assert (cache.stats.hits, cache.stats.near_misses, cache.stats.misses) == (0, 1, 3)
+        assert "1 near" in cache.stats.summary()
+
+    def test_new_kb_version_invalidates_and_stale_puts_are_dropped(self):
+        cache = SemanticCache()
+        cache.lookup(_vector(0), V1)
+        cache.put(_vector(0), "old answer", V1)
+
+        assert not cache.lookup(_vector(0), V2).hit and cache.size() == 0
+        cache.put(_vector(0), "answer from the old KB", V1)
+        assert cache.size() == 0
+
+    def test_expired_entries_do_not_match(self):
+        cache = SemanticCache()
+        cache.lookup(_vector(0), V1)
+        cache.put(_vector(0), "answer", V1, ttl=0)
+        time.sleep(0.01)
+        assert not cache.lookup(_vector(0), V1).hit
+
+    def test_full_cache_replaces_least_recently_used(self):
+        cache = SemanticCache(max_entries=2, threshold=0.99)
+        cache.lookup(_vector(0), V1)
+        cache.put(_vector(0), "a", V1)
+        cache.put(_vector(np.pi / 2), "b", V1)
+        assert cache.lookup(_vector(0), V1).answer == "a"  # "b" is now least recently used
+
+        cache.put(_vector(np.pi), "c", V1)
+        assert cache.size() == 2
+        assert cache.lookup(_vector(np.pi / 2), V1).answer is None
+        assert cache.lookup(_vector(0), V1).answer == "a"
+        assert cache.lookup(_vector(np.pi), V1).answer == "c"
+
+    def test_grows_past_initial_rows(self):
+        cache = SemanticCache(max_entries=200, threshold=0.999)
+        cache.lookup(np.ones(4), V1)
+        rng = np.random.default_rng(0)
+        vectors = rng.normal(size=(150, 64)).astype(np.float32)
+        for i, vector in enumerate(vectors):
+            cache.put(vector, f"answer {i}", V1)
+
+        assert cache.size() == 150
+        assert cache.lookup(vectors[3], V1).answer == "answer 3"
+        assert cache.lookup(vectors[149], V1).answer == "answer 149"
+
+    def test_clear_and_disabled(self):
+        cache = SemanticCache()
+        cache.lookup(_vector(0), V1)
+        cache.put(_vector(0), "answer", V1)
+        assert cache.clear() == 1 and not cache.lookup(_vector(0), V1).hit
+
+        disabled = SemanticCache(max_entries=0)
+        disabled.lookup(_vector(0), V1)
+        disabled.put(_vector(0), "answer", V1)
+        assert disabled.size() == 0
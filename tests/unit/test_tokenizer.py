@@ -0,0 +1,57 @@
+"""Unit tests for the tokenization service."""
+
+import pytest
+
+from core.ai_support_bot.rag import tokenizer as tokenizer_module
+from core.ai_support_bot.rag.tokenizer import TokenizationService, normalize_query
+
+pytestmark = pytest.mark.skipif(not tokenizer_module.HAS_PYTHAINLP, reason="pythainlp not installed")
+
+DOCS = ["สวัสดีครับ ยินดีต้อนรับ", "ราคาแพ็กเกจเริ่มต้น 100 บาท", "refund policy", "ติดต่อฝ่ายบริการลูกค้า"] * 5
+
+
+class TestTokenizationService:
+
+    def test_parallel_corpus_matches_inline(self):
+        service = TokenizationService(processes=2, chunk_size=3)
+        try:
+            assert service.tokenize_corpus(DOCS) == TokenizationService(processes=1).tokenize_corpus(DOCS)
+            assert service._pool is not None
+            assert service._pool._mp_context.get_start_method() != "fork"
+        finally:
+            service.close()
+
+    def test_small_corpus_stays_inline(self):
+        service = TokenizationService(processes=4, chunk_size=256)
+        service.tokenize_corpus(DOCS)
+        assert service._pool is None
+
+    def test_query_cache_uses_normalized_query(self, monkeypatch):
+        calls = []
+        real = tokenizer_module.word_tokenize
+
+        def counting(text, engine):
+            calls.append(text)
+            return real(text, engine=engine)
+
+        monkeypatch.setattr(tokenizer_module, "word_tokenize", counting)
+        service = TokenizationService(query_cache_size=2)
+
+        first = service.tokenize_query("  ราคา   แพ็กเกจ ")
+        assert service.tokenize_query("ราคา แพ็กเกจ") == first
+        assert isinstance(first, tuple)  # Cached tokens can't be mutated by callers
+        assert calls == ["ราคา แพ็กเกจ"]
+        assert (service.query_hits, service.query_misses) == (1, 1)
+
+        service.tokenize_query("a")
+        service.tokenize_query("b")  # evicts the least recently used entry
+        service.tokenize_query("ราคา แพ็กเกจ")
+        assert calls.count("ราคา แพ็กเกจ") == 2
+
+    def test_warmup_runs_in_background(self):
+        thread = TokenizationService().start_warmup()
+        thread.join(timeout=30)
+        assert not thread.is_alive()
+
+    def test_normalize_query(self):
+        assert normalize_query(" hello \t world\n") == "hello world"
@@ -0,0 +1,208 @@
+"""Unit tests for the in-process NumPy vector backend."""
+
+import threading
+
+import numpy as np
+import pytest
+
+from core.ai_support_bot.rag import vector_backends
+from core.ai_support_bot.rag.filters import normalize_filters
+from core.ai_support_bot.rag.vector_backends import NumpyBackend
+
+
+def _rows(n: int, dim: int = 8, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    vectors = rng.normal(size=(n, dim)).astype(np.float32)
+    ids = [f"p{i % 3}#{i}" for i in range(n)]
+    return ids, [f"chunk {i}" for i in range(n)], vectors.tolist(), [{"parent_id": f"p{i % 3}"} for i in range(n)]
+
+
+@pytest.fixture
+def backend(tmp_path):
+    return NumpyBackend(tmp_path / "vectors.kb")
+
+
+class TestNumpyBackend:
+
+    def test_query_matches_brute_force_cosine(self, backend):
+        ids, texts, vectors, metas = _rows(50)
+        backend.upsert(ids, texts, vectors, metas)
+        backend.flush()
+
+        query = np.ones(8, dtype=np.float32)
+        matrix = np.asarray(vectors)
+        cosine = matrix @ query / (np.linalg.norm(matrix, axis=1) * np.linalg.norm(query))
+        expected = [texts[i] for i in np.argsort(-cosine)[:5]]
+
+        results = backend.query(query.tolist(), 5)
+        assert [doc for doc, _, _ in results] == expected
+        assert results[0][1] == pytest.approx(1 - cosine.max(), abs=1e-5)
+
+    def test_unflushed_tail_is_searchable(self, backend):
+        backend.upsert(["a#0"], ["alpha"], [[1.0, 0.0]], [{"parent_id": "a"}])
+        assert backend.query([1.0, 0.0], 3) == [("alpha", pytest.approx(0.0, abs=1e-6), {"parent_id": "a"})]
+
+    def test_upsert_overwrites_and_delete_hides(self, backend):
+        backend.upsert(["a#0", "b#0"], ["alpha", "bravo"], [[1.0, 0.0], [0.0, 1.0]], [{}, {}])
+        backend.flush()
+        backend.upsert(["a#0"], ["alpha v2"], [[0.0, 1.0]], [{}])
+        backend.delete(["b#0", "missing"])
+
+        assert backend.count() == 1
+        assert [doc for doc, _, _ in backend.query([0.0, 1.0], 5)] == ["alpha v2"]
+
+    def test_persisted_segments_are_memory_mapped(self, backend, tmp_path):
+        ids, texts, vectors, metas = _rows(10)
+        backend.upsert(ids, texts, vectors, metas)
+        backend.flush()
+        backend.delete(ids[:2])
+        backend.flush()
+
+        reopened = NumpyBackend(tmp_path / "vectors.kb")
+        assert reopened.count() == 8
+        assert all(isinstance(s.matrix, np.memmap) for s in reopened.segments)
+        assert reopened.get_ids_by_parent(["p0"]) == {"p0": {i for i in ids[2:] if i.startswith("p0#")}}
+
+    def test_segments_are_compacted(self, backend, monkeypatch):
+        monkeypatch.setattr(vector_backends, "MAX_SEGMENTS", 2)
+        ids, texts, vectors, metas = _rows(6)
+        for i in range(3):
+            backend.upsert(ids[i * 2:i * 2 + 2], texts[i * 2:i * 2 + 2], vectors[i * 2:i * 2 + 2], metas[i * 2:i * 2 + 2])
+            backend.flush()
+
+        assert len(backend.segments) == 1
+        assert backend.count() == 6
+        assert sorted(p.name for p in backend.path.glob("seg-*.npy")) == [f"{backend.segments[0].name}.npy"]
+
+    def test_filtered_query_scores_only_matching_rows(self, backend):
+        ids, texts, vectors, _ = _rows(30)
+        metas = [{"parent_id": f"p{i}", "source": "sheets" if i % 3 == 0 else "notion"} for i in range(30)]
+        backend.upsert(ids[:20], texts[:20], vectors[:20], metas[:20])
+        backend.flush()
+        backend.upsert(ids[20:], texts[20:], vectors[20:], metas[20:])  # Left in the unflushed tail
+        backend.delete([ids[3]])
+
+        query = np.ones(8, dtype=np.float32)
+        matrix = np.asarray(vectors)
+        cosine = matrix @ query / (np.linalg.norm(matrix, axis=1) * np.linalg.norm(query))
+        allowed = [i for i in range(30) if i % 3 == 0 and i != 3]
+        expected = [texts[i] for i in sorted(allowed, key=lambda i: -cosine[i])[:4]]
+
+        results = backend.query(query.tolist(), 4, normalize_filters({"source": "sheets"}))
+        assert [doc for doc, _, _ in results] == expected
+        assert backend.query(query.tolist(), 4, normalize_filters({"source": "web"})) == []
+
+
+class TestConcurrentWrites:
+
+    def test_queries_read_a_consistent_snapshot_while_writing(self, backend, monkeypatch):
+        monkeypatch.setattr(vector_backends, "MAX_SEGMENTS", 2)  # Compact often
+        ids, texts, vectors, metas = _rows(400)
+        metas = [{**meta, "text": text} for meta, text in zip(metas, texts, strict=True)]
+        backend.upsert(ids[:50], texts[:50], vectors[:50], metas[:50])
+        backend.flush()
+        errors = []
+        done = threading.Event()
+
+        def read():
+            query = np.ones(8, dtype=np.float32)
+            while not done.is_set():
+                try:
+                    for doc, _, meta in backend.query(query, 10):
+                        assert doc == meta["text"]
+                except Exception as e:
+                    errors.append(e)
+                    return
+
+        readers = [threading.Thread(target=read) for _ in range(3)]
+        for reader in readers:
+            reader.start()
+        for start in range(50, 400, 25):
+            end = start + 25
+            backend.upsert(ids[start:end], texts[start:end], vectors[start:end], metas[start:end])
+            backend.delete(ids[start - 50:start - 40])
+            backend.flush()
+        done.set()
+        for reader in readers:
+            reader.join()
+
+        assert not errors
+        assert backend.count() == 400 - 350 // 25 * 10
+
+    def test_view_taken_before_a_write_is_unchanged(self, backend):
+        backend.upsert(["a#0", "b#0"], ["alpha", "bravo"], [[1.0, 0.0], [0.0, 1.0]], [{}, {}])
+        backend.flush()
+        view = backend._view
+        backend.delete(["a#0"])
+        backend.upsert(["c#0"], ["charlie"], [[1.0, 1.0]], [{}])
+
+        assert view.count == 2 and view.live[0].all() and not len(view.tail_rows)
+        assert backend.count() == 2
+
+
+class TestQuantizedScan:
+
+    @pytest.mark.parametrize("quantization", ["float16", "int8"])
+    def test_results_and_distances_match_exact_search(self, tmp_path, quantization):
+        ids, texts, vectors, metas = _rows(400, dim=32, seed=3)
+        exact = NumpyBackend(tmp_path / "vectors.kb")
+        exact.upsert(ids, texts, vectors, metas)
+        exact.flush()
+        quantized = NumpyBackend(tmp_path / "vectors.kb", quantization=quantization)
+
+        for q in np.random.default_rng(4).normal(size=(5, 32)):
+            expected = exact.query(q.tolist(), 10)
+            results = quantized.query(q.tolist(), 10)
+            assert [doc for doc, _, _ in results] == [doc for doc, _, _ in expected]
+            # Re-scored from the float32 matrix, so distances are exact too
+            assert [d for _, d, _ in results] == pytest.approx([d for _, d, _ in expected], abs=1e-6)
+
+    def test_int8_scan_is_a_quarter_of_float32(self, tmp_path):
+        ids, texts, vectors, metas = _rows(100, dim=64)
+        backend = NumpyBackend(tmp_path / "vectors.kb", quantization="int8")
+        backend.upsert(ids, texts, vectors, metas)
+        backend.flush()
+
+        assert backend.segments[0].scan.codes.dtype == np.int8
+        float32_bytes = backend.segments[0].matrix.nbytes
+        assert backend.scan_nbytes == float32_bytes // 4 + 100 * 4  # codes + one float32 scale per row
+
+    def test_unknown_quantization_rejected(self, tmp_path):
+        with pytest.raises(ValueError):
+            NumpyBackend(tmp_path / "vectors.kb", quantization="int4")
+
+
+class TestCoarseSearch:
+
+    def test_truncated_scan_reranks_with_full_vectors(self, tmp_path):
+        rng = np.random.default_rng(5)
+        # Most of each vector's energy in the leading dims, as with Matryoshka embeddings
+        vectors = rng.normal(size=(300, 64)) * np.linspace(3.0, 0.2, 64)
+        ids = [f"p{i}#0" for i in range(300)]
+        texts = [f"chunk {i}" for i in range(300)]
+        metas = [{"parent_id": f"p{i}"} for i in range(300)]
+        exact = NumpyBackend(tmp_path / "vectors.kb")
+        exact.upsert(ids, texts, vectors.tolist(), metas)
+        exact.flush()
+        coarse = NumpyBackend(tmp_path / "vectors.kb", coarse_dims=16, rescore_factor=8)
+
+        assert coarse.segments[0].scan.codes.shape == (300, 16)
+        assert coarse.scan_nbytes == exact.scan_nbytes // 4
+        exact_distances = {doc: d for doc, d, _ in exact.query(vectors[0].tolist(), 300)}
+        for i in (0, 50, 200):
+            expected = [doc for doc, _, _ in exact.query(vectors[i].tolist(), 5)]
+            results = coarse.query(vectors[i].tolist(), 5)
+            assert results[0][0] == texts[i]
+            assert len({doc for doc, _, _ in results} & set(expected)) >= 4
+        # Shortlist re-ranked with the full vectors, so distances are exact
+        for doc, distance, _ in coarse.query(vectors[0].tolist(), 5):
+            assert distance == pytest.approx(exact_distances[doc], abs=1e-6)
+
+    def test_coarse_dims_at_full_size_scans_the_matrix(self, tmp_path):
+        ids, texts, vectors, metas = _rows(20)
+        backend = NumpyBackend(tmp_path / "vectors.kb", coarse_dims=256)
+        backend.upsert(ids, texts, vectors, metas)
+        backend.flush()
+
+        assert backend.segments[0].scan is None
+        assert backend.query(vectors[3], 1)[0][0] == texts[3]